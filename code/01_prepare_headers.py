@@ -1,64 +1,149 @@
 import pandas as pd
 from pathlib import Path
 
+from gradlife.ingest import (
+    CHUNK_ROWS,
+    HEADER_ROWS,
+    build_basic_metadata,
+    ingest_cache_key,
+    load_ingest_cache,
+    make_col_names,
+    outputs_match,
+    record_outputs,
+    cached_shape,
+    restore_chunks,
+    restore_data_csv,
+    save_ingest_cache,
+    stream_workbook,
+)
+from gradlife.keys import ID_COL, assign_ids
+
 # ========= 路径配置 =========
 DATA_PATH = Path("/workspace/data/data.xlsx")
 OUTPUT_DIR = Path("/workspace/output/01_cleaning")
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-# ========= 读取原始 Excel（不使用任何行作为表头）=========
+DATA_OUT_PATH = OUTPUT_DIR / "data_step1_raw_clean.csv"
+META_OUT_PATH = OUTPUT_DIR / "metadata_step1_basic.csv"
+# 流式模式下，数据行按块写成列式文件（part-00000.parquet, ...）
+CHUNK_DIR = OUTPUT_DIR / "data_step1_chunks"
+# 读取缓存：按 data.xlsx 的内容哈希 + 下面的设置索引，工作簿没变就不再解析
+CACHE_DIR = OUTPUT_DIR / ".ingest_cache"
+
+# ========= 读取方式 =========
+# "stream"：openpyxl read_only 逐行读取，分块写盘，峰值内存与行数无关（默认）
+# "full"  ：原来的 pd.read_excel 一次性读入（表不大时方便在 Jupyter 里调试）
+INGEST_MODE = "stream"
+
+# 影响输出内容的表头处理设置；任何一项变化都会让缓存失效
+INGEST_SETTINGS = {
+    "header_rows": HEADER_ROWS,         # 前两行：原始编号 + 题目文本
+    "col_name_pattern": "v{:03d}",      # 技术变量名规则
+    "mode": INGEST_MODE,
+    "id_col": ID_COL,                   # 第一列写入受访者主键（1..N，按行顺序）
+    "cache_version": 3,                 # 3：表头之外的数据列不再被截掉
+}
+
+
+def ingest_full():
+    """一次性读入整张表（不使用任何行作为表头）。"""
+    print(f"读取原始数据：{DATA_PATH}")
+    df_raw = pd.read_excel(DATA_PATH, header=None)
+
+    print("原始数据形状（含前两行表头）：", df_raw.shape)
+
+    # 第 1 行：原始编号（可能错位，但先保留以防后续对照）
+    row_codes = df_raw.iloc[0, :].copy()
+
+    # 第 2 行：问题文本（真正有意义的 header）
+    row_questions = df_raw.iloc[1, :].copy()
+
+    # 从第 3 行开始是正式数据
+    df_data = df_raw.iloc[2:, :].copy().reset_index(drop=True)
+
+    # ========= 生成规范的技术变量名 =========
+    # 例如 v001, v002, v003, ...
+    col_names = make_col_names(df_data.shape[1])
+    df_data.columns = col_names
+
+    print("生成技术变量名示例：", col_names[:10])
+
+    # ========= 受访者主键：按工作簿中的行顺序 1..N，之后所有派生表都带着它 =========
+    df_data.insert(0, ID_COL, assign_ids(len(df_data)))
+
+    # ========= 构建基础 metadata 表 =========
+    metadata = build_basic_metadata(col_names, row_codes.values, row_questions.values)
+
+    # ========= 保存清洗后的数据 =========
+    df_data.to_csv(DATA_OUT_PATH, index=False)
+
+    # ========= 简单查看一下前几列，方便你在 Jupyter 里检查 =========
+    print("\n【数据前 5 行】")
+    print(df_data.head())
+
+    return df_data, metadata
 
-print(f"读取原始数据：{DATA_PATH}")
-df_raw = pd.read_excel(DATA_PATH, header=None)
 
-print("原始数据形状（含前两行表头）：", df_raw.shape)
+def ingest_stream():
+    """逐行读取，边读边分块写出，不在内存里保留整张表。"""
+    print(f"流式读取原始数据：{DATA_PATH}（每块 {CHUNK_ROWS} 行）")
+    metadata, n_rows, n_cols = stream_workbook(
+        DATA_PATH,
+        chunk_dir=CHUNK_DIR,
+        csv_path=DATA_OUT_PATH,
+        chunk_rows=CHUNK_ROWS,
+    )
 
-# 第 1 行：原始编号（可能错位，但先保留以防后续对照）
-row_codes = df_raw.iloc[0, :].copy()
+    print("数据形状（不含表头）：", (n_rows, n_cols))
+    print("生成技术变量名示例：", metadata["col_name"].tolist()[:10])
+    print(f"已分块保存数据到: {CHUNK_DIR}")
 
-# 第 2 行：问题文本（真正有意义的 header）
-row_questions = df_raw.iloc[1, :].copy()
+    return metadata
 
-# 从第 3 行开始是正式数据
-df_data = df_raw.iloc[2:, :].copy().reset_index(drop=True)
 
-# ========= 生成规范的技术变量名 =========
-# 例如 v001, v002, v003, ...
-n_cols = df_data.shape[1]
-col_names = [f"v{str(i+1).zfill(3)}" for i in range(n_cols)]
-df_data.columns = col_names
+def output_paths():
+    paths = [DATA_OUT_PATH, META_OUT_PATH]
+    if INGEST_MODE == "stream":
+        paths += sorted(CHUNK_DIR.glob("part-*.parquet"))
+    return paths
 
-print("生成技术变量名示例：", col_names[:10])
 
-# ========= 构建基础 metadata 表 =========
+def main():
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cache_key = ingest_cache_key(DATA_PATH, INGEST_SETTINGS)
+    cached = load_ingest_cache(CACHE_DIR, cache_key)
 
-metadata = pd.DataFrame({
-    "col_name": col_names,               # 之后分析中真正使用的列名
-    "question_text": row_questions.values,  # 来自第 2 行
-    "orig_code_row1": row_codes.values      # 来自第 1 行（可能错位）
-})
+    if cached is not None:
+        metadata = cached
+        print(f"✅ 命中读取缓存（{cache_key[:12]}）：data.xlsx 内容未变化，无需重新解析。")
+        print("数据形状（不含表头）：", cached_shape(CACHE_DIR, cache_key))
 
-# 预留一些后面要填的列（先设为 None / 空）
-metadata["q_no"] = None        # 问卷题号（如 Q1, Q2, Q12_a 等，后面人工/半自动补）
-metadata["q_type"] = None      # 题型：single/multiple/likert/grid/open/numeric...
-metadata["multi_group"] = None # 对于矩阵/多列题，标记它们属于哪个题组
-metadata["value_type"] = None  # numeric/category/text...
-metadata["value_labels"] = None  # 之后可以存 JSON 字符串或留空
+        # 先比对输出文件的签名，都还在就不读快照
+        if outputs_match(CACHE_DIR, cache_key, output_paths()):
+            print("输出文件与缓存一致，跳过重写。")
+            return
 
-# ========= 保存清洗后的数据和 metadata =========
+        print("输出文件缺失或被改动，从缓存快照恢复 ...")
+        if INGEST_MODE == "stream":
+            restore_chunks(CACHE_DIR, cache_key, CHUNK_DIR)
+        restore_data_csv(CACHE_DIR, cache_key, DATA_OUT_PATH)
+    elif INGEST_MODE == "stream":
+        metadata = ingest_stream()
+        save_ingest_cache(CACHE_DIR, cache_key, metadata, chunk_dir=CHUNK_DIR)
+    else:
+        df_data, metadata = ingest_full()
+        save_ingest_cache(CACHE_DIR, cache_key, metadata, df_data=df_data)
 
-data_out_path = OUTPUT_DIR / "data_step1_raw_clean.csv"
-meta_out_path = OUTPUT_DIR / "metadata_step1_basic.csv"
+    # ========= 保存 metadata =========
+    metadata.to_csv(META_OUT_PATH, index=False)
+    record_outputs(CACHE_DIR, cache_key, output_paths())
 
-df_data.to_csv(data_out_path, index=False)
-metadata.to_csv(meta_out_path, index=False)
+    print(f"已保存数据到: {DATA_OUT_PATH}")
+    print(f"已保存元数据到: {META_OUT_PATH}")
 
-print(f"已保存数据到: {data_out_path}")
-print(f"已保存元数据到: {meta_out_path}")
+    print("\n【metadata 前 10 行】")
+    print(metadata.head(10))
 
-# ========= 简单查看一下前几列，方便你在 Jupyter 里检查 =========
-print("\n【数据前 5 行】")
-print(df_data.head())
 
-print("\n【metadata 前 10 行】")
-print(metadata.head(10))
+if __name__ == "__main__":
+    main()
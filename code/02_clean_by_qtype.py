@@ -4,6 +4,11 @@ from pathlib import Path
 import json
 import re
 
+from gradlife.codebook import build_codebook
+from gradlife.encoding import encode_categorical_frame, expand_bitmask, pack_multiple_choice
+from gradlife.textio import read_table_clean
+from gradlife.typed_store import TYPED_CSV, TYPED_PARQUET, write_typed
+
 # ============ 路径配置 ============
 DATA_STEP1_PATH = Path("/workspace/output/01_cleaning/data_step1_raw_clean.csv")
 # META_STEP1_PATH = Path("/workspace/output/01_cleaning/metadata_step1_basic.csv")
@@ -12,7 +17,10 @@ META_STEP1_PATH = Path("/workspace/output/01_cleaning/metadata_step1_basic.xlsx"
 OUTPUT_DIR = Path("/workspace/output/02_typed_clean")
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-DATA_OUT_PATH = OUTPUT_DIR / "data_step2_typed_clean.csv"
+# 列式存储：编码列为 Int8/Int16，文本列字典编码；下游用 gradlife.typed_store.read_typed 按列读取
+DATA_OUT_PATH = TYPED_PARQUET
+# 需要给 Excel / 外部工具看时再打开，额外写一份旧格式 CSV
+WRITE_CSV_COPY = False
 META_OUT_PATH = OUTPUT_DIR / "metadata_step2_typed_clean.csv"
 
 # ============ 一些辅助函数 ============
@@ -82,19 +90,14 @@ def encode_single_choice(series):
     """
     单选题：把文本类别自动编码为 1..k，并返回编码后的 Series 和 映射 dict。
     映射 dict: {code(int): label(str)}
-    """
-    s = series.astype("string").map(standardize_str)
-    # 保留原始显示文本（未小写）当 label
-    # 用 value_counts 排序，让高频选项编号靠前，便于查看
-    value_counts = s.value_counts(dropna=True)
-    categories = list(value_counts.index)
-
-    code_map = {cat: i+1 for i, cat in enumerate(categories)}
-    encoded = s.map(code_map)
+    高频选项编号靠前，便于查看。
 
-    # 生成标签映射（把 None/nan 排除）
-    value_labels = {int(v): str(k) for k, v in code_map.items() if k is not None and k == k}
-    return encoded, value_labels
+    批量处理多列时请直接用 gradlife.encoding.encode_categorical_frame，
+    它一次性向量化处理所有列。
+    """
+    frame = series.to_frame(name="_col")
+    codes, value_labels = encode_categorical_frame(frame, ["_col"])
+    return codes["_col"].rename(series.name), value_labels["_col"]
 
 
 def encode_likert(series):
@@ -110,24 +113,12 @@ def encode_multiple_choice(df, cols):
     多选题的一组列：
       - 假设：任意非空/非明显否定值视为选中(1)，否则为 0。
       - 返回一个新的 DataFrame（同样的列名，但都是 0/1）。
-    你之后可以根据实际选项文本再细改逻辑。
+    现在主流程里多选题存成一个位掩码列（见 pack_multiple_choice），
+    这个函数只是把掩码展开成 0/1 视图，方便单独查看某一组。
     """
-    df_multi = pd.DataFrame(index=df.index)
-
-    for col in cols:
-        s = df[col]
-
-        def to_binary(x):
-            if pd.isna(x):
-                return 0
-            txt = str(x).strip().lower()
-            if txt in ["", "nan", "none", "no", "not selected", "0", "false"]:
-                return 0
-            # 其它一律视为“选中”
-            return 1
-
-        df_multi[col] = s.map(to_binary)
-
+    mask = pack_multiple_choice(df, cols)
+    df_multi = expand_bitmask(mask, cols, suffix="")
+    df_multi.index = df.index
     return df_multi
 
 
@@ -140,29 +131,65 @@ def clean_open_text(series):
     return s, answered.astype(int)
 
 
-# ============ 主流程 ============
-def read_csv_safely(path):
+class MetaBuilder:
     """
-    尝试用多种编码读取 CSV，避免 UnicodeDecodeError。
-    优先 utf-8 / utf-8-sig，如果都不行就退到 latin1。
+    收集新增派生列（_code / _num / _bin / _answered）的 metadata 记录，最后一次性追加。
+
+    原来每新增一列就 pd.concat 一次、再用 meta["col_name"] == col 扫一遍整表，
+    列数一多就是平方级；这里先按 col_name 建一次索引（dict），
+    查原始列信息是 O(1)，新记录攒在 list 里，build() 时只 concat 一次。
     """
-    encodings_to_try = ["utf-8", "utf-8-sig", "latin1"]
-    last_error = None
-    for enc in encodings_to_try:
-        try:
-            print(f"尝试用编码 {enc} 读取: {path}")
-            return pd.read_csv(path, encoding=enc)
-        except UnicodeDecodeError as e:
-            print(f"用编码 {enc} 读取失败：{e}")
-            last_error = e
-    # 如果都失败，就把最后一个错误抛出去
-    raise last_error
 
+    def __init__(self, meta):
+        self.meta = meta
+        self.rows_by_col = meta.set_index("col_name", drop=False).to_dict("index")
+        self.new_rows = []
+
+    def row(self, col):
+        """按列名取原始 metadata 记录（dict）。"""
+        return self.rows_by_col[col]
+
+    def add_derived(self, col, new_col, text_suffix, q_type, value_labels):
+        """为派生列 new_col 添加一条记录，题号 / 原始编号 / 题组沿用原始列 col。"""
+        row_original = self.row(col)
+        self.new_rows.append({
+            "col_name": new_col,
+            "question_text": str(row_original["question_text"]) + " " + text_suffix,
+            "orig_code_row1": row_original["orig_code_row1"],
+            "q_no": row_original["q_no"],
+            "q_type": q_type,
+            "multi_group": row_original["multi_group"],
+            "value_type": "numeric",
+            "value_labels": json.dumps(value_labels, ensure_ascii=False),
+        })
+
+    def add_group(self, group, mask_col, cols, bit_labels):
+        """为多选题组的位掩码列添加一条记录（题号 / 题干沿用组内第一列）。"""
+        row_first = self.row(cols[0])
+        self.new_rows.append({
+            "col_name": mask_col,
+            "question_text": str(row_first["question_text"]) + " [bitmask]",
+            "orig_code_row1": group,
+            "q_no": row_first["q_no"],
+            "q_type": "multiple_bitmask",
+            "multi_group": group,
+            "value_type": "numeric",
+            "value_labels": json.dumps(bit_labels, ensure_ascii=False),
+        })
+
+    def build(self):
+        """原始 metadata + 所有新增记录（只 concat 一次）。"""
+        if not self.new_rows:
+            return self.meta
+        return pd.concat([self.meta, pd.DataFrame(self.new_rows)], ignore_index=True)
+
+
+# ============ 主流程 ============
 def main():
     print("加载 step1 数据和 metadata ...")
     df = pd.read_csv(DATA_STEP1_PATH)          # 原来的数据基本没事
-    # meta = read_csv_safely(META_STEP1_PATH) 
-    meta = pd.read_excel(META_STEP1_PATH)       # ✅ 用 Excel 读取 metadata
+    # ✅ 用 Excel 读取 metadata；CSV 也可以，编码自动判断。题目文本里的乱码（Masterâ\x80\x99s 等）读入时一并修复
+    meta = read_table_clean(META_STEP1_PATH)
 
     # 确保这些列存在
     for col in ["q_no", "q_type", "multi_group", "value_type", "value_labels"]:
@@ -186,57 +213,37 @@ def main():
     meta["q_type"] = meta["q_type"].astype("string")
     meta["multi_group"] = meta["multi_group"].astype("string")
 
-    # (a) 单选题
-    single_vars = meta.loc[meta["q_type"] == "single", "col_name"].tolist()
-    print(f"  单选题数量: {len(single_vars)}")
-    for col in single_vars:
-        print(f"    编码 single: {col}")
-        encoded, val_labels = encode_single_choice(df_clean[col])
-        new_col = f"{col}_code"
-        df_clean[new_col] = encoded
-        updated_value_labels[new_col] = val_labels
-        # 在 metadata 中为新列添加记录
-        question_text = meta.loc[meta["col_name"] == col, "question_text"].iloc[0]
-        q_no = meta.loc[meta["col_name"] == col, "q_no"].iloc[0]
-        new_row = {
-            "col_name": new_col,
-            "question_text": question_text + " [coded]",
-            "orig_code_row1": meta.loc[meta["col_name"] == col, "orig_code_row1"].iloc[0],
-            "q_no": q_no,
-            "q_type": "single_coded",
-            "multi_group": meta.loc[meta["col_name"] == col, "multi_group"].iloc[0],
-            "value_type": "numeric",
-            "value_labels": json.dumps(val_labels, ensure_ascii=False),
-        }
-        meta = pd.concat([meta, pd.DataFrame([new_row])], ignore_index=True)
+    # 新增列的 metadata 记录先攒起来，最后一次性追加
+    builder = MetaBuilder(meta)
 
-    # (b) Likert 题
+    # (a)(b) 单选题 + Likert 题：所有列放在一起一次性向量化编码
+    single_vars = meta.loc[meta["q_type"] == "single", "col_name"].tolist()
     likert_vars = meta.loc[meta["q_type"] == "likert", "col_name"].tolist()
+    print(f"  单选题数量: {len(single_vars)}")
     print(f"  Likert 题数量: {len(likert_vars)}")
-    for col in likert_vars:
-        print(f"    编码 likert: {col}")
-        encoded, val_labels = encode_likert(df_clean[col])
-        new_col = f"{col}_num"
-        df_clean[new_col] = encoded
-        updated_value_labels[new_col] = val_labels
-        question_text = meta.loc[meta["col_name"] == col, "question_text"].iloc[0]
-        q_no = meta.loc[meta["col_name"] == col, "q_no"].iloc[0]
-        new_row = {
-            "col_name": new_col,
-            "question_text": question_text + " [numeric]",
-            "orig_code_row1": meta.loc[meta["col_name"] == col, "orig_code_row1"].iloc[0],
-            "q_no": q_no,
-            "q_type": "likert_numeric",
-            "multi_group": meta.loc[meta["col_name"] == col, "multi_group"].iloc[0],
-            "value_type": "numeric",
-            "value_labels": json.dumps(val_labels, ensure_ascii=False),
-        }
-        meta = pd.concat([meta, pd.DataFrame([new_row])], ignore_index=True)
+    codes, val_labels_by_col = encode_categorical_frame(df_clean, single_vars + likert_vars)
+
+    coded_blocks = []
+    for cols, suffix, text_suffix, q_type in [
+        (single_vars, "_code", "[coded]", "single_coded"),
+        (likert_vars, "_num", "[numeric]", "likert_numeric"),
+    ]:
+        block = codes[cols].rename(columns=lambda c: f"{c}{suffix}")
+        coded_blocks.append(block)
+        for col in cols:
+            new_col = f"{col}{suffix}"
+            updated_value_labels[new_col] = val_labels_by_col[col]
+            # 在 metadata 中为新列添加记录
+            builder.add_derived(col, new_col, text_suffix, q_type, val_labels_by_col[col])
+
+    df_clean = pd.concat([df_clean] + coded_blocks, axis=1)
 
-    # (c) 多选题：按 multi_group 分组处理
+    # (c) 多选题：按 multi_group 分组处理，每组打包成一个位掩码列 <组名>_mask
     # 约定：你在 metadata 中给这一组列都标 q_type="multiple"，并且 multi_group 相同（例如 "Q5"）
+    # 第 i 个选项对应掩码第 i 位；*_bin 列不再落盘，需要时用 gradlife.encoding.expand_bitmask 展开
     multiple_meta = meta.loc[meta["q_type"] == "multiple"].copy()
     print(f"  多选题条目数量: {multiple_meta.shape[0]}")
+    mask_cols = {}
     for group, sub_meta in multiple_meta.groupby("multi_group"):
         cols = sub_meta["col_name"].tolist()
         if group == "nan" or pd.isna(group):
@@ -244,28 +251,23 @@ def main():
             print(f"    [跳过] multi_group 为空的 multiple 列: {cols}")
             continue
         print(f"    处理多选组 {group}: {cols}")
-        df_multi = encode_multiple_choice(df_clean, cols)
+        mask_col = f"{group}_mask"
+        mask_cols[mask_col] = pack_multiple_choice(df_clean, cols)
+
+        # 位掩码列的 metadata：value_labels 记录 位序号 -> 选项列名
+        bit_labels = {bit: col for bit, col in enumerate(cols)}
+        updated_value_labels[mask_col] = bit_labels
+        builder.add_group(group, mask_col, cols, bit_labels)
 
-        # 为每一列创建二元变量（覆盖原列或新建列都可以，这里选择新建 *_bin）
+        # 每个选项仍然登记一条 *_bin 记录（按需展开的视图），描述不变
         for col in cols:
             new_col = f"{col}_bin"
-            df_clean[new_col] = df_multi[col]
             val_labels = {0: "not_selected", 1: "selected"}
             updated_value_labels[new_col] = val_labels
+            builder.add_derived(col, new_col, "[binary]", "multiple_binary", val_labels)
 
-            # 更新 metadata，为新列增加记录
-            row_original = meta.loc[meta["col_name"] == col].iloc[0]
-            new_row = {
-                "col_name": new_col,
-                "question_text": str(row_original["question_text"]) + " [binary]",
-                "orig_code_row1": row_original["orig_code_row1"],
-                "q_no": row_original["q_no"],
-                "q_type": "multiple_binary",
-                "multi_group": row_original["multi_group"],
-                "value_type": "numeric",
-                "value_labels": json.dumps(val_labels, ensure_ascii=False),
-            }
-            meta = pd.concat([meta, pd.DataFrame([new_row])], ignore_index=True)
+    if mask_cols:
+        df_clean = pd.concat([df_clean, pd.DataFrame(mask_cols, index=df_clean.index)], axis=1)
 
     # (d) 开放题：保留文本 + 是否作答
     open_vars = meta.loc[meta["q_type"] == "open", "col_name"].tolist()
@@ -278,18 +280,10 @@ def main():
         df_clean[new_col] = answered
 
         # 在 metadata 中添加 answered 列记录
-        row_original = meta.loc[meta["col_name"] == col].iloc[0]
-        new_row = {
-            "col_name": new_col,
-            "question_text": str(row_original["question_text"]) + " [answered_flag]",
-            "orig_code_row1": row_original["orig_code_row1"],
-            "q_no": row_original["q_no"],
-            "q_type": "open_answered_flag",
-            "multi_group": row_original["multi_group"],
-            "value_type": "numeric",
-            "value_labels": json.dumps({0: "no", 1: "yes"}, ensure_ascii=False),
-        }
-        meta = pd.concat([meta, pd.DataFrame([new_row])], ignore_index=True)
+        builder.add_derived(col, new_col, "[answered_flag]", "open_answered_flag", {0: "no", 1: "yes"})
+
+    # 原始 metadata + 所有派生列记录，只合并一次
+    meta = builder.build()
 
     # (e) numeric：简单转为数值（例如已经是数字/区间中点）
     numeric_vars = meta.loc[meta["q_type"] == "numeric", "col_name"].tolist()
@@ -297,21 +291,27 @@ def main():
     for col in numeric_vars:
         print(f"    转为 numeric: {col}")
         df_clean[col] = pd.to_numeric(df_clean[col], errors="coerce")
-        # 在 metadata 标记 value_type
-        meta.loc[meta["col_name"] == col, "value_type"] = "numeric"
+
+    # 在 metadata 标记 value_type（一次性按题型赋值，不再逐列扫描）
+    # value_type 原来可能整列为空（float），先转成 object 再写字符串
+    meta["value_type"] = meta["value_type"].astype(object)
+    meta.loc[meta["q_type"] == "numeric", "value_type"] = "numeric"
 
     # id 类型就原样复制，只标记 value_type
-    id_vars = meta.loc[meta["q_type"] == "id", "col_name"].tolist()
-    print(f"  ID 类变量数量: {len(id_vars)}")
-    for col in id_vars:
-        meta.loc[meta["col_name"] == col, "value_type"] = "id"
+    id_mask = meta["q_type"] == "id"
+    print(f"  ID 类变量数量: {int(id_mask.sum())}")
+    meta.loc[id_mask, "value_type"] = "id"
 
     # ---------- 3) 保存结果 ----------
     print("保存清洗后的数据和更新后的 metadata ...")
-    df_clean.to_csv(DATA_OUT_PATH, index=False)
+    data_path = write_typed(df_clean, DATA_OUT_PATH, keep_string_cols=open_vars)
+    if WRITE_CSV_COPY:
+        df_clean.to_csv(TYPED_CSV, index=False)
     meta.to_csv(META_OUT_PATH, index=False)
+    # 编译 codebook：value_labels 只在这里解析一次，下游脚本直接加载标签数组
+    build_codebook(META_OUT_PATH)
 
-    print(f"数据已保存到: {DATA_OUT_PATH}")
+    print(f"数据已保存到: {data_path}")
     print(f"metadata 已保存到: {META_OUT_PATH}")
     print("完成。")
 
@@ -1,10 +1,11 @@
 import pandas as pd
 from pathlib import Path
 
-DATA_PATH = Path("/workspace/output/02_typed_clean/data_step2_typed_clean.csv")
+from gradlife.typed_store import read_typed
+
 META_PATH = Path("/workspace/output/02_typed_clean/metadata_step2_typed_clean.csv")
 
-df = pd.read_csv(DATA_PATH)
+df = read_typed()
 meta = pd.read_csv(META_PATH)
 
 print("数据形状:", df.shape)
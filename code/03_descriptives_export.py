@@ -1,10 +1,13 @@
 import pandas as pd
 import numpy as np
-import json
 from pathlib import Path
 
+from gradlife import session
+from gradlife.codebook import load_codebook
+from gradlife.encoding import mask_dtype, option_counts
+from gradlife.typed_store import read_typed, typed_columns
+
 # ===== 路径配置 =====
-DATA_PATH = Path("/workspace/output/02_typed_clean/data_step2_typed_clean.csv")
 META_PATH = Path("/workspace/output/02_typed_clean/metadata_step2_typed_clean.csv")
 
 OUTPUT_DIR = Path("/workspace/output/03_descriptives")
@@ -12,17 +15,6 @@ OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 # ===== 一些小工具函数 =====
 
-def parse_value_labels(val):
-    """metadata 里 value_labels 列存的是 JSON 字符串 -> 解析为 dict"""
-    if pd.isna(val):
-        return {}
-    if isinstance(val, dict):
-        return val
-    try:
-        return json.loads(val)
-    except Exception:
-        return {}
-
 def freq_table(series):
     """给一个 Series 做频数和百分比，返回 DataFrame，第一列统一叫 code"""
     counts = series.value_counts(dropna=False)
@@ -42,8 +34,14 @@ def freq_table(series):
 
 def main():
     print("读取数据 ...")
-    df = pd.read_csv(DATA_PATH)
-    meta = pd.read_csv(META_PATH)
+    meta = session.read_csv(META_PATH)
+    cb = load_codebook(META_PATH)
+
+    # 只读下面会统计到的编码列 / 数值列 / 位掩码列（不读原始文本）
+    stat_types = ["single_coded", "likert_numeric", "multiple_bitmask", "multiple_binary"]
+    available = set(typed_columns())
+    stat_cols = meta.loc[meta["q_type"].isin(stat_types), "col_name"]
+    df = read_typed([c for c in stat_cols if c in available])
 
     # 方便查找：建一个以 col_name 为索引的 metadata 视图
     meta_idx = meta.set_index("col_name")
@@ -59,12 +57,11 @@ def main():
         q_no = meta_idx.loc[col, "q_no"]
         q_text = meta_idx.loc[col, "question_text"]
         multi_group = meta_idx.loc[col, "multi_group"]
-        value_labels = parse_value_labels(meta_idx.loc[col, "value_labels"])
 
         ft = freq_table(df[col])
         # 把 numeric code 转成 int（有 NaN 的要先过滤）
         ft["code_int"] = pd.to_numeric(ft["code"], errors="coerce").astype("Int64")
-        ft["label"] = ft["code_int"].map(lambda x: value_labels.get(int(x), np.nan) if pd.notna(x) else np.nan)
+        ft["label"] = cb.label(col, ft["code_int"]) if cb.has_labels(col) else np.nan
 
         ft["col_name"] = col
         ft["q_no"] = q_no
@@ -92,12 +89,16 @@ def main():
         q_no = meta_idx.loc[col, "q_no"]
         q_text = meta_idx.loc[col, "question_text"]
         multi_group = meta_idx.loc[col, "multi_group"]
-        value_labels = parse_value_labels(meta_idx.loc[col, "value_labels"])
 
         ft = freq_table(df[col])
         ft["code_int"] = pd.to_numeric(ft["code"], errors="coerce").astype("Int64")
         # 如果有 value_labels，就用它；否则 label 就等于 code 本身
-        ft["label"] = ft["code_int"].map(lambda x: value_labels.get(int(x), x) if pd.notna(x) else np.nan)
+        code_obj = ft["code_int"].astype(object)
+        if cb.has_labels(col):
+            labels = cb.label(col, ft["code_int"])
+            ft["label"] = labels.where(labels.notna() | code_obj.isna(), code_obj)
+        else:
+            ft["label"] = code_obj
 
         ft["col_name"] = col
         ft["q_no"] = q_no
@@ -115,23 +116,42 @@ def main():
         print("没有检测到 likert_numeric 变量。")
 
     # ---------- 3) 多选题（二元变量 multiple_binary） ----------
+    # 多选题在 typed_clean 里按组存成位掩码列（q_type = multiple_bitmask），
+    # 这里直接对掩码做位运算统计每个选项的选中人数，不用展开成 *_bin 列。
     print("处理 multiple_binary ...")
+    selected_by_bin_col = {}  # {v007_bin: (选中人数, 有效样本量)}
+    mask_meta = meta.loc[meta["q_type"] == "multiple_bitmask"]
+    for _, mrow in mask_meta.iterrows():
+        mask_col = mrow["col_name"]
+        if mask_col not in df.columns:
+            continue
+        option_cols = list(cb.labels_of(mask_col))  # 第 b 位 → 选项列名 v007, v008, ...
+        # 按选项个数用无符号类型（最多 uint64）：转成 int64 时第 64 位会溢出成负数
+        mask = df[mask_col].dropna().to_numpy(dtype=mask_dtype(len(option_cols)))
+        counts = option_counts(mask, len(option_cols))
+        for opt_col, cnt in zip(option_cols, counts):
+            selected_by_bin_col[f"{opt_col}_bin"] = (int(cnt), len(mask))
+
     multiple_bin_cols = meta.loc[meta["q_type"] == "multiple_binary", "col_name"].tolist()
     multi_results = []
 
     for col in multiple_bin_cols:
-        if col not in df.columns:
+        if col in selected_by_bin_col:
+            count_selected, total = selected_by_bin_col[col]
+        elif col in df.columns:
+            # 兼容旧版 typed_clean（还带 *_bin 列）
+            s = df[col]
+            count_selected = (s == 1).sum()
+            total = s.notna().sum()
+        else:
             continue
         row = meta_idx.loc[col]
         q_no = row["q_no"]
         q_text = row["question_text"]
         multi_group = row["multi_group"]
-        value_labels = parse_value_labels(row["value_labels"])
+        value_labels = cb.label_dict(col)
 
-        s = df[col]
         # 只关心“选中”的比例（值==1）
-        count_selected = (s == 1).sum()
-        total = s.notna().sum()
         percent_selected = count_selected / total * 100 if total > 0 else np.nan
 
         # 默认 label = 1 对应的标签（通常是 “selected”）
@@ -1,9 +1,7 @@
-import pandas as pd
-from pathlib import Path
+from gradlife.typed_store import read_typed
 
-DATA_PATH = Path("/workspace/output/02_typed_clean/data_step2_typed_clean.csv")
 
-df = pd.read_csv(DATA_PATH)
+df = read_typed(["v084"])
 
 print("v084 原始回答的前 20 个：")
 print(df["v084"].dropna().unique()[:20])
@@ -0,0 +1,26 @@
+"""
+14_coded_topic_vs_worklife.py
+
+某道编码题 × high_stress_group 的交叉表（每个标签内部的百分比），话题配置见 gradlife/topics.py。
+原来的 14（债务）、18（心理健康求助）、20（霸凌）都由这个脚本生成，流水线按 TOPICS 为每个话题登记一个步骤。
+
+用法（在 code/ 目录下）：
+    python 14_coded_topic_vs_worklife.py debt            # 只生成一个话题
+    python 14_coded_topic_vs_worklife.py                 # 生成所有没有专门脚本的话题
+"""
+
+import sys
+
+from gradlife.topics import TOPICS, generic_topics, write_topic_table
+
+
+def main():
+    names = sys.argv[1:] or generic_topics()
+    unknown = [n for n in names if n not in TOPICS]
+    if unknown:
+        raise SystemExit(f"❌ 未知话题：{', '.join(unknown)}（可选：{', '.join(TOPICS)}）")
+    for name in names:
+        write_topic_table(name)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,8 @@
-import pandas as pd
-from pathlib import Path
-
-DATA_PATH = Path("/workspace/output/02_typed_clean/data_step2_typed_clean.csv")
+from gradlife.typed_store import read_typed
 
 def main():
-    df = pd.read_csv(DATA_PATH)
-
     cols_to_show = ["v070", "v070_num", "v072", "v072_num"]
+    df = read_typed(cols_to_show)
     exist_cols = [c for c in cols_to_show if c in df.columns]
 
     print("存在的相关列：", exist_cols)
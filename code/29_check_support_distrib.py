@@ -1,7 +1,8 @@
 import pandas as pd
 from pathlib import Path
 
-DATA_PATH = Path("/workspace/output/02_typed_clean/data_step2_typed_clean.csv")
+from gradlife.keys import ID_COL, attach
+from gradlife.typed_store import read_typed
 WORKLIFE_PATH = Path("/workspace/output/04_worklife/worklife_derived_vars.csv")
 
 # 想看的导师 / 学校支持变量（数值版）
@@ -14,17 +15,11 @@ SUPPORT_VARS = {
 }
 
 def main():
-    df = pd.read_csv(DATA_PATH)
+    df = read_typed([ID_COL] + list(SUPPORT_VARS))
     wl = pd.read_csv(WORKLIFE_PATH)
 
-    # 简单对齐一下 high_stress_group，后面分析会用到，这里先合并方便顺便看分布
-    if len(df) != len(wl):
-        print("警告：主数据和 worklife_derived_vars 行数不一致！")
-        print("data_step2_typed_clean 行数:", len(df))
-        print("worklife_derived_vars 行数:", len(wl))
-        return
-
-    df["high_stress_group"] = wl["high_stress_group"]
+    # 按 resp_id 合并 high_stress_group，后面分析会用到，这里先合并方便顺便看分布
+    df = attach(df, wl, ["high_stress_group"])
 
     print("合并 high_stress_group 成功。")
 
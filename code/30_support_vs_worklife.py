@@ -1,7 +1,14 @@
 import pandas as pd
 from pathlib import Path
 
-DATA_PATH = Path("/workspace/output/02_typed_clean/data_step2_typed_clean.csv")
+from gradlife import session
+from gradlife.bootstrap import shared
+from gradlife.crosstab import crosstab
+from gradlife.derive import derive
+from gradlife.derived_vars import SPECS
+from gradlife.keys import ID_COL, attach
+from gradlife.typed_store import read_typed
+
 WORKLIFE_PATH = Path("/workspace/output/04_worklife/worklife_derived_vars.csv")
 
 OUT_DIR = Path("/workspace/output/07_support")
@@ -16,50 +23,15 @@ SUPPORT_VARS = {
     "v101_num": "Q35.e – University supports good work–life balance",
 }
 
-def clean_likert_1_to_7(x):
-    """只保留 1–7 的值，其他(包括8、0等)视为缺失。"""
-    if pd.isna(x):
-        return pd.NA
-    try:
-        v = float(x)
-    except Exception:
-        return pd.NA
-    if 1 <= v <= 7:
-        return v
-    return pd.NA
-
-def cat_support(score):
-    """把 1–7 的支持感/满意度分成三档."""
-    if pd.isna(score):
-        return pd.NA
-    try:
-        s = float(score)
-    except Exception:
-        return pd.NA
-
-    if s <= 3:
-        return "Low support (1–3)"
-    elif s == 4:
-        return "Neutral (4)"
-    else:  # 5–7
-        return "High support (5–7)"
-
 def make_table(df, var_col, cat_col, question_label, out_prefix):
     """
     按支持档次 × high_stress_group 做交叉表，并导出 CSV。
 
     返回一个标准化的长表：
-    question, factor, level, high_stress_group, count, percent
+    question, factor, level, high_stress_group, count, percent, percent_ci_low, percent_ci_high
     """
-    sub = df[[cat_col, "high_stress_group"]].dropna()
-    ct = (
-        sub.groupby([cat_col, "high_stress_group"])
-        .size()
-        .reset_index(name="count")
-    )
-    # 每个档次内部的百分比
-    total_by_cat = ct.groupby(cat_col)["count"].transform("sum")
-    ct["percent"] = ct["count"] / total_by_cat * 100
+    # 每个档次内部的百分比（档次或 high_stress_group 缺失的行不计），带 bootstrap 置信区间
+    ct = crosstab(df, cat_col, boot=shared())
 
     # 统一列名，方便之后合并
     ct = ct.rename(
@@ -75,7 +47,8 @@ def make_table(df, var_col, cat_col, question_label, out_prefix):
 
     # 调整列顺序
     ct = ct[
-        ["question", "factor", "level", "high_stress_group", "count", "percent"]
+        ["question", "factor", "level", "high_stress_group", "count", "percent",
+         "percent_ci_low", "percent_ci_high"]
     ]
 
     out_path = OUT_DIR / f"{out_prefix}_vs_high_stress.csv"
@@ -86,18 +59,17 @@ def make_table(df, var_col, cat_col, question_label, out_prefix):
     return ct
 
 def main():
-    df = pd.read_csv(DATA_PATH)
-    wl = pd.read_csv(WORKLIFE_PATH)
+    df = read_typed([ID_COL] + list(SUPPORT_VARS))
+    wl = session.read_csv(WORKLIFE_PATH)
 
-    if len(df) != len(wl):
-        print("⚠️ 警告：主数据和 worklife_derived_vars 行数不一致！")
-        print("data_step2_typed_clean 行数:", len(df))
-        print("worklife_derived_vars 行数:", len(wl))
-        return
-
-    df["high_stress_group"] = wl["high_stress_group"]
+    # 按 resp_id 把 high_stress_group 合并进来
+    df = attach(df, wl, ["high_stress_group"])
     print("合并 high_stress_group 成功。")
 
+    # 清洗为 1–7 并分档（规格见 gradlife/derived_vars.py），所有支持变量一次算完
+    present = [c for c in SUPPORT_VARS if c in df.columns]
+    derived = derive(df, SPECS, targets=[c + sfx for c in present for sfx in ("_clean", "_cat")])
+
     all_tables = []
 
     for col, q_label in SUPPORT_VARS.items():
@@ -111,14 +83,14 @@ def main():
 
         # 清洗为 1–7
         clean_col = col + "_clean"
-        df[clean_col] = df[col].apply(clean_likert_1_to_7)
+        df[clean_col] = derived[col + "_clean"]
 
         print("\n【清洗后数值分布（1–7，含缺失）】")
         print(df[clean_col].value_counts(dropna=False).sort_index())
 
         # 分档：低 / 中立 / 高 支持
         cat_col = col + "_cat"
-        df[cat_col] = df[clean_col].apply(cat_support)
+        df[cat_col] = derived[col + "_cat"]
 
         print("\n【分档后的分布】")
         print(df[cat_col].value_counts(dropna=False))
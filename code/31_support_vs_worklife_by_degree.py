@@ -1,10 +1,15 @@
 import pandas as pd
-import json
 from pathlib import Path
 
-DATA_PATH = Path("/workspace/output/02_typed_clean/data_step2_typed_clean.csv")
+from gradlife import session
+from gradlife.crosstab import crosstabs
+from gradlife.derive import derive
+from gradlife.derived_vars import SPECS
+from gradlife.codebook import load_codebook
+from gradlife.keys import ID_COL, attach
+from gradlife.typed_store import read_typed
+
 WORKLIFE_PATH = Path("/workspace/output/04_worklife/worklife_derived_vars.csv")
-META_PATH = Path("/workspace/output/02_typed_clean/metadata_step2_typed_clean.csv")
 
 OUT_DIR = Path("/workspace/output/07_support")
 OUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -19,78 +24,19 @@ SUPPORT_VARS = {
 }
 
 
-def parse_value_labels(val):
-    if pd.isna(val):
-        return {}
-    if isinstance(val, dict):
-        return val
-    try:
-        return json.loads(val)
-    except Exception:
-        return {}
-
-
-def clean_likert_1_to_7(x):
-    """只保留 1–7 的值，其他(包括8等)视为缺失。"""
-    if pd.isna(x):
-        return pd.NA
-    try:
-        v = float(x)
-    except Exception:
-        return pd.NA
-    if 1 <= v <= 7:
-        return v
-    return pd.NA
-
-
-def cat_support(score):
-    """把 1–7 的支持感/满意度分成三档."""
-    if pd.isna(score):
-        return pd.NA
-    try:
-        s = float(score)
-    except Exception:
-        return pd.NA
-
-    if s <= 3:
-        return "Low support (1–3)"
-    elif s == 4:
-        return "Neutral (4)"
-    else:  # 5–7
-        return "High support (5–7)"
-
-
 def main():
-    df = pd.read_csv(DATA_PATH)
-    wl = pd.read_csv(WORKLIFE_PATH)
-
-    # 合并 high_stress_group
-    if len(df) != len(wl):
-        print("⚠️ 警告：主数据和 worklife_derived_vars 行数不一致！")
-        print("data_step2_typed_clean 行数:", len(df))
-        print("worklife_derived_vars 行数:", len(wl))
-        return
-    df["high_stress_group"] = wl["high_stress_group"]
+    df = read_typed([ID_COL] + list(SUPPORT_VARS) + ["v004_code"])
+    wl = session.read_csv(WORKLIFE_PATH)
 
-    # 读取 metadata，拿学位类型标签
-    meta = pd.read_csv(META_PATH)
-    meta_idx = meta.set_index("col_name")
+    # 按 resp_id 合并 high_stress_group
+    df = attach(df, wl, ["high_stress_group"])
 
-    if "v004_code" not in meta_idx.index:
+    # 从 codebook 拿学位类型标签
+    cb = load_codebook()
+    if "v004_code" not in cb:
         print("⚠️ metadata 中找不到 v004_code（学位类型 coded）")
         return
 
-    deg_row = meta_idx.loc["v004_code"]
-    valmap = parse_value_labels(deg_row.get("value_labels", "{}"))
-    # 转成 int -> label
-    degree_label_map = {}
-    for k, v in valmap.items():
-        try:
-            code_int = int(k)
-            degree_label_map[code_int] = v
-        except Exception:
-            continue
-
     # 从 worklife_derived_vars 里拿 degree coded（之前在那边已经用的是 v004_code）
     if "v004_code" not in wl.columns and "v004_code" not in df.columns:
         print("⚠️ 无法在数据中找到 v004_code（学位类型）列。")
@@ -102,7 +48,7 @@ def main():
         df["degree_code"] = df["v004_code"]
 
     df["degree_code_int"] = pd.to_numeric(df["degree_code"], errors="coerce").astype("Int64")
-    df["degree_label"] = df["degree_code_int"].map(degree_label_map)
+    df["degree_label"] = cb.label("v004_code", df["degree_code_int"])
 
     print("=== 学位类型分布（degree_code_int × degree_label） ===")
     print(
@@ -111,6 +57,20 @@ def main():
         .reset_index(name="count")
     )
 
+    # 清洗为 1–7 并分档（规格见 gradlife/derived_vars.py），所有支持变量一次算完
+    present = [c for c in SUPPORT_VARS if c in df.columns]
+    derived = derive(df, SPECS, targets=[c + sfx for c in present for sfx in ("_clean", "_cat")])
+
+    # 所有支持变量的 档次 × 学位 × high_stress_group 交叉表一次算完（学位 / 高压列只编码一次），
+    # 在「同一支持档次 + 学位」内部算比例；档次 / 学位缺失的行不计
+    strata = df[["degree_code_int", "degree_label", "high_stress_group"]]
+    tables = crosstabs(
+        pd.concat([derived[[c + "_cat" for c in present]], strata], axis=1),
+        [c + "_cat" for c in present],
+        by=["degree_code_int", "degree_label"],
+        within=["target", "degree_code_int"],
+    )
+
     all_tables = []
 
     for col, q_label in SUPPORT_VARS.items():
@@ -124,40 +84,17 @@ def main():
 
         # 清洗为 1–7
         clean_col = col + "_clean_deg"
-        df[clean_col] = df[col].apply(clean_likert_1_to_7)
+        df[clean_col] = derived[col + "_clean"]
 
         # 分档
         cat_col = col + "_cat_deg"
-        df[cat_col] = df[clean_col].apply(cat_support)
+        df[cat_col] = derived[col + "_cat"]
 
         print("\n【分档后的分布（不分学位）】")
         print(df[cat_col].value_counts(dropna=False))
 
-        # 子集：有学位标签、有支持档次标签、有 high_stress_group
-        sub = df[[cat_col, "degree_code_int", "degree_label", "high_stress_group"]].dropna(
-            subset=[cat_col, "degree_code_int", "degree_label"]
-        )
-
-        # 按 支持档次 × 学位 × high_stress_group 交叉表
-        ct = (
-            sub.groupby([cat_col, "degree_code_int", "degree_label", "high_stress_group"])
-            .size()
-            .reset_index(name="count")
-        )
-
-        # 在「同一支持档次 + 学位」内部算比例
-        total_by_level_deg = ct.groupby([cat_col, "degree_code_int"])["count"].transform("sum")
-        ct["percent"] = ct["count"] / total_by_level_deg * 100
-
-        # 统一列名
-        ct = ct.rename(
-            columns={
-                cat_col: "level",
-                "degree_code_int": "degree_code_int",
-                "degree_label": "degree_label",
-                "high_stress_group": "high_stress_group",
-            }
-        )
+        # 按 支持档次 × 学位 × high_stress_group 的交叉表（上面已一次算好），统一列名
+        ct = tables[col + "_cat"].rename(columns={col + "_cat": "level"})
         ct["question"] = q_label
         ct["factor"] = col
 
@@ -1,7 +1,8 @@
 import pandas as pd
 from pathlib import Path
 
-DATA_PATH = Path("/workspace/output/02_typed_clean/data_step2_typed_clean.csv")
+from gradlife.keys import ID_COL, attach
+from gradlife.typed_store import read_typed
 WORKLIFE_DERIVED = Path("/workspace/output/04_worklife/worklife_derived_vars.csv")  # 里面有 high_stress_group
 META_PATH = Path("/workspace/output/02_typed_clean/metadata_step2_typed_clean.csv")
 
@@ -20,7 +21,7 @@ REGION_COLS = [
 
 def main():
     # 读数据
-    df = pd.read_csv(DATA_PATH)
+    df = read_typed([ID_COL] + REGION_COLS)
     meta = pd.read_csv(META_PATH)
     # 合并 high_stress_group
     df_worklife = pd.read_csv(WORKLIFE_DERIVED)
@@ -28,8 +29,8 @@ def main():
         print("⚠️ worklife_derived_vars.csv 里没有 high_stress_group，先确认第 05 步脚本是否跑通。")
         return
 
-    # 按行号拼接（两边都是原始 3253 行顺序）
-    df["high_stress_group"] = df_worklife["high_stress_group"]
+    # 按 resp_id 连接
+    df = attach(df, df_worklife, ["high_stress_group"])
 
     print("=== 数据形状 ===")
     print(df.shape)
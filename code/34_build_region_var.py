@@ -1,43 +1,35 @@
 import pandas as pd
 from pathlib import Path
 
-DATA_PATH = Path("/workspace/output/02_typed_clean/data_step2_typed_clean.csv")
+from gradlife import session
+from gradlife.derived_vars import COUNTRY_COLS, COUNTRY_REGIONS
+from gradlife.keys import ID_COL, attach
+from gradlife.typed_store import read_typed
+
 WORKLIFE_DERIVED = Path("/workspace/output/04_worklife/worklife_derived_vars.csv")
 
 OUTPUT_DIR = Path("/workspace/output/05_region")
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 def main():
-    # 读主数据
-    df = pd.read_csv(DATA_PATH)
+    # 读主数据（只要各大洲国家题 v031–v036）
+    df = read_typed([ID_COL] + COUNTRY_COLS)
     print("原始数据形状:", df.shape)
 
     # 读 high_stress_group
-    wf = pd.read_csv(WORKLIFE_DERIVED)
+    wf = session.read_csv(WORKLIFE_DERIVED)
     if "high_stress_group" not in wf.columns:
         print("⚠️ worklife_derived_vars.csv 里没有 high_stress_group，请先确认第 05 步脚本。")
         return
 
-    # 按行号拼接（两边都是 3253 行）
-    df["high_stress_group"] = wf["high_stress_group"]
+    # 按 resp_id 连接
+    df = attach(df, wf, ["high_stress_group"])
 
-    # 构造大洲/地区变量
-    # v031: Asia; v032: Australasia; v033: Africa; v034: Europe
-    # v035: North/Central America; v036: South America
+    # 构造大洲/地区变量（各大洲国家题见 gradlife.derived_vars.COUNTRY_REGIONS，后面的优先）
     region = pd.Series(pd.NA, index=df.index, dtype="object")
-
-    if "v031" in df.columns:
-        region = region.mask(df["v031"].notna(), "Asia")
-    if "v032" in df.columns:
-        region = region.mask(df["v032"].notna(), "Australasia")
-    if "v033" in df.columns:
-        region = region.mask(df["v033"].notna(), "Africa")
-    if "v034" in df.columns:
-        region = region.mask(df["v034"].notna(), "Europe")
-    if "v035" in df.columns:
-        region = region.mask(df["v035"].notna(), "North/Central America")
-    if "v036" in df.columns:
-        region = region.mask(df["v036"].notna(), "South America")
+    for col, continent in COUNTRY_REGIONS.items():
+        if col in df.columns:
+            region = region.mask(df[col].notna(), continent)
 
     df["region_continent"] = region
 
@@ -63,9 +55,10 @@ def main():
 
     # 再保存一个行级子表，后面前端可能用得到
     cols_to_save = [
+        ID_COL,
         "region_continent",
         "high_stress_group",
-        "v031", "v032", "v033", "v034", "v035", "v036",
+        *COUNTRY_COLS,
     ]
     cols_to_save = [c for c in cols_to_save if c in df.columns]
 
@@ -17,6 +17,7 @@
 
 from pathlib import Path
 import pandas as pd
+from gradlife import session
 
 
 BASE_DIR = Path("/workspace")
@@ -28,7 +29,7 @@ OUTPUT_VIZ = VIZ_DIR / "viz_country_high_stress.csv"
 
 def main():
     print("读取行级数据:", INPUT_PATH)
-    df = pd.read_csv(INPUT_PATH)
+    df = session.read_csv(INPUT_PATH)
 
     print("原始数据形状:", df.shape)
 
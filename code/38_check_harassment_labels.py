@@ -1,30 +1,19 @@
 # /workspace/code/38_check_harassment_labels.py
 
 import pandas as pd
-import json
 from pathlib import Path
 
+from gradlife.codebook import parse_value_labels
+from gradlife.typed_store import read_typed
+
 META_PATH = Path("/workspace/output/02_typed_clean/metadata_step2_typed_clean.csv")
-DATA_PATH = Path("/workspace/output/02_typed_clean/data_step2_typed_clean.csv")
 
 COL = "v112_code"  # Q39: discrimination / harassment [coded]
 
 
-def parse_value_labels(val):
-    """把 metadata 里的 value_labels 字段解析成 dict."""
-    if pd.isna(val):
-        return {}
-    if isinstance(val, dict):
-        return val
-    try:
-        return json.loads(val)
-    except Exception:
-        return {}
-
-
 def main():
     meta = pd.read_csv(META_PATH)
-    df = pd.read_csv(DATA_PATH)
+    df = read_typed([COL])
 
     print("=== v112_code 在数据中的存在性 ===")
     print("v112_code in data columns:", COL in df.columns)
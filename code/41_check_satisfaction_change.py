@@ -11,29 +11,18 @@
 """
 
 import pandas as pd
-import json
 from pathlib import Path
 
-DATA_PATH = Path("/workspace/output/02_typed_clean/data_step2_typed_clean.csv")
+from gradlife.codebook import parse_value_labels
+from gradlife.typed_store import read_typed
+
 META_PATH = Path("/workspace/output/02_typed_clean/metadata_step2_typed_clean.csv")
 WORKLIFE_DERIVED_PATH = Path("/workspace/output/04_worklife/worklife_derived_vars.csv")
 
 
-def parse_value_labels(val):
-    """把 metadata 里的 value_labels 字符串安全地解析成 dict。"""
-    if pd.isna(val):
-        return {}
-    if isinstance(val, dict):
-        return val
-    try:
-        return json.loads(val)
-    except Exception:
-        return {}
-
-
 def main():
     print("读取主数据与 metadata ...")
-    df = pd.read_csv(DATA_PATH)
+    df = read_typed(["v073", "v073_code", "v073_num"])
     meta = pd.read_csv(META_PATH)
 
     # 读取 high_stress_group（来自之前的 worklife_derived_vars）
@@ -26,7 +26,14 @@
 import pandas as pd
 from pathlib import Path
 
-DATA_PATH = Path("/workspace/output/02_typed_clean/data_step2_typed_clean.csv")
+from gradlife import session
+from gradlife.bootstrap import shared
+from gradlife.crosstab import crosstab
+from gradlife.derive import derive
+from gradlife.derived_vars import SPECS
+from gradlife.keys import ID_COL, attach
+from gradlife.typed_store import read_typed
+
 WORKLIFE_DERIVED_PATH = Path("/workspace/output/04_worklife/worklife_derived_vars.csv")
 
 OUT_DIR_ANALYTIC = Path("/workspace/output/06_satisfaction")
@@ -35,46 +42,16 @@ OUT_DIR_ANALYTIC.mkdir(parents=True, exist_ok=True)
 OUT_DIR_VIZ.mkdir(parents=True, exist_ok=True)
 
 
-def map_change_category(code):
-    """
-    把 v073_code 数值映射为三类：
-      - Worsened        : 1 = Worsened a little, 3 = Significantly worsened
-      - Stayed the same : 4 = Stayed the same
-      - Improved        : 2 = Improved slightly, 5 = Improved greatly
-    其他 & 缺失 -> <NA>
-    """
-    if pd.isna(code):
-        return pd.NA
-    try:
-        c = int(code)
-    except Exception:
-        return pd.NA
-
-    if c in (1, 3):
-        return "Worsened"
-    elif c == 4:
-        return "Stayed the same"
-    elif c in (2, 5):
-        return "Improved"
-    else:
-        return pd.NA
-
-
 def main():
     print("读取主数据 ...")
-    df = pd.read_csv(DATA_PATH)
+    df = read_typed([ID_COL, "v073_code"])
     print("主数据形状:", df.shape)
 
     # 合并 high_stress_group
     if WORKLIFE_DERIVED_PATH.exists():
-        wlife = pd.read_csv(WORKLIFE_DERIVED_PATH)
+        wlife = session.read_csv(WORKLIFE_DERIVED_PATH)
         if "high_stress_group" in wlife.columns:
-            df = df.merge(
-                wlife[["high_stress_group"]],
-                left_index=True,
-                right_index=True,
-                how="left",
-            )
+            df = attach(df, wlife, ["high_stress_group"])
             print("已将 high_stress_group 合并进主数据。")
         else:
             print("警告：worklife_derived_vars 中没有 high_stress_group 列。")
@@ -88,29 +65,19 @@ def main():
 
     # === 1) 构造满意度变化三档 ===
     print("\n构造 sat_change_cat（三档：Worsened / Stayed the same / Improved）...")
-    df["sat_change_cat"] = df["v073_code"].apply(map_change_category).astype("string")
+    # 编码 → 三档的对应关系见 gradlife/derived_vars.py（SAT_CHANGE_CODES）
+    df["sat_change_cat"] = derive(df, SPECS, targets=["sat_change_cat"])["sat_change_cat"]
 
     print("\n=== sat_change_cat 分布（含缺失） ===")
     print(df["sat_change_cat"].value_counts(dropna=False))
 
-    # 只保留 sat_change_cat 和 high_stress_group 都不缺失的样本
-    sub = df.dropna(subset=["sat_change_cat", "high_stress_group"]).copy()
-    sub["high_stress_group"] = sub["high_stress_group"].astype(int)
-    print("\n有效样本量（sat_change_cat & high_stress_group 都非缺失）:", len(sub))
+    # 只统计 sat_change_cat 和 high_stress_group 都不缺失的样本
+    valid = df["sat_change_cat"].notna() & df["high_stress_group"].notna()
+    print("\n有效样本量（sat_change_cat & high_stress_group 都非缺失）:", int(valid.sum()))
 
     # === 2) 详细交叉表（长表） ===
-    cross = (
-        sub.groupby(["sat_change_cat", "high_stress_group"])
-        .size()
-        .reset_index(name="count")
-    )
-
-    # 每个 sat_change_cat 内部百分比（用于看“该类里面高压占比”）
-    cross["percent_within_cat"] = (
-        cross["count"]
-        / cross.groupby("sat_change_cat")["count"].transform("sum")
-        * 100
-    )
+    # 每个 sat_change_cat 内部百分比（用于看“该类里面高压占比”），带 bootstrap 置信区间
+    cross = crosstab(df, "sat_change_cat", percent_col="percent_within_cat", boot=shared())
 
     # 为了可读性，加一个描述性的 question 字段
     question_text = (
@@ -128,7 +95,8 @@ def main():
 
     # === 3) 前端可视化用宽表 ===
     # 目标列结构：
-    #   change_label, high_stress_percent, high_stress_count, total_count
+    #   change_label, high_stress_percent, high_stress_count, total_count,
+    #   high_stress_percent_ci_low, high_stress_percent_ci_high
     rows = []
     for cat in sorted(cross["sat_change_cat"].unique()):
         sub_cat = cross[cross["sat_change_cat"] == cat]
@@ -137,9 +105,13 @@ def main():
         # 高压 = high_stress_group == 1
         high_row = sub_cat[sub_cat["high_stress_group"] == 1]
         if len(high_row) == 0:
+            # 这一档没有高压的人：每次重抽样的百分比都是 0
             high_count = 0
+            ci_low = ci_high = 0.0
         else:
             high_count = int(high_row["count"].iloc[0])
+            ci_low = float(high_row["percent_within_cat_ci_low"].iloc[0])
+            ci_high = float(high_row["percent_within_cat_ci_high"].iloc[0])
 
         high_percent = (high_count / total_count * 100) if total_count > 0 else 0.0
 
@@ -149,6 +121,8 @@ def main():
                 "high_stress_percent": high_percent,
                 "high_stress_count": high_count,
                 "total_count": int(total_count),
+                "high_stress_percent_ci_low": ci_low,
+                "high_stress_percent_ci_high": ci_high,
             }
         )
 
@@ -7,8 +7,8 @@
   为“导师支持 × 学校支持 × 高压组（四象限视图）”准备汇总数据。
 
 数据来源：
-  1）主数据（所有题目，含 v079_num, v091_num, v097_num, v100_num, v101_num 等）：
-       /workspace/output/02_typed_clean/data_step2_typed_clean.csv
+  1）主数据（只读 v079_num, v091_num, v097_num, v100_num, v101_num 这几列）：
+       /workspace/output/02_typed_clean/data_step2_typed_clean.parquet
   2）高压标记（high_hours / low_worklife / high_stress_group 等）：
        /workspace/output/04_worklife/worklife_derived_vars.csv
 
@@ -38,9 +38,12 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from gradlife import session
+from gradlife.keys import ID_COL, attach
+from gradlife.typed_store import read_typed
+
 
 # ========= 路径配置 =========
-MAIN_DATA_PATH = Path("/workspace/output/02_typed_clean/data_step2_typed_clean.csv")
 WORKLIFE_PATH = Path("/workspace/output/04_worklife/worklife_derived_vars.csv")
 
 OUTPUT_DIR_ANALYTIC = Path("/workspace/output/07_support")
@@ -48,6 +51,9 @@ OUTPUT_DIR_VIZ = Path("/workspace/output/08_viz_data")
 OUTPUT_DIR_ANALYTIC.mkdir(parents=True, exist_ok=True)
 OUTPUT_DIR_VIZ.mkdir(parents=True, exist_ok=True)
 
+# 构造支持指数要用到的主数据列
+SUPPORT_NUM_COLS = ["v079_num", "v091_num", "v097_num", "v100_num", "v101_num"]
+
 
 # ========= 小工具函数 =========
 def standardize_series(s: pd.Series) -> pd.Series:
@@ -84,16 +90,16 @@ def categorize_z(z: pd.Series) -> pd.Series:
 # ========= 读入主数据 + 合并 high_stress_group =========
 def load_with_high_stress() -> pd.DataFrame:
     """
-    - 读取 step2 主数据（全题）
+    - 读取 step2 主数据（只读支持题的 *_num 列）
     - 读取 worklife_derived_vars（高压标记）
     - 按行顺序对齐，把 high_stress_group 加到主数据里
     """
     print("读取主数据 ...")
-    df_main = pd.read_csv(MAIN_DATA_PATH)
+    df_main = read_typed([ID_COL] + SUPPORT_NUM_COLS)
     print(f"主数据形状: {df_main.shape}")
 
     print("读取 worklife 衍生变量（high_stress_group）...")
-    df_work = pd.read_csv(WORKLIFE_PATH)
+    df_work = session.read_csv(WORKLIFE_PATH)
     print(f"worklife_derived_vars 形状: {df_work.shape}")
 
     if "high_stress_group" not in df_work.columns:
@@ -102,15 +108,8 @@ def load_with_high_stress() -> pd.DataFrame:
             "请确认 /workspace/output/04_worklife/worklife_derived_vars.csv 的结构。"
         )
 
-    if len(df_main) != len(df_work):
-        raise ValueError(
-            f"主数据行数({len(df_main)}) 与 worklife_derived_vars 行数({len(df_work)}) 不一致。\n"
-            "当前脚本假设它们来自同一个 step2 数据框，行顺序相同。\n"
-            "如果你后来对其中一个做了删行/筛选，请先重新生成 worklife_derived_vars。"
-        )
-
-    df = df_main.copy()
-    df["high_stress_group"] = df_work["high_stress_group"].values
+    # 按 resp_id 连接，两张表可以各自筛选 / 删行
+    df = attach(df_main, df_work, ["high_stress_group"])
 
     print("\n合并完成后数据形状:", df.shape)
     print("high_stress_group 分布:")
@@ -144,7 +143,7 @@ def prepare_quadrant_table(df: pd.DataFrame) -> pd.DataFrame:
             "主数据中缺少构造支持指数所需的列：\n"
             f"  导师支持缺少: {missing_sup}\n"
             f"  学校支持缺少: {missing_inst}\n"
-            "请确认 data_step2_typed_clean.csv 中包含这些 *_num 变量。"
+            "请确认 data_step2_typed_clean.parquet 中包含这些 *_num 变量。"
         )
 
     df = df.copy()
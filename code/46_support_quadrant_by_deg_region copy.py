@@ -19,7 +19,8 @@
     * 排名条形图等多种可视化。
 
 假设前置文件：
-- /workspace/output/02_typed_clean/data_step2_typed_clean.csv
+- /workspace/output/02_typed_clean/data_step2_typed_clean.parquet
+    （只读学位编码和支持题的 *_num 列）
 - /workspace/output/03_worklife/worklife_derived_vars.csv
     （至少包含 high_stress_group）
 - /workspace/output/05_region/region_worklife_derived.csv
@@ -34,9 +35,11 @@ from pathlib import Path
 import pandas as pd
 import numpy as np
 
+from gradlife.typed_store import read_typed
+
 BASE_DIR = Path("/workspace")
 
-PATH_MAIN = BASE_DIR / "output/02_typed_clean/data_step2_typed_clean.csv"
+MAIN_COLS = ["v004_code", "v079_num", "v091_num", "v097_num", "v100_num", "v101_num"]
 PATH_WORKLIFE = BASE_DIR / "output/04_worklife/worklife_derived_vars.csv"
 PATH_REGION = BASE_DIR / "output/05_region/region_worklife_derived.csv"
 
@@ -139,7 +142,7 @@ def load_master_with_support_deg_region() -> pd.DataFrame:
     """读入三张表，按行对齐拼接，并构建所需的派生变量。"""
 
     print("读取主数据 ...")
-    df_main = pd.read_csv(PATH_MAIN)
+    df_main = read_typed(MAIN_COLS)
     print("主数据形状:", df_main.shape)
 
     print("读取 worklife_derived_vars（含 high_stress_group）...")
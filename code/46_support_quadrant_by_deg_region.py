@@ -19,24 +19,29 @@
     * 排名条形图等多种可视化。
 
 假设前置文件：
-- /workspace/output/02_typed_clean/data_step2_typed_clean.csv
+- /workspace/output/02_typed_clean/data_step2_typed_clean.parquet
+    （只读学位编码和支持题的 *_num 列）
 - /workspace/output/03_worklife/worklife_derived_vars.csv
     （至少包含 high_stress_group）
 - /workspace/output/05_region/region_worklife_derived.csv
     （至少包含 region_continent）
 
 注意：
-- 不再尝试通过 ID 列 merge，而是假设三张表行顺序一致，
-  用 reset_index + concat 进行列拼接（和之前大部分脚本一致）。
+- 三张表都带 resp_id，按 resp_id 连接（gradlife.keys.attach），
+  不要求行顺序或行数一致。
 """
 
 from pathlib import Path
 import pandas as pd
 import numpy as np
 
+from gradlife import session
+from gradlife.keys import ID_COL, attach
+from gradlife.typed_store import read_typed
+
 BASE_DIR = Path("/workspace")
 
-PATH_MAIN = BASE_DIR / "output/02_typed_clean/data_step2_typed_clean.csv"
+MAIN_COLS = [ID_COL, "v004_code", "v079_num", "v091_num", "v097_num", "v100_num", "v101_num"]
 PATH_WORKLIFE = BASE_DIR / "output/04_worklife/worklife_derived_vars.csv"
 PATH_REGION = BASE_DIR / "output/05_region/region_worklife_derived.csv"
 
@@ -136,37 +141,23 @@ def add_degree_labels(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def load_master_with_support_deg_region() -> pd.DataFrame:
-    """读入三张表，按行对齐拼接，并构建所需的派生变量。"""
+    """读入三张表，按 resp_id 连接，并构建所需的派生变量。"""
 
     print("读取主数据 ...")
-    df_main = pd.read_csv(PATH_MAIN)
+    df_main = read_typed(MAIN_COLS)
     print("主数据形状:", df_main.shape)
 
     print("读取 worklife_derived_vars（含 high_stress_group）...")
-    df_worklife = pd.read_csv(PATH_WORKLIFE)
+    df_worklife = session.read_csv(PATH_WORKLIFE)
     print("worklife_derived_vars 形状:", df_worklife.shape)
 
     print("读取 region_worklife_derived（含 region_continent）...")
-    df_region = pd.read_csv(PATH_REGION)
+    df_region = session.read_csv(PATH_REGION)
     print("region_worklife_derived 形状:", df_region.shape)
 
-    n_main, n_work, n_reg = len(df_main), len(df_worklife), len(df_region)
-    if not (n_main == n_work == n_reg):
-        raise ValueError(
-            f"三张表行数不一致，无法按行拼接：\n"
-            f"  main: {n_main} 行\n  worklife: {n_work} 行\n  region: {n_reg} 行\n"
-            "请检查前置处理是否丢行或重新排序。"
-        )
-
-    # 按行顺序对齐拼接
-    df = pd.concat(
-        [
-            df_main.reset_index(drop=True),
-            df_worklife[["high_stress_group"]].reset_index(drop=True),
-            df_region[["region_continent"]].reset_index(drop=True),
-        ],
-        axis=1,
-    )
+    # 以主数据为准，按 resp_id 连接
+    df = attach(df_main, df_worklife, ["high_stress_group"])
+    df = attach(df, df_region, ["region_continent"])
 
     print("合并完成后数据形状:", df.shape)
     print("high_stress_group 分布:")
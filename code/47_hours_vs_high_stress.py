@@ -20,6 +20,7 @@
 from pathlib import Path
 
 import pandas as pd
+from gradlife import session
 
 BASE = Path("/workspace")
 
@@ -76,7 +77,7 @@ def build_hours_order(values):
 
 def main():
     print("读取 worklife_derived_vars ...")
-    df = pd.read_csv(DERIVED_PATH)
+    df = session.read_csv(DERIVED_PATH)
     print("worklife_derived_vars 形状:", df.shape)
 
     # 检查必需列
@@ -27,6 +27,8 @@
 
 from pathlib import Path
 import pandas as pd
+from gradlife import session
+from gradlife.keys import attach
 
 BASE = Path("/workspace")
 
@@ -73,13 +75,13 @@ def build_hours_order(values):
 
 def main():
     print("读取 worklife_derived_vars ...")
-    wl = pd.read_csv(PATH_WORKLIFE)
+    wl = session.read_csv(PATH_WORKLIFE)
     print("worklife_derived_vars 形状:", wl.shape)
 
     # 尝试读取 region_worklife_derived（若不存在则略过）
     try:
         print("读取 region_worklife_derived ...")
-        region = pd.read_csv(PATH_REGION)
+        region = session.read_csv(PATH_REGION)
         print("region_worklife_derived 形状:", region.shape)
     except FileNotFoundError:
         print(f"WARNING: 找不到 {PATH_REGION}，将仅使用 worklife_derived_vars（没有 region 维度）")
@@ -95,19 +97,11 @@ def main():
             + "。请检查 05_worklife_analysis 的输出。"
         )
 
-    # 如果有 region 表，并且行数与 wl 相同，则按行对齐 concat
-    if region is not None and len(region) == len(wl):
-        print("按行对齐方式合并 worklife_derived_vars 与 region_worklife_derived ...")
-        df = pd.concat(
-            [wl.reset_index(drop=True), region[[REGION_COL]].reset_index(drop=True)],
-            axis=1,
-        )
+    # 如果有 region 表，则按 resp_id 连接
+    if region is not None:
+        print("按 resp_id 合并 worklife_derived_vars 与 region_worklife_derived ...")
+        df = attach(wl, region, [REGION_COL])
     else:
-        if region is not None:
-            print(
-                f"WARNING: region_worklife_derived 行数({len(region)}) ≠ worklife_derived_vars 行数({len(wl)})，"
-                "将忽略 region，后续 region_continent 统一为 'All / unknown'"
-            )
         df = wl.copy()
 
     # 只保留我们需要的列（后面会新增 degree_label / country_name 等）
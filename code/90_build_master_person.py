@@ -7,7 +7,7 @@
 构建“主表” master_person_wide：
 - 每行 = 1 个受访者
 - 当前包含：
-    * resp_id
+    * resp_id（01_prepare_headers 分配的受访者主键，各表都按它连接）
     * degree_label / degree_code_int
     * region_continent
     * hours_level + 原始工时文本 v089 / v089_code
@@ -25,25 +25,33 @@
       worklife_score, v084_num, high_hours, low_worklife 等
 - /workspace/output/05_region/region_worklife_derived.csv
     - region_continent
-- /workspace/output/02_typed_clean/data_step2_typed_clean.csv
+- /workspace/output/02_typed_clean/data_step2_typed_clean.parquet（只读下面这些列）
     - v005 (总学制时长), v006 (已读年数), v016 (是否在本国就读)
     - v079_num, v091_num（导师关系 / 职业对话）
     - v097_num, v100_num, v101_num（心理健康服务 & work–life 支持）
 
 输出：
-- /workspace/output/99_master/master_person_wide.csv
-- /workspace/output/99_master/master_person_wide.parquet
+- /workspace/output/99_master/master_person_wide/{core,worklife,support,geography}.parquet
+  （按列组分开存，紧凑 schema：标签为 category、标记为 Int8、z 分数为 float32，见 gradlife.master_store；
+   demographics 列组由 92 写）
+- /workspace/output/99_master/support_scaling.json（支持指数 z 分数用的全体均值 / 标准差）
 """
 
 from pathlib import Path
-import numpy as np
 import pandas as pd
 
+from gradlife import session
+from gradlife.derived_vars import DEGREE_LABELS
+from gradlife.keys import ID_COL, attach
+from gradlife.master_store import write_master
+from gradlife.support_index import INST_VARS, SUP_VARS, fit_scaling, raw_scores, support_columns, write_scaling
+from gradlife.typed_store import TYPED_PARQUET, read_typed
+
 BASE = Path("/workspace")
 
 PATH_WORKLIFE = BASE / "output" / "04_worklife" / "worklife_derived_vars.csv"
 PATH_REGION = BASE / "output" / "05_region" / "region_worklife_derived.csv"
-PATH_TYPED = BASE / "output" / "02_typed_clean" / "data_step2_typed_clean.csv"
+PATH_TYPED = TYPED_PARQUET
 
 OUTPUT_DIR = BASE / "output" / "99_master"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -54,6 +62,7 @@ DEGREE_CODE_COL = "v004_code"
 REGION_COL = "region_continent"
 
 SUP_NUM_COLS = ["v079_num", "v091_num", "v097_num", "v100_num", "v101_num"]
+TYPED_BASE_COLS = ["v005", "v006", "v016"]  # 学制时长 / 已读年数 / 是否在本国就读
 
 
 def map_duration_to_years(text):
@@ -78,42 +87,10 @@ def map_duration_to_years(text):
     return mapping.get(t, pd.NA)
 
 
-def standardize_series(s: pd.Series) -> pd.Series:
-    """
-    计算 z 分数： (x - mean) / std
-    若 std=0 或全缺失，则返回全 NaN。
-    """
-    mean = s.mean(skipna=True)
-    std = s.std(skipna=True)
-    if std == 0 or np.isnan(std):
-        return pd.Series(np.nan, index=s.index)
-    return (s - mean) / std
-
-
-def categorize_z(z: pd.Series) -> pd.Series:
-    """
-    把 z 分数划成三档：
-      z <= -0.5       -> 'Low'
-      -0.5 < z < 0.5  -> 'Medium'
-      z >= 0.5        -> 'High'
-    """
-    def _cat(val):
-        if pd.isna(val):
-            return pd.NA
-        if val <= -0.5:
-            return "Low"
-        elif val >= 0.5:
-            return "High"
-        else:
-            return "Medium"
-
-    return z.apply(_cat)
-
-
 def main():
     # === 1. 读取 worklife_derived_vars ===
     print("读取 worklife_derived_vars ...")
-    wf = pd.read_csv(PATH_WORKLIFE)
+    wf = session.read_csv(PATH_WORKLIFE)
     print("worklife_derived_vars 形状:", wf.shape)
     print("worklife_derived_vars 列名示例:", list(wf.columns)[:12])
 
@@ -129,7 +106,7 @@ def main():
     # === 2. 读取 region_worklife_derived（如有） ===
     try:
         print("读取 region_worklife_derived ...")
-        region = pd.read_csv(PATH_REGION)
+        region = session.read_csv(PATH_REGION)
         print("region_worklife_derived 形状:", region.shape)
     except FileNotFoundError:
         print(f"⚠️ 找不到 {PATH_REGION}，将暂时不加入 region_continent。")
@@ -138,44 +115,41 @@ def main():
     # 以 worklife_derived_vars 为基础
     df = wf.reset_index(drop=True)
 
-    # 按行对齐方式拼上 region_continent
-    if region is not None and len(region) == len(df) and REGION_COL in region.columns:
-        print("按行对齐方式合并 region_continent ...")
-        region_sub = region[[REGION_COL]].reset_index(drop=True)
-        df = pd.concat([df, region_sub], axis=1)
+    # 按 resp_id 拼上 region_continent
+    if region is not None and REGION_COL in region.columns:
+        print("按 resp_id 合并 region_continent ...")
+        df = attach(df, region, [REGION_COL],
+                    left_name="worklife_derived_vars", right_name="region_worklife_derived")
     else:
         if region is not None:
-            print(
-                "⚠️ region_worklife_derived 行数与 worklife_derived_vars 不一致，"
-                "或缺少 region_continent，region 信息暂时忽略。"
-            )
+            print("⚠️ region_worklife_derived 缺少 region_continent，region 信息暂时忽略。")
         if REGION_COL not in df.columns:
             df[REGION_COL] = "All / unknown"
 
     # === 3. 读取 typed_clean，拼上学制 & 国别信息 & 支持打分 ===
     try:
         print("读取 data_step2_typed_clean ...")
-        typed = pd.read_csv(PATH_TYPED)
+        typed = read_typed([ID_COL] + TYPED_BASE_COLS + SUP_NUM_COLS)
         print("data_step2_typed_clean 形状:", typed.shape)
     except FileNotFoundError:
         print(f"⚠️ 找不到 {PATH_TYPED}，这一版将不加入学制/是否在本国学习/支持信息。")
         typed = None
 
-    if typed is not None and len(typed) == len(df):
-        print("按行对齐方式合并 v005/v006/v016 以及支持相关 *_num ...")
-        base_cols = ["v005", "v006", "v016"]
+    if typed is not None:
+        print("按 resp_id 合并 v005/v006/v016 以及支持相关 *_num ...")
+        base_cols = TYPED_BASE_COLS
         support_cols_present = [c for c in SUP_NUM_COLS if c in typed.columns]
         merge_cols = base_cols + support_cols_present
 
-        typed_sub = typed[merge_cols].reset_index(drop=True)
-        typed_sub = typed_sub.rename(
+        typed_sub = typed[[ID_COL] + merge_cols].rename(
             columns={
                 "v005": "degree_duration_text",
                 "v006": "degree_progress_text",
                 "v016": "study_in_home_country",
             }
         )
-        df = pd.concat([df, typed_sub], axis=1)
+        df = attach(df, typed_sub, [c for c in typed_sub.columns if c != ID_COL],
+                    left_name="worklife_derived_vars", right_name="data_step2_typed_clean")
 
         # 映射为数值年数
         df["degree_duration_years"] = df["degree_duration_text"].map(map_duration_to_years)
@@ -192,8 +166,7 @@ def main():
         )
 
         # === 3.1 支持指数：导师 / 机构 ===
-        sup_vars = ["v079_num", "v091_num"]
-        inst_vars = ["v097_num", "v100_num", "v101_num"]
+        sup_vars, inst_vars = SUP_VARS, INST_VARS
 
         missing_sup = [c for c in sup_vars if c not in df.columns]
         missing_inst = [c for c in inst_vars if c not in df.columns]
@@ -202,52 +175,26 @@ def main():
                 "主数据中缺少构造支持指数所需的列：\n"
                 f"  导师支持缺少: {missing_sup}\n"
                 f"  学校支持缺少: {missing_inst}\n"
-                "请确认 data_step2_typed_clean.csv 中包含这些 *_num 变量。"
+                "请确认 data_step2_typed_clean.parquet 中包含这些 *_num 变量。"
             )
 
         # 确保为数值
         for col in sup_vars + inst_vars:
             df[col] = pd.to_numeric(df[col], errors="coerce")
 
-        # 原始指数：简单平均
-        df["supervisor_support_raw"] = df[sup_vars].mean(axis=1, skipna=True)
-        df["institution_support_raw"] = df[inst_vars].mean(axis=1, skipna=True)
+        # 原始指数（简单平均）→ 全体的 z 分数 → 三档 → 象限标签（见 gradlife.support_index）；
+        # 标准化参数存下来，之后追加的新一批受访者按同一把尺子分档
+        scaling = fit_scaling(raw_scores(df))
+        for col, values in support_columns(df, scaling).items():
+            df[col] = values
+        print("支持指数标准化参数已保存:", write_scaling(scaling))
 
-        # z 分数
-        df["supervisor_z"] = standardize_series(df["supervisor_support_raw"])
-        df["institution_z"] = standardize_series(df["institution_support_raw"])
-
-        # 三档分类
-        df["supervisor_cat"] = categorize_z(df["supervisor_z"])
-        df["institution_cat"] = categorize_z(df["institution_z"])
-
-        # 象限标签
-        df["support_quadrant_label"] = (
-            df["supervisor_cat"].astype("string")
-            + " supervisor / "
-            + df["institution_cat"].astype("string")
-            + " institution"
-        )
-
-    else:
-        if typed is not None:
-            print(
-                "⚠️ data_step2_typed_clean 行数与 worklife_derived_vars 不一致，"
-                "暂不合并学制 / 本国学习 / 支持信息。"
-            )
-
-    # === 4. 构造 resp_id & degree_label ===
+    # === 4. 构造 degree_label（resp_id 直接沿用 worklife_derived_vars 里的主键） ===
     df = df.reset_index(drop=True)
-    df["resp_id"] = df.index + 1  # 1,2,...,N
 
     degree_code = pd.to_numeric(df[DEGREE_CODE_COL], errors="coerce")
     df["degree_code_int"] = degree_code.round().astype("Int64")
-    degree_map = {
-        1: "Doctorate",
-        2: "Master's",
-        3: "Dual degree",
-    }
-    df["degree_label"] = df["degree_code_int"].map(degree_map)
+    df["degree_label"] = df["degree_code_int"].map(DEGREE_LABELS)
 
     df[STRESS_COL] = pd.to_numeric(df[STRESS_COL], errors="coerce").astype("Int64")
 
@@ -279,7 +226,7 @@ def main():
 
     # === 6. 选择要输出到主表的字段 ===
     cols_master = [
-        "resp_id",
+        ID_COL,
         "degree_label",
         "degree_code_int",
         REGION_COL,
@@ -350,24 +297,11 @@ def main():
         )
         print(quad_tab.head(12).to_string(index=False))
 
-    # === 7. 保存 ===
-    out_csv = OUTPUT_DIR / "master_person_wide.csv"
-    out_parquet = OUTPUT_DIR / "master_person_wide.parquet"
-
-    master.to_csv(out_csv, index=False)
-    parquet_ok = False
-    try:
-        master.to_parquet(out_parquet, index=False)
-        parquet_ok = True
-    except Exception as e:
-        print(f"⚠️ 保存 Parquet 时出错：{e}")
-
-    print("\n已保存主表：")
-    print(" - CSV   :", out_csv)
-    if parquet_ok:
-        print(" - Parquet:", out_parquet)
-    else:
-        print(" - Parquet: 未生成（可选，不影响后续分析）")
+    # === 7. 保存（按列组拆开，按主表 schema 压缩类型后写 Parquet） ===
+    out_paths = write_master(master)
+    print("\n已保存主表列组：")
+    for p in out_paths:
+        print(f"  - {p}")
 
 
 if __name__ == "__main__":
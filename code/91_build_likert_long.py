@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+91_build_likert_long.py
+
+构建所有 Likert 量表题的长表（原 91 满意度长表 + 93 支持长表合并为一步），
+用于后续所有满意度 / 支持可视化和分析。
+
+metadata 中每个有 likert_numeric *_num 列的题号前缀都是一个量表，例如：
+- Q27：How satisfied are you with each of the following attributes or aspects of your degree?
+- Q32：My supervisor ...
+- Q35：Mental health & university support ...
+- Q20、Q52 …… 其他量表题
+
+使用的文件：
+- /workspace/output/99_master/master_person_wide/*.parquet
+    - 提供 resp_id（受访者主键）
+- /workspace/output/02_typed_clean/data_step2_typed_clean.parquet
+    - 各量表的 *_num 数值列（一次读入，只读这些列）
+- /workspace/output/02_typed_clean/metadata_step2_typed_clean.csv
+    - 提供这些列的 question_text / q_no / q_type
+
+输出（见 gradlife.long_tables）：
+- /workspace/output/99_master/likert_long.parquet
+    - 一行 = 一位受访者对一个条目的作答：resp_id（int32）、item_id（int16）、score（int8）
+- /workspace/output/99_master/likert_items.csv
+    - 一行 = 一个条目：item_id、item_code（如 v084_num）、q_no（如 "Q27.k"）、
+      scale_group（如 "Q27"）、item_text（完整题干）、item_short（短标签）
+
+下游用 gradlife.long_tables.read_long(SATISFACTION / SUPPORT) 取出带文本的长表。
+"""
+
+from pathlib import Path
+
+from gradlife import session
+from gradlife.keys import ID_COL
+from gradlife.long_tables import ITEMS_CSV, build_long_tables, write_long_tables
+from gradlife.master_store import read_master
+
+BASE = Path("/workspace")
+
+PATH_META = BASE / "output" / "02_typed_clean" / "metadata_step2_typed_clean.csv"
+
+
+def main():
+    # === 0. 读取 master_person_wide（只需要 resp_id） ===
+    print("读取 master_person_wide ...")
+    master = read_master([ID_COL])
+    print("master_person_wide 形状:", master.shape)
+
+    if "resp_id" not in master.columns:
+        raise KeyError("master_person_wide 中缺少 resp_id 列，请先确认 90_build_master_person.py 的输出。")
+
+    # === 1. 读取 metadata_step2_typed_clean ===
+    print("读取 metadata_step2_typed_clean ...")
+    meta = session.read_csv(PATH_META)
+    print("metadata_step2_typed_clean 形状:", meta.shape)
+
+    # === 2. 一次读入所有量表列，构造事实表 + 维度表 ===
+    fact, items = build_long_tables(meta, keys=master[ID_COL])
+
+    print("\n量表条目（维度表）：")
+    print(items[["item_id", "item_code", "q_no", "scale_group", "item_short"]].to_string(index=False))
+
+    print("\n=== likert_long 示例前 12 行 ===")
+    print(fact.head(12).to_string(index=False))
+
+    # 简单看一下每个量表的条目数和作答数
+    print("\n每个量表的条目数 / 非缺失作答数：")
+    cnt = (
+        fact.merge(items[["item_id", "scale_group"]], on="item_id", how="left")
+        .groupby("scale_group")
+        .agg(n_items=("item_id", "nunique"), n_non_missing=("score", "size"))
+        .reset_index()
+    )
+    print(cnt.to_string(index=False))
+
+    # === 3. 输出 ===
+    out = write_long_tables(fact, items)
+    size_kb = out.stat().st_size / 1024
+    print(f"\n已保存量表长表到: {out}（{len(fact)} 行，{size_kb:.0f} KB）")
+    print(f"已保存条目维度表到: {ITEMS_CSV}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+93_append_wave_to_cubes.py
+
+新一批（一“波”）受访者到来时，把他们增量并进 93_build_high_stress_cube.py 建好的两个立方体，
+再从合并后的立方体重新写出 viz_region / viz_country / satisfaction_by_stress / support_by_stress
+等导出表（见 gradlife/cube_exports.py）。用时只和这一批的人数、立方体的格子数有关，
+不需要把 01 → 98 在全部数据上重跑一遍。
+
+用法（手动运行，不在 run_pipeline 的步骤里）：
+    python 93_append_wave_to_cubes.py /workspace/data/wave_2.parquet
+
+这一批的文件（Parquet 或 CSV）一人一行，列名同 typed_clean，需要这些列：
+- resp_id（不能和已经计入立方体的受访者重复）
+- 立方体维度：可以直接给 degree_label, region_continent, country_name, hours_level,
+  support_quadrant_label, high_stress_group；没有时从原始回答补出（见 gradlife/waves.py）：
+  v004_code（学位）、v089 / v084 原始文本（工时、工作生活平衡 → 高压组）、
+  v031–v036（大洲 / 国家）、v079/v091/v097/v100/v101 的 *_num（支持象限）
+- 各量表条目列（列名同 likert_items.csv 的 item_code，如 v074_num；没有的条目视为未作答）
+
+支持象限的 z 分数用 90 存下的全体均值 / 标准差（support_scaling.json），
+不因为新的一批人重新标准化：已经计入立方体的人的象限保持不变。
+
+⚠️ 追加只更新立方体和上面这些导出表，master_person_wide / typed_clean 等行级表不变。
+下一次运行 run_pipeline.py 时，93 和 35 / 37 / 94–98 会因为“输出被改动”按 data.xlsx 全量重建，
+这一批会从立方体和导出表里消失。追加的批次登记在 cube_waves.json 里，93 全量重建时会提示
+哪些批次被丢掉了；把这一批并进 data.xlsx 后再全量运行，就会回到包含这一批的全量结果。
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from gradlife.cube import DIMS, STRESS_COL, append_wave, cube_slice
+from gradlife.cube_exports import write_exports
+from gradlife.keys import ID_COL
+from gradlife.long_tables import read_items, wide_to_fact
+from gradlife.waves import prepare_wave, record_wave
+
+
+def read_batch(path: Path) -> pd.DataFrame:
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    return pd.read_csv(path, low_memory=False)
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("用法：python 93_append_wave_to_cubes.py <新一批受访者的 Parquet / CSV 文件>")
+        sys.exit(2)
+
+    path = Path(sys.argv[1])
+    batch = read_batch(path)
+    print(f"读取新一批受访者：{path}，形状 {batch.shape}")
+
+    if ID_COL not in batch.columns:
+        raise ValueError(f"这一批数据缺少必需列：{ID_COL}")
+    batch = prepare_wave(batch)
+    print("高压组分布：", batch[STRESS_COL].value_counts(dropna=False).to_dict())
+
+    items = read_items()
+    for code in items["item_code"]:
+        if code not in batch.columns:
+            batch[code] = pd.NA   # 这一批没有的条目视为未作答
+    fact = wide_to_fact(batch, items)
+    print(f"量表作答 {len(fact)} 条")
+
+    t0 = time.perf_counter()
+    cube, item_cube = append_wave(batch[[ID_COL, STRESS_COL] + DIMS], fact)
+    record_wave(path, batch[ID_COL])
+    print(f"\n✅ 已把 {len(batch)} 人并入立方体（用时 {time.perf_counter() - t0:.3f}s）")
+
+    for out in write_exports(cube, item_cube, items):
+        print("  已更新:", out)
+
+    print("\n=== 追加后的学位切片 ===")
+    print(cube_slice(cube, ["degree_label"]).to_string(index=False))
+
+    print("\n⚠️ 这一批只并进了立方体和上面这些导出表。下一次运行 run_pipeline.py 会按 data.xlsx "
+          "全量重建它们，这一批会被丢掉；请先把这一批并进 data.xlsx。")
+
+
+if __name__ == "__main__":
+    main()
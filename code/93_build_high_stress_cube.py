@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+93_build_high_stress_cube.py
+
+用 master_person_wide 建高压组的预计算立方体：学位、大洲、国家、工时档、支持象限
+所有 32 种组合（含 "ALL" 上卷行）的 high_stress_count / total_count / high_stress_percent。
+看板的各个切片（只看学位、只看大洲、学位 × 大洲、国家、工时、支持象限 ……）都可以
+从这一张表里按 grouping_id 查出来，不再需要一个切片一个导出脚本（见 gradlife/cube.py）。
+同时建量表立方体（学位 × 大洲 × 条目 × 高压组的 n / 和 / 平方和），
+之后新一批受访者可以用 93_append_wave_to_cubes.py 增量并入，不必全量重跑。
+两个立方体的每个格子都带 1000 次 bootstrap 重抽样的 95% 置信区间
+（high_stress_percent_ci_low / _high、mean_score_ci_low / _high，见 gradlife/bootstrap.py），
+人数很少的国家、学位 × 大洲格子可以直接看出不确定性。
+
+使用的文件：
+- /workspace/output/99_master/master_person_wide/*.parquet（只读立方体维度和 high_stress_group）
+- /workspace/output/99_master/likert_long.parquet
+
+输出：
+- /workspace/output/99_master/high_stress_cube.parquet
+- /workspace/output/99_master/likert_cube.parquet
+- /workspace/output/99_master/cube_members.parquet（已计入立方体的 resp_id）
+"""
+
+import time
+
+from gradlife.bootstrap import shared
+from gradlife.cube import (
+    DIMS,
+    STRESS_COL,
+    build_cube,
+    build_item_cube,
+    cube_slice,
+    grouping_sets,
+    write_cube,
+    write_item_cube,
+    write_members,
+)
+from gradlife.keys import ID_COL
+from gradlife.long_tables import read_fact
+from gradlife.master_store import read_master
+from gradlife.waves import warn_dropped_waves
+
+
+def main():
+    print("读取 master_person_wide 的立方体维度 ...")
+    master = read_master([ID_COL, STRESS_COL] + DIMS)
+    missing = [c for c in DIMS if c not in master.columns]
+    if missing:
+        raise ValueError(f"master_person_wide 中缺少立方体维度：{missing}（country_name 由 97 脚本补充）")
+    print("数据形状:", master.shape)
+
+    boot = shared()
+    t0 = time.perf_counter()
+    cube = build_cube(master, boot=boot)
+    print(f"\n已算出 {len(grouping_sets())} 个 grouping set，共 {len(cube)} 个格子，"
+          f"含 {boot.reps} 次 bootstrap 的置信区间（用时 {time.perf_counter() - t0:.3f}s）")
+
+    out = write_cube(cube)
+    print(f"✅ 已写出立方体：{out}（{out.stat().st_size / 1024:.0f} KB）")
+
+    print("\n读取量表长表 ...")
+    fact = read_fact()
+    t0 = time.perf_counter()
+    item_cube = build_item_cube(fact, master, boot=boot)
+    out = write_item_cube(item_cube)
+    print(f"✅ 已写出量表立方体：{out}（{len(item_cube)} 个格子，"
+          f"用时 {time.perf_counter() - t0:.3f}s，{out.stat().st_size / 1024:.0f} KB）")
+    write_members(master[ID_COL])
+    warn_dropped_waves(master[ID_COL])
+
+    # === 检查：全部汇总行应等于 high_stress_group 非缺失的总人数 ===
+    overall = cube_slice(cube, [])
+    n_valid = int(master[STRESS_COL].notna().sum())
+    if int(overall["total_count"].iloc[0]) != n_valid:
+        raise RuntimeError(f"立方体总人数 {int(overall['total_count'].iloc[0])} ≠ 有效样本量 {n_valid}")
+
+    print("\n=== 示例：学位切片 ===")
+    print(cube_slice(cube, ["degree_label"]).to_string(index=False))
+    print("\n=== 示例：大洲切片 ===")
+    print(cube_slice(cube, ["region_continent"]).to_string(index=False))
+    print("\n=== 示例：博士的工时切片 ===")
+    print(cube_slice(cube, ["hours_level"], degree_label="Doctorate").to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
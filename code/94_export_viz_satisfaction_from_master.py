@@ -5,7 +5,7 @@
 94_export_viz_satisfaction_from_master.py
 
 用途：
-- 基于 master_person_wide + satisfaction_long，
+- 基于 master_person_wide + 量表长表（Q27，见 gradlife.long_tables），
   生成“各方面满意度 × 高压组”的汇总表，供前端可视化使用。
 
 一行 = 一个 (满意度维度 × 高压组) 组合。
@@ -26,16 +26,19 @@
 - high_stress_label  : 'Non-high-stress' / 'High-stress'
 - n                  : 样本量（该组非缺失 score 数）
 - mean_score         : 平均满意度（1-7）
+- mean_score_ci_low  : mean_score 的 95% bootstrap 置信区间下限（按受访者重抽样）
+- mean_score_ci_high : 置信区间上限
 """
 
 from pathlib import Path
 import pandas as pd
+from gradlife.bootstrap import shared
+from gradlife.keys import align
+from gradlife.long_tables import SATISFACTION, read_long
+from gradlife.master_store import read_master
 
 BASE = Path("/workspace")
 
-PATH_MASTER = BASE / "output" / "99_master" / "master_person_wide.csv"
-PATH_SAT = BASE / "output" / "99_master" / "satisfaction_long.csv"
-
 OUT_ANALYSIS_DIR = BASE / "output" / "11_satisfaction_master"
 OUT_VIZ_DIR = BASE / "output" / "08_viz_data"
 
@@ -43,45 +46,15 @@ OUT_ANALYSIS_DIR.mkdir(parents=True, exist_ok=True)
 OUT_VIZ_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def make_aspect_short(text: str) -> str:
-    """
-    从长题干中提炼一个短标签。
-    目前用一个很简单的规则：取最后一句最后的核心短语，
-    比如 'Work-life balance' / 'Social environment' 等。
-    """
-    if not isinstance(text, str):
-        return ""
-
-    t = text.strip()
-    # 很多 question_text 形如：
-    # "How satisfied are you with ... ? Work-life balance [numeric]"
-    # 先按 '?' 或 ':' 分割，再取最后一段
-    for sep in ["?", ":", "â€”", "—"]:
-        if sep in t:
-            t = t.split(sep)[-1].strip()
-
-    # 去掉尾部的 [numeric]
-    if "[numeric]" in t:
-        t = t.replace("[numeric]", "").strip()
-
-    # 再按 '.' 切一下，取最后一段
-    if "." in t:
-        t = t.split(".")[-1].strip()
-
-    # 再按 '  ' （两个空格）拆一下，取最后一段（防御性）
-    if "  " in t:
-        t = t.split("  ")[-1].strip()
-
-    return t
-
-
 def main():
     print("读取 master_person_wide ...")
-    master = pd.read_csv(PATH_MASTER)
+    master = read_master(["resp_id", "degree_label", "region_continent", "high_stress_group"])
     print("master_person_wide 形状:", master.shape)
 
-    print("读取 satisfaction_long ...")
-    sat_long = pd.read_csv(PATH_SAT)
+    print("读取 Q27 满意度长表 ...")
+    sat_long = read_long(SATISFACTION).rename(
+        columns={"item_code": "aspect_code", "item_text": "aspect_text", "item_short": "aspect_short"}
+    )
     print("satisfaction_long 形状:", sat_long.shape)
 
     # 检查必需列
@@ -89,7 +62,7 @@ def main():
         if col not in master.columns:
             raise KeyError(f"master_person_wide 缺少必需列：{col}")
 
-    required_sat_cols = ["resp_id", "aspect_code", "q_no", "aspect_text", "score"]
+    required_sat_cols = ["resp_id", "aspect_code", "q_no", "aspect_text", "aspect_short", "score"]
     missing_sat = [c for c in required_sat_cols if c not in sat_long.columns]
     if missing_sat:
         raise KeyError("satisfaction_long 缺少列：" + ", ".join(missing_sat))
@@ -112,15 +85,18 @@ def main():
         {0: "Non-high-stress", 1: "High-stress"}
     )
 
-    # aspect 简短标签
-    df["aspect_short"] = df["aspect_text"].apply(make_aspect_short)
-
     # === 1. 按 (aspect × 高压组) 汇总：总体 ===
     grp = df.groupby(["aspect_code", "q_no", "aspect_text", "aspect_short", "high_stress_group", "high_stress_label"])
 
     agg = grp["score"].agg(["count", "mean"]).reset_index()
     agg = agg.rename(columns={"count": "n", "mean": "mean_score"})
 
+    # 每组平均分的 bootstrap 置信区间：按受访者重抽样，同一个人的各条目一起被抽到
+    units = align(df["resp_id"].to_numpy(), master["resp_id"].to_numpy())
+    agg["mean_score_ci_low"], agg["mean_score_ci_high"] = shared().group_mean_ci(
+        grp, df["score"], units, len(master)
+    )
+
     # 为排序准备一个 aspect 顺序：按 q_no 排
     order_map = (
         agg[["aspect_code", "q_no"]]
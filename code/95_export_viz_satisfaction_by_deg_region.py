@@ -5,7 +5,7 @@
 95_export_viz_satisfaction_by_deg_region.py
 
 用途：
-- 基于 master_person_wide + satisfaction_long，
+- 基于 master_person_wide + 量表长表（Q27，见 gradlife.long_tables），
   生成“各方面满意度 × 高压组 × 学位 × 地区（大洲）”的汇总表，
   供后续前端可视化使用（例如：按学位/地区对比各维度满意度的高压/非高压差异）。
 
@@ -29,16 +29,19 @@
 - high_stress_label  : 'Non-high-stress' / 'High-stress'
 - n                  : 样本量（该组合非缺失 score 数）
 - mean_score         : 平均满意度（1-7）
+- mean_score_ci_low  : mean_score 的 95% bootstrap 置信区间下限（按受访者重抽样）
+- mean_score_ci_high : 置信区间上限
 """
 
 from pathlib import Path
 import pandas as pd
+from gradlife.bootstrap import shared
+from gradlife.keys import align
+from gradlife.long_tables import SATISFACTION, read_long
+from gradlife.master_store import fill_label, read_master
 
 BASE = Path("/workspace")
 
-PATH_MASTER = BASE / "output" / "99_master" / "master_person_wide.csv"
-PATH_SAT = BASE / "output" / "99_master" / "satisfaction_long.csv"
-
 OUT_ANALYSIS_DIR = BASE / "output" / "11_satisfaction_master"
 OUT_VIZ_DIR = BASE / "output" / "08_viz_data"
 
@@ -46,43 +49,15 @@ OUT_ANALYSIS_DIR.mkdir(parents=True, exist_ok=True)
 OUT_VIZ_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def make_aspect_short(text: str) -> str:
-    """
-    从长题干中提炼一个短标签。
-    规则与 94_export_viz_satisfaction_from_master.py 保持一致：
-    - 去掉前面的通用引导句，只保留后面的短语，如 'Work-life balance'
-    """
-    if not isinstance(text, str):
-        return ""
-
-    t = text.strip()
-    # 按 '?' 或 ':' 分割，再取最后一段
-    for sep in ["?", ":", "â€”", "—"]:
-        if sep in t:
-            t = t.split(sep)[-1].strip()
-
-    # 去掉尾部的 [numeric]
-    if "[numeric]" in t:
-        t = t.replace("[numeric]", "").strip()
-
-    # 按 '.' 再分割
-    if "." in t:
-        t = t.split(".")[-1].strip()
-
-    # 按两个空格分割（防御性）
-    if "  " in t:
-        t = t.split("  ")[-1].strip()
-
-    return t
-
-
 def main():
     print("读取 master_person_wide ...")
-    master = pd.read_csv(PATH_MASTER)
+    master = read_master(["resp_id", "degree_label", "region_continent", "high_stress_group"])
     print("master_person_wide 形状:", master.shape)
 
-    print("读取 satisfaction_long ...")
-    sat_long = pd.read_csv(PATH_SAT)
+    print("读取 Q27 满意度长表 ...")
+    sat_long = read_long(SATISFACTION).rename(
+        columns={"item_code": "aspect_code", "item_text": "aspect_text", "item_short": "aspect_short"}
+    )
     print("satisfaction_long 形状:", sat_long.shape)
 
     # 检查 master 必需列
@@ -91,7 +66,7 @@ def main():
             raise KeyError(f"master_person_wide 缺少必需列：{col}")
 
     # 检查 satisfaction_long 必需列
-    required_sat_cols = ["resp_id", "aspect_code", "q_no", "aspect_text", "score"]
+    required_sat_cols = ["resp_id", "aspect_code", "q_no", "aspect_text", "aspect_short", "score"]
     missing_sat = [c for c in required_sat_cols if c not in sat_long.columns]
     if missing_sat:
         raise KeyError("satisfaction_long 缺少列：" + ", ".join(missing_sat))
@@ -114,12 +89,9 @@ def main():
         {0: "Non-high-stress", 1: "High-stress"}
     )
 
-    # aspect 简短标签
-    df["aspect_short"] = df["aspect_text"].apply(make_aspect_short)
-
     # 防御性处理 degree_label / region_continent 中的缺失
-    df["degree_label"] = df["degree_label"].fillna("Unknown degree")
-    df["region_continent"] = df["region_continent"].fillna("Unknown region")
+    df["degree_label"] = fill_label(df["degree_label"], "Unknown degree")
+    df["region_continent"] = fill_label(df["region_continent"], "Unknown region")
 
     # === 1. 按 (aspect × 高压组 × 学位 × 地区) 汇总 ===
     group_cols = [
@@ -133,11 +105,17 @@ def main():
         "high_stress_label",
     ]
 
-    grp = df.groupby(group_cols)
+    grp = df.groupby(group_cols, observed=True)   # 标签列是 category，只保留出现过的组合
 
     agg = grp["score"].agg(["count", "mean"]).reset_index()
     agg = agg.rename(columns={"count": "n", "mean": "mean_score"})
 
+    # 每组平均分的 bootstrap 置信区间：按受访者重抽样，同一个人的各条目一起被抽到
+    units = align(df["resp_id"].to_numpy(), master["resp_id"].to_numpy())
+    agg["mean_score_ci_low"], agg["mean_score_ci_high"] = shared().group_mean_ci(
+        grp, df["score"], units, len(master)
+    )
+
     # 为排序准备一个 aspect 顺序：按 q_no 排
     order_map = (
         agg[["aspect_code", "q_no"]]
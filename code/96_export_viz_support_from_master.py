@@ -5,7 +5,7 @@
 96_export_viz_support_from_master.py
 
 用途：
-- 基于 master_person_wide + support_long，
+- 基于 master_person_wide + 量表长表（Q32 / Q35，见 gradlife.long_tables），
   生成“支持相关条目 × 高压组”的汇总表，供后续前端可视化使用。
 
 一行 = 一个 (支持条目 × 高压组) 组合。
@@ -31,16 +31,19 @@
 - high_stress_label : 'Non-high-stress' / 'High-stress'
 - n                 : 样本量（该组非缺失 score 数）
 - mean_score        : 平均得分（Likert，一般 1–5）
+- mean_score_ci_low : mean_score 的 95% bootstrap 置信区间下限（按受访者重抽样）
+- mean_score_ci_high: 置信区间上限
 """
 
 from pathlib import Path
 import pandas as pd
+from gradlife.bootstrap import shared
+from gradlife.keys import align
+from gradlife.long_tables import SUPPORT, read_long
+from gradlife.master_store import read_master
 
 BASE = Path("/workspace")
 
-PATH_MASTER = BASE / "output" / "99_master" / "master_person_wide.csv"
-PATH_SUPPORT = BASE / "output" / "99_master" / "support_long.csv"
-
 OUT_ANALYSIS_DIR = BASE / "output" / "12_support_master"
 OUT_VIZ_DIR = BASE / "output" / "08_viz_data"
 
@@ -48,50 +51,13 @@ OUT_ANALYSIS_DIR.mkdir(parents=True, exist_ok=True)
 OUT_VIZ_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def make_item_short(text: str) -> str:
-    """
-    从长题干中提炼一个短标签。
-
-    Q32 示例：
-      "My supervisor … Makes time for frank conversations about my career    [numeric]"
-    Q35 示例：
-      "My university supports good work-life balance [numeric]"
-
-    规则：
-    - 对 Q32：截掉前面的 "My supervisor …"，保留后半句。
-    - 去掉末尾的 "[numeric]"。
-    - 简单清理多余空格。
-    """
-    if not isinstance(text, str):
-        return ""
-
-    t = text.strip()
-
-    # 去掉 [numeric]
-    if "[numeric]" in t:
-        t = t.replace("[numeric]", "").strip()
-
-    # 针对 "My supervisor … ..." 的情况，按 "…" 或 "..." 切一次
-    # 有时编码问题会变成 "â¦"，也处理一下
-    for sep in ["…", "...", "â¦"]:
-        if sep in t:
-            parts = t.split(sep, 1)
-            if len(parts) == 2:
-                t = parts[1].strip()
-                break
-
-    # 再处理一下以 "My university" 打头的句子，直接保留整体即可
-    # 这里只是防御性逻辑，不再额外截断
-    return t
-
-
 def main():
     print("读取 master_person_wide ...")
-    master = pd.read_csv(PATH_MASTER)
+    master = read_master(["resp_id", "high_stress_group"])
     print("master_person_wide 形状:", master.shape)
 
-    print("读取 support_long ...")
-    sup_long = pd.read_csv(PATH_SUPPORT)
+    print("读取 Q32 / Q35 支持长表 ...")
+    sup_long = read_long(SUPPORT)
     print("support_long 形状:", sup_long.shape)
 
     # 检查 master 必需列
@@ -100,7 +66,7 @@ def main():
             raise KeyError(f"master_person_wide 缺少必需列：{col}")
 
     # 检查 support_long 必需列
-    required_sup_cols = ["resp_id", "item_code", "q_no", "scale_group", "item_text", "score"]
+    required_sup_cols = ["resp_id", "item_code", "q_no", "scale_group", "item_text", "item_short", "score"]
     missing_sup = [c for c in required_sup_cols if c not in sup_long.columns]
     if missing_sup:
         raise KeyError("support_long 缺少列：" + ", ".join(missing_sup))
@@ -123,9 +89,6 @@ def main():
         {0: "Non-high-stress", 1: "High-stress"}
     )
 
-    # 简短标签
-    df["item_short"] = df["item_text"].apply(make_item_short)
-
     # === 1. 按 (item × 高压组) 汇总：总体 ===
     group_cols = [
         "item_code",
@@ -142,6 +105,12 @@ def main():
     agg = grp["score"].agg(["count", "mean"]).reset_index()
     agg = agg.rename(columns={"count": "n", "mean": "mean_score"})
 
+    # 每组平均分的 bootstrap 置信区间：按受访者重抽样，同一个人的各条目一起被抽到
+    units = align(df["resp_id"].to_numpy(), master["resp_id"].to_numpy())
+    agg["mean_score_ci_low"], agg["mean_score_ci_high"] = shared().group_mean_ci(
+        grp, df["score"], units, len(master)
+    )
+
     # 为排序准备一个 item 顺序：按 scale_group + q_no 排
     order_map = (
         agg[["item_code", "scale_group", "q_no"]]
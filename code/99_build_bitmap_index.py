@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+99_build_bitmap_index.py
+
+用 master_person_wide 建受访者属性的位图索引（见 gradlife/bitmap.py）：
+学位、大洲、国家、工时档、支持象限（及导师 / 学校支持档次）、照护责任、
+高压 / 高工时 / 低工作生活平衡标记，每个取值一个位图。
+之后任意筛选组合的人数和高压比例都用位运算 + popcount 回答，不用再扫主表。
+
+使用的文件：
+- /workspace/output/99_master/master_person_wide/*.parquet（只读被索引的列）
+
+输出：
+- /workspace/output/99_master/bitmap_index.npz
+"""
+
+import time
+
+import numpy as np
+
+from gradlife.bitmap import INDEX_COLS, BitmapIndex, load_index
+from gradlife.keys import ID_COL
+from gradlife.master_store import read_master
+
+
+def main():
+    print("读取 master_person_wide 的索引列 ...")
+    master = read_master([ID_COL] + INDEX_COLS)
+    print("数据形状:", master.shape)
+
+    t0 = time.perf_counter()
+    idx = BitmapIndex.build(master)
+    out = idx.save()
+    print(f"\n✅ 已建立 {len(idx.keys)} 个位图（{idx.n_rows} 名受访者，用时 {time.perf_counter() - t0:.3f}s）："
+          f"{out}（{out.stat().st_size / 1024:.0f} KB）")
+
+    # === 示例查询 + 与直接筛选主表的结果核对 ===
+    idx = load_index()
+    spec = {
+        "degree_label": "Doctorate",
+        "region_continent": "Europe",
+        "hours_level": ["high", "very_high"],
+        "supervisor_cat": "Low",
+    }
+    t0 = time.perf_counter()
+    high, total, pct = idx.high_stress_rate(spec)
+    us = (time.perf_counter() - t0) * 1e6
+
+    mask = np.ones(len(master), dtype=bool)
+    for col, value in spec.items():
+        values = value if isinstance(value, list) else [value]
+        mask &= master[col].isin(values).to_numpy()
+    expected_total = int((mask & master["high_stress_group"].notna().to_numpy()).sum())
+    expected_high = int((mask & (master["high_stress_group"] == 1).fillna(False).to_numpy()).sum())
+    if (high, total) != (expected_high, expected_total):
+        raise RuntimeError(f"位图查询结果 {(high, total)} 与直接筛选 {(expected_high, expected_total)} 不一致")
+
+    print(f"\n=== 示例：博士 且 欧洲 且 高工时 且 导师支持低（{us:.0f} µs）===")
+    print(f"人数 {total}，其中高压 {high}（{pct:.1f}%）✅ 与直接筛选主表一致")
+
+    caring = idx["caring_responsibility_label"].isin(["Somewhat agree", "Strongly agree"])
+    sel = caring & ((idx["high_hours_flag"] == 1) | (idx["low_worklife_flag"] == 1))
+    high, total, pct = idx.high_stress_rate(sel)
+    print("\n=== 示例：有照护责任 且（高工时 或 工作生活平衡差）===")
+    print(f"人数 {total}，其中高压 {high}（{pct:.1f}%）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+99_build_sql_store.py
+
+把主表 master_person_wide 和量表长表装进嵌入式 SQLite 库，之后新的交叉表 / 汇总
+直接用 gradlife.sqlstore 的 query() / crosstab() 查，不用再新写编号脚本。
+
+使用的文件：
+- /workspace/output/99_master/master_person_wide/*.parquet（整张主表，各列组）
+- /workspace/output/99_master/likert_long.parquet
+- /workspace/output/99_master/likert_items.csv
+
+输出：
+- /workspace/output/99_master/gradlife.sqlite
+    - 表 master / likert_long / likert_items，视图 likert
+    - 索引：degree_label、region_continent、country_name、high_stress_group、item_id、resp_id
+
+用法示例（见 gradlife/sqlstore.py）：
+    from gradlife.sqlstore import crosstab
+    crosstab("support_quadrant_label", by=["degree_label"])
+"""
+
+import time
+
+from gradlife.long_tables import read_fact, read_items
+from gradlife.master_store import read_master
+from gradlife.sqlstore import DB_PATH, build_db, crosstab, query
+
+
+def main():
+    print("读取 master_person_wide ...")
+    master = read_master()
+    print("master_person_wide 形状:", master.shape)
+
+    print("读取量表长表 ...")
+    fact = read_fact()
+    items = read_items()
+    print("likert_long 形状:", fact.shape, "，likert_items 形状:", items.shape)
+
+    t0 = time.perf_counter()
+    out = build_db(master, fact, items)
+    size_kb = out.stat().st_size / 1024
+    print(f"\n已写出 SQLite 库：{out}（{size_kb:.0f} KB，用时 {time.perf_counter() - t0:.2f}s）")
+
+    # === 示例查询：确认库可用，顺便看一下查询耗时 ===
+    t0 = time.perf_counter()
+    tab = crosstab("support_quadrant_label", by=["degree_label"], path=DB_PATH)
+    ms = (time.perf_counter() - t0) * 1000
+    print(f"\n=== 示例：学位 × 高压组 × 支持象限（{ms:.1f} ms）===")
+    print(tab.head(12).to_string(index=False))
+
+    t0 = time.perf_counter()
+    sat = query(
+        """SELECT item_short, high_stress_group, COUNT(*) AS n, AVG(score) AS mean_score
+           FROM likert
+           WHERE scale_group = ? AND high_stress_group IS NOT NULL
+           GROUP BY item_id, high_stress_group
+           ORDER BY item_id, high_stress_group""",
+        ["Q27"],
+    )
+    ms = (time.perf_counter() - t0) * 1000
+    print(f"\n=== 示例：Q27 各方面满意度 × 高压组（{ms:.1f} ms）===")
+    print(sat.head(8).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
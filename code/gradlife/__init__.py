@@ -0,0 +1,7 @@
+"""
+gradlife：各个编号脚本共用的小工具包。
+
+编号脚本（00_… ~ 98_…）仍然是各自独立运行的入口；
+这里只放被多个脚本复用、或者单个脚本里写起来太长的逻辑。
+脚本在 code/ 目录下运行时可以直接 `from gradlife.xxx import ...`。
+"""
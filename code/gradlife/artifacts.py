@@ -0,0 +1,96 @@
+"""
+artifacts.py
+
+按内容寻址的输出缓存（run_pipeline.py 使用）。
+
+每个步骤跑完后，它声明的输出文件复制一份到
+    /workspace/output/.artifacts/objects/<sha256 前两位>/<sha256><扩展名>
+原来位置上的文件不动，仍是普通文件：output/ 是要提交、要部署的网站目录，
+里面不能出现指向 .artifacts/（已被 .gitignore 排除）的链接。
+同样的（脚本代码, 输入内容）以前跑过 → 直接把当时的对象复制回原位置，不用重新计算
+（比如 metadata 改了又改回去）。
+
+注意：
+- 对象文件设为只读，原位置的输出和对象是两份独立的文件，手动运行脚本
+  原地改写输出不会改到缓存里的对象；
+  每个对象仍记下 [大小, 修改时间]，对不上的对象视为损坏，不再使用。
+- 目录输出（01 的 Parquet 分块目录）不进缓存。
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import stat
+from pathlib import Path
+
+from gradlife.hashing import file_sha256
+
+
+class ArtifactStore:
+    def __init__(self, root: Path, objects: dict):
+        """objects：{对象名: [大小, 修改时间]}，由调用方负责持久化（存在流水线状态文件里）。"""
+        self.root = Path(root)
+        self.objects = objects
+
+    def _object_path(self, name: str) -> Path:
+        return self.root / "objects" / name[:2] / name
+
+    @staticmethod
+    def _sig(path: Path):
+        st = path.stat()
+        return [st.st_size, st.st_mtime_ns]
+
+    def valid(self, name: str) -> bool:
+        """对象存在，且自从放进缓存后没被改过。"""
+        path = self._object_path(name)
+        return name in self.objects and path.is_file() and self._sig(path) == self.objects[name]
+
+    @staticmethod
+    def _copy(src: Path, dst: Path):
+        """复制成可写的普通文件（原子替换 dst，保留修改时间）。"""
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dst.with_name(f".{dst.name}.copy-tmp")
+        if tmp.exists():
+            tmp.unlink()
+        shutil.copy2(src, tmp)
+        os.chmod(tmp, os.stat(tmp).st_mode | stat.S_IWUSR)
+        os.replace(tmp, dst)
+
+    def restore(self, path: Path, name: str):
+        """把对象 name 复制回 path（普通文件）。"""
+        self._copy(self._object_path(name), Path(path))
+
+    def put(self, path: Path):
+        """
+        把文件 path 复制一份存进缓存，返回对象名；path 不是普通文件（目录、不存在）返回 None。
+        内容已经在缓存里 → 不再复制。path 本身保持原样。
+        """
+        path = Path(path)
+        if not path.is_file():
+            return None
+        name = file_sha256(path) + path.suffix.lower()
+        if not self.valid(name):
+            obj = self._object_path(name)
+            if obj.exists():
+                obj.unlink()               # 损坏的旧对象（只读文件也能在可写目录里删掉）
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            tmp = obj.with_name(f".{name}.tmp")
+            shutil.copy2(path, tmp)
+            os.chmod(tmp, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(tmp, obj)
+            self.objects[name] = self._sig(obj)
+        return name
+
+    def prune(self, keep) -> int:
+        """删除不在 keep 里的对象，返回删除的个数。"""
+        keep = set(keep)
+        removed = 0
+        for path in sorted((self.root / "objects").glob("*/*")):
+            if path.name not in keep:
+                path.unlink()
+                removed += 1
+        for name in list(self.objects):
+            if name not in keep:
+                del self.objects[name]
+        return removed
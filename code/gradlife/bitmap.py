@@ -0,0 +1,274 @@
+"""
+bitmap.py
+
+受访者属性的位图索引：对学位、大洲、国家、工时档、支持象限、照护责任和各个高压 / 工时标记，
+每个取值一个位图（第 i 位 = 主表第 i 个受访者是否取这个值）。任意布尔组合的筛选计数
+（如“博士 且 欧洲 且 高工时 且 导师支持低”）都变成位图之间的 & / | / ~ 再数 1 的个数，
+不再每次重新扫 DataFrame 或前端的 JS 行。
+
+    from gradlife.bitmap import load_index
+    idx = load_index()
+    sel = (idx["degree_label"] == "Doctorate") & (idx["region_continent"] == "Europe") \\
+          & idx["hours_level"].isin(["high", "very_high"]) & (idx["supervisor_cat"] == "Low")
+    idx.count(sel)                 # 人数
+    idx.high_stress_rate(sel)      # (高压人数, 有高压标记的人数, 百分比)
+
+    # 同样的查询写成 {列: 取值或取值列表}（列之间 AND、列表内 OR），方便本地查询服务直接收 JSON
+    idx.select({"degree_label": "Doctorate", "hours_level": ["high", "very_high"]})
+
+- 位图存成 uint64 字数组，& / | / ~ 按字运算，np.bitwise_count 数 1；
+- 某列取值缺失的受访者不在该列任何一个位图里，所以 ~(列 == 值) 会包含缺失的人，
+  需要排除时再 & idx.notna(列)；
+- 磁盘上（INDEX_PATH）所有位图打包成一个 np.savez_compressed 文件，稀疏的位图（小国家）压缩后几乎不占空间；
+  取值按文本存，另存每个取值的类型（int / float / str），读回时还原成原来的类型。
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from gradlife import tracking
+from gradlife.keys import ID_COL
+
+INDEX_PATH = Path("/workspace/output/99_master/bitmap_index.npz")
+
+INDEX_COLS = [
+    "degree_label",
+    "region_continent",
+    "country_name",
+    "hours_level",
+    "support_quadrant_label",
+    "supervisor_cat",
+    "institution_cat",
+    "caring_responsibility_label",
+    "high_stress_group",
+    "high_hours_flag",
+    "low_worklife_flag",
+    "high_hours_only_flag",
+    "low_worklife_only_flag",
+    "both_high_hours_and_low_wlb_flag",
+]
+STRESS_COL = "high_stress_group"
+
+# 取值类型标签 → 从文本还原的函数（bool 按 int 存）
+VALUE_KINDS = {"int": int, "float": float, "str": str}
+
+
+def _value_kind(value) -> str:
+    if isinstance(value, (bool, int, np.integer)):
+        return "int"
+    if isinstance(value, (float, np.floating)):
+        return "float"
+    if isinstance(value, str):
+        return "str"
+    raise TypeError(f"位图索引只支持 int / float / str 取值，收到 {type(value).__name__}：{value!r}")
+
+
+def _popcount(words: np.ndarray) -> int:
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(words).sum())
+    return int(np.unpackbits(words.view(np.uint8)).sum())
+
+
+class Bits:
+    """n_rows 位的位集（uint64 字数组），支持 & | ^ ~ 和 count()。"""
+
+    __slots__ = ("words", "n_rows")
+
+    def __init__(self, words: np.ndarray, n_rows: int):
+        self.words = words
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_mask(cls, mask) -> "Bits":
+        mask = np.asarray(mask, dtype=bool)
+        n = len(mask)
+        padded = np.zeros(-(-n // 64) * 64, dtype=bool)
+        padded[:n] = mask
+        words = np.packbits(padded, bitorder="little").view("<u8").astype(np.uint64)
+        return cls(words, n)
+
+    def to_mask(self) -> np.ndarray:
+        bits = np.unpackbits(self.words.astype("<u8").view(np.uint8), bitorder="little")
+        return bits[:self.n_rows].astype(bool)
+
+    def _check(self, other: "Bits"):
+        if not isinstance(other, Bits) or other.n_rows != self.n_rows:
+            raise ValueError("只能组合同一个索引里的位图。")
+
+    def __and__(self, other):
+        self._check(other)
+        return Bits(self.words & other.words, self.n_rows)
+
+    def __or__(self, other):
+        self._check(other)
+        return Bits(self.words | other.words, self.n_rows)
+
+    def __xor__(self, other):
+        self._check(other)
+        return Bits(self.words ^ other.words, self.n_rows)
+
+    def __invert__(self):
+        words = ~self.words
+        tail = self.n_rows % 64
+        if tail and len(words):
+            words[-1] &= np.uint64((1 << tail) - 1)   # 超出行数的位保持为 0
+        return Bits(words, self.n_rows)
+
+    def count(self) -> int:
+        return _popcount(self.words)
+
+    def __repr__(self):
+        return f"Bits({self.count()}/{self.n_rows})"
+
+
+class Column:
+    """某一列的位图集合：col == value、col.isin([...])。"""
+
+    def __init__(self, index: "BitmapIndex", name: str):
+        self.index = index
+        self.name = name
+
+    def __eq__(self, value) -> Bits:
+        return self.index.bits(self.name, value)
+
+    def __ne__(self, value) -> Bits:
+        return ~self.index.bits(self.name, value) & self.index.notna(self.name)
+
+    def isin(self, values) -> Bits:
+        out = self.index.empty()
+        for v in values:
+            out = out | self.index.bits(self.name, v)
+        return out
+
+    def values(self) -> list:
+        return self.index.values(self.name)
+
+    __hash__ = None
+
+
+class BitmapIndex:
+    """
+    keys 为 [(列名, 取值), ...]，words 第 k 行是 keys[k] 的位图；ids 是第 i 位对应的 resp_id。
+    """
+
+    def __init__(self, keys: list, words: np.ndarray, ids: np.ndarray):
+        self.keys = list(keys)
+        self.words = words
+        self.ids = ids
+        self.n_rows = len(ids)
+        self._pos = {k: i for i, k in enumerate(self.keys)}
+        self._cols = {}
+        for col, value in self.keys:
+            self._cols.setdefault(col, []).append(value)
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, columns=INDEX_COLS) -> "BitmapIndex":
+        """
+        对 df 的每个 columns 列、每个非缺失取值建一个位图（df 中没有的列跳过并提示）。
+        取值须为 int / float / str（存盘时要能按类型还原），其他类型报 TypeError。
+        """
+        missing = [c for c in columns if c not in df.columns]
+        if missing:
+            print(f"⚠️ 数据中没有这些列，不建索引：{missing}")
+        keys, rows = [], []
+        for col in [c for c in columns if c in df.columns]:
+            codes, uniques = pd.factorize(df[col], sort=True)
+            for k, value in enumerate(uniques):
+                value = value.item() if hasattr(value, "item") else value
+                _value_kind(value)
+                keys.append((col, value))
+                rows.append(Bits.from_mask(codes == k).words)
+        n_words = -(-len(df) // 64)
+        words = np.vstack(rows) if rows else np.zeros((0, n_words), dtype=np.uint64)
+        return cls(keys, words, df[ID_COL].to_numpy(dtype=np.int64))
+
+    # ---------- 取位图 ----------
+
+    def empty(self) -> Bits:
+        return Bits(np.zeros(self.words.shape[1], dtype=np.uint64), self.n_rows)
+
+    def all(self) -> Bits:
+        return ~self.empty()
+
+    def bits(self, col: str, value) -> Bits:
+        """col == value 的位图；索引里没有这个列时报错，没有这个取值时为空位图。"""
+        if col not in self._cols:
+            raise KeyError(f"位图索引中没有列 {col}（已索引：{list(self._cols)}）")
+        value = value.item() if hasattr(value, "item") else value
+        pos = self._pos.get((col, value))
+        if pos is None:
+            return self.empty()
+        return Bits(self.words[pos], self.n_rows)
+
+    def notna(self, col: str) -> Bits:
+        """该列取值不缺失的受访者。"""
+        return self[col].isin(self.values(col))
+
+    def values(self, col: str) -> list:
+        if col not in self._cols:
+            raise KeyError(f"位图索引中没有列 {col}")
+        return list(self._cols[col])
+
+    def __getitem__(self, col: str) -> Column:
+        if col not in self._cols:
+            raise KeyError(f"位图索引中没有列 {col}（已索引：{list(self._cols)}）")
+        return Column(self, col)
+
+    # ---------- 查询 ----------
+
+    def select(self, spec: dict) -> Bits:
+        """{列: 取值 或 取值列表}：列之间 AND，列表内 OR；空 dict = 全部受访者。"""
+        out = self.all()
+        for col, value in spec.items():
+            if isinstance(value, (list, tuple, set)):
+                out = out & self[col].isin(value)
+            else:
+                out = out & (self[col] == value)
+        return out
+
+    def _as_bits(self, sel) -> Bits:
+        if sel is None:
+            return self.all()
+        return sel if isinstance(sel, Bits) else self.select(sel)
+
+    def count(self, sel=None) -> int:
+        """满足条件（Bits 或 select 的 dict）的人数。"""
+        return self._as_bits(sel).count()
+
+    def high_stress_rate(self, sel=None, stress_col: str = STRESS_COL) -> tuple:
+        """(高压人数, 有高压标记的人数, 高压百分比)；没有人时百分比为 NaN。"""
+        sel = self._as_bits(sel)
+        total = (sel & self.notna(stress_col)).count()
+        high = (sel & (self[stress_col] == 1)).count()
+        return high, total, (high / total * 100 if total else float("nan"))
+
+    def resp_ids(self, sel) -> np.ndarray:
+        """满足条件的受访者的 resp_id。"""
+        return self.ids[self._as_bits(sel).to_mask()]
+
+    # ---------- 读写 ----------
+
+    def save(self, path: Path = INDEX_PATH) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        cols = np.array([k[0] for k in self.keys], dtype=str)
+        kinds = np.array([_value_kind(k[1]) for k in self.keys], dtype=str)
+        values = np.array([repr(int(v)) if kind == "int" else repr(float(v)) if kind == "float" else v
+                           for (_, v), kind in zip(self.keys, kinds)], dtype=str)
+        tmp = path.with_name(f".{path.stem}.tmp.npz")
+        np.savez_compressed(tmp, words=self.words, ids=self.ids, cols=cols, values=values, kinds=kinds)
+        tmp.replace(path)
+        return path
+
+
+def load_index(path: Path = INDEX_PATH) -> BitmapIndex:
+    """读取位图索引（99_build_bitmap_index.py 生成）。"""
+    if not Path(path).exists():
+        raise FileNotFoundError(f"没有找到 {path}，请先运行 99_build_bitmap_index.py。")
+    tracking.record(path)
+    with np.load(path) as z:
+        keys = [(str(c), VALUE_KINDS[str(k)](str(v))) for c, v, k in zip(z["cols"], z["values"], z["kinds"])]
+        return BitmapIndex(keys, z["words"], z["ids"])
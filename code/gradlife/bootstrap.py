@@ -0,0 +1,158 @@
+"""
+bootstrap.py
+
+百分比和均值的 bootstrap 置信区间：按受访者重抽样，B 次重抽样一次性表示成一个
+(B, 受访者数) 的权重矩阵 W（W[b, i] = 第 b 次重抽样中受访者 i 被抽到的次数），
+每个格子在每次重抽样里的计数 / 分数和都是 W 的列按格子分组求和，
+B 次、所有格子一起算，不再对每个格子、每次重抽样写 Python 循环。
+
+    from gradlife.bootstrap import Bootstrap, shared
+    boot = Bootstrap()                                   # 默认 1000 次，Poisson 权重，95% 区间
+    ct = crosstab(df, "debt_label", boot=boot)           # 多出 percent_ci_low / percent_ci_high
+    cube = build_cube(master, boot=boot)                 # 多出 high_stress_percent_ci_low / _high
+
+    grp = df.groupby(keys)                               # 量表长表按组求均值的导出（94–98）
+    agg = grp["score"].agg(["count", "mean"]).reset_index()
+    agg["mean_score_ci_low"], agg["mean_score_ci_high"] = shared().group_mean_ci(
+        grp, df["score"], units, n_units)
+
+各导出脚本（话题交叉表、28 / 30 / 39 / 42 / 43、93、94–98）都用 shared() 这一份设置，
+看板上所有区间的重抽样次数、置信水平和种子一致。
+
+- 权重：method="poisson" 时每个 W[b, i] 独立取 Poisson(1)（各次重抽样的样本量略有不同，
+  适合分块 / 分批的数据）；method="multinomial" 时每行是 Multinomial(n, 1/n)，即经典的有放回抽 n 人；
+- 分组求和：每个受访者有很多观测时（量表长表），先把观测汇总成 (受访者数, 格子数) 的矩阵 X
+  （每个受访者在每个格子里的计数 / 分数和），B 次重抽样的结果就是一次矩阵乘法 W @ X；
+  一人一行、或 X 太大时，改为观测按格子排序后对 W 的对应列做 np.add.reduceat，
+  按重抽样分块，限制中间数组的大小；
+- 区间：每个格子 B 个重抽样统计量的百分位数区间（和 np.quantile 默认的线性插值相同），
+  某次重抽样里格子没有人时该次不计；
+- 随机种子固定，同样的数据每次得到同样的区间，流水线的输出可以复现、可以缓存。
+
+百分比为 0 或 100 的格子重抽样后不会变化，区间退化为一个点；人数很少的格子区间会很宽，
+这正是要在看板上标出来的。
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+DEFAULT_REPS = 1000
+DEFAULT_LEVEL = 0.95
+SEED = 20240601
+
+# X 矩阵 / 每块 (重抽样 × 观测) 的元素个数上限，控制中间数组的内存（约 128 MB 的 float64）
+_CHUNK = 1 << 24
+# X 的元素个数不超过观测数的这么多倍时用矩阵乘法（乘加比取列快得多）
+_MATMUL_RATIO = 64
+
+
+class Bootstrap:
+    """B 次重抽样的设置；weights(n) 给出 (B, n) 的权重矩阵（同样的 n 只生成一次）。"""
+
+    def __init__(self, reps: int = DEFAULT_REPS, method: str = "poisson",
+                 level: float = DEFAULT_LEVEL, seed: int = SEED):
+        if method not in ("poisson", "multinomial"):
+            raise ValueError(f"未知的重抽样方法：{method}（可选 poisson / multinomial）")
+        if not 0 < level < 1:
+            raise ValueError(f"置信水平应在 0 和 1 之间：{level}")
+        self.reps = int(reps)
+        self.method = method
+        self.level = level
+        self.seed = seed
+        self._weights = {}
+
+    def weights(self, n: int) -> np.ndarray:
+        if n not in self._weights:
+            rng = np.random.default_rng(self.seed)
+            if self.method == "poisson":
+                w = rng.poisson(1.0, size=(self.reps, n))
+            else:
+                w = rng.multinomial(n, np.full(n, 1.0 / n), size=self.reps) if n else np.zeros((self.reps, 0))
+            self._weights[n] = w.astype(np.float64)
+        return self._weights[n]
+
+    def interval(self, stats: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(B, 格子数) 的重抽样统计量 → 每个格子的 (下限, 上限)；全为缺失的格子为 NaN。"""
+        alpha = (1 - self.level) / 2
+        return quantiles(stats, alpha), quantiles(stats, 1 - alpha)
+
+    def ratio_ci(self, n_units: int, units, cells, n_cells: int, num=None, den=None,
+                 scale: float = 1.0) -> tuple[np.ndarray, np.ndarray]:
+        """
+        比值 sum(num) / sum(den) × scale 在每个格子的区间。units 是每个观测所属的受访者
+        （权重矩阵的列），cells 是每个观测所属的格子（0 .. n_cells-1）；num / den 为 None 时按 1 计。
+        """
+        W = self.weights(n_units)
+        top, bottom = cell_sums(W, units, cells, n_cells, [num, den])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            stats = np.where(bottom > 0, top / bottom * scale, np.nan)
+        return self.interval(stats)
+
+    def group_mean_ci(self, grouped, values, units, n_units: int,
+                      scale: float = 1.0) -> tuple[np.ndarray, np.ndarray]:
+        """
+        DataFrame.groupby 各组均值的区间，顺序与 grouped.agg(...).reset_index() 的行相同。
+        units 是每行所属受访者在受访者表里的位置（0 .. n_units-1，-1 = 不在表里，不计），
+        同一受访者的多行（量表长表）一起被抽到或不被抽到；分组键或 values 缺失的行不计。
+        """
+        cells = grouped.ngroup().to_numpy(dtype="float64", na_value=np.nan)
+        values = np.asarray(values, dtype=np.float64)
+        units = np.asarray(units, dtype=np.int64)
+        valid = ~np.isnan(cells) & ~np.isnan(values) & (units >= 0)
+        return self.ratio_ci(n_units, units[valid], cells[valid].astype(np.int64), grouped.ngroups,
+                             num=values[valid], scale=scale)
+
+
+_SHARED = None
+
+
+def shared() -> Bootstrap:
+    """各导出脚本共用的 Bootstrap（默认设置）；同一进程里同样人数的权重矩阵只生成一次。"""
+    global _SHARED
+    if _SHARED is None:
+        _SHARED = Bootstrap()
+    return _SHARED
+
+
+def cell_sums(weights: np.ndarray, units, cells, n_cells: int, values=(None,)) -> list[np.ndarray]:
+    """
+    每个 values（每个观测一个值，None 为计数）在每次重抽样、每个格子里的加权和，
+    返回与 values 同样多的 (B, n_cells) 矩阵。同一批观测的多个 values 共用一次取列。
+    """
+    units = np.asarray(units, dtype=np.int64)
+    cells = np.asarray(cells, dtype=np.int64)
+    reps, n_units = weights.shape
+    if n_units * n_cells <= min(_CHUNK, _MATMUL_RATIO * len(units)):
+        flat = units * n_cells + cells
+        return [weights @ np.bincount(flat, weights=v, minlength=n_units * n_cells).reshape(n_units, n_cells)
+                for v in values]
+
+    order = np.argsort(cells, kind="stable")
+    units, cells = units[order], cells[order]
+    values = [None if v is None else np.asarray(v, dtype=np.float64)[order] for v in values]
+
+    out = [np.zeros((reps, n_cells)) for _ in values]
+    if not len(units):
+        return out
+    present, starts = np.unique(cells, return_index=True)
+    step = max(1, _CHUNK // len(units))
+    for b in range(0, reps, step):
+        block = weights[b:b + step][:, units]
+        for o, v in zip(out, values):
+            o[b:b + step, present] = np.add.reduceat(block if v is None else block * v, starts, axis=1)
+    return out
+
+
+def quantiles(stats: np.ndarray, q: float) -> np.ndarray:
+    """沿第 0 轴的分位数（线性插值，忽略 NaN），所有格子一起算。"""
+    stats = np.asarray(stats, dtype=np.float64)
+    ordered = np.sort(stats, axis=0)   # NaN 排在最后
+    k = (~np.isnan(stats)).sum(axis=0)
+    pos = q * np.maximum(k - 1, 0)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, np.maximum(k - 1, 0))
+    frac = pos - lo
+    below = np.take_along_axis(ordered, lo[None, :], axis=0)[0]
+    above = np.take_along_axis(ordered, hi[None, :], axis=0)[0]
+    return np.where(k > 0, below + (above - below) * frac, np.nan)
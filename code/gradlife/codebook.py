@@ -0,0 +1,188 @@
+"""
+codebook.py
+
+编译好的 codebook：把 metadata_step2_typed_clean.csv 里每列的 value_labels（JSON 字符串）
+一次性解析成稠密的 NumPy 标签数组，持久化后供所有脚本共用。
+
+原来每个脚本都自己复制一份 parse_value_labels，重新读 metadata、逐列 json.loads，
+再用 .map(dict) / .apply(lambda) 逐个单元格查标签。现在：
+
+    from gradlife.codebook import load_codebook
+    cb = load_codebook()
+    df["degree_label"] = cb.label("v004_code", df["v004_code"])
+
+- labels_of(col)：长度为 最大编码+1 的 object 数组，labels[code] 就是标签，没有标签的位置为 None
+- label(col, codes)：对整列编码做一次向量化 take；缺失 / 超出范围 / 没有标签 → NaN
+- 编译结果存在 TYPED_DIR/codebook.pkl，按 metadata 文件内容哈希索引；
+  metadata 没变就直接加载，不再解析任何 JSON。同一进程内只加载一次。
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from gradlife import tracking
+from gradlife.hashing import file_sha256
+from gradlife.typed_store import TYPED_DIR
+
+META_PATH = TYPED_DIR / "metadata_step2_typed_clean.csv"
+CODEBOOK_PATH = TYPED_DIR / "codebook.pkl"
+CODEBOOK_VERSION = 1
+
+# 每列保留的描述信息
+INFO_COLS = ["q_no", "q_type", "question_text", "multi_group"]
+
+_LOADED: dict[str, "Codebook"] = {}   # 进程内缓存：{metadata 哈希: Codebook}
+
+
+def parse_value_labels(val) -> dict:
+    """把 metadata 里的 value_labels 字段解析成 dict（保留原始 key）。"""
+    if isinstance(val, dict):
+        return val
+    if val is None or (isinstance(val, float) and np.isnan(val)):
+        return {}
+    try:
+        parsed = json.loads(val)
+    except (TypeError, ValueError):
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+def _dense_labels(labels: dict):
+    """
+    {"1": "a", "3": "c"} → array([None, "a", None, "c"], dtype=object)。
+    key 不是非负整数时返回 None（这类列只能用 label_dict 查）。
+    """
+    if not labels:
+        return None
+    try:
+        codes = [int(k) for k in labels]
+    except (TypeError, ValueError):
+        return None
+    if min(codes) < 0:
+        return None
+    arr = np.full(max(codes) + 1, None, dtype=object)
+    for code, text in zip(codes, labels.values()):
+        arr[code] = text
+    return arr
+
+
+class Codebook:
+    """metadata 编译后的查表对象。"""
+
+    def __init__(self, arrays: dict, dicts: dict, info: dict, meta_sha: str):
+        self.arrays = arrays      # {col: 稠密标签数组}
+        self.dicts = dicts        # {col: {int 或 str 编码: 标签}}
+        self.info = info          # {col: {q_no, q_type, question_text, multi_group}}
+        self.meta_sha = meta_sha
+
+    def _touch(self, col):
+        """列级依赖：记下读了哪一列（codebook 和它所来自的 metadata 都记）。"""
+        for path in getattr(self, "_sources", ()):
+            tracking.record(path, [col])
+
+    @classmethod
+    def from_metadata(cls, meta: pd.DataFrame, meta_sha: str = "") -> "Codebook":
+        arrays, dicts, info = {}, {}, {}
+        for row in meta.to_dict("records"):
+            col = row["col_name"]
+            info[col] = {k: row.get(k) for k in INFO_COLS}
+            labels = parse_value_labels(row.get("value_labels"))
+            if not labels:
+                continue
+            dense = _dense_labels(labels)
+            if dense is not None:
+                arrays[col] = dense
+                dicts[col] = {int(k): v for k, v in labels.items()}
+            else:
+                dicts[col] = labels
+        return cls(arrays, dicts, info, meta_sha)
+
+    # ---------- 查询 ----------
+
+    def __contains__(self, col) -> bool:
+        self._touch(col)
+        return col in self.info
+
+    def has_labels(self, col) -> bool:
+        self._touch(col)
+        return col in self.dicts
+
+    def labels_of(self, col) -> np.ndarray:
+        """稠密标签数组；该列没有整数编码的标签时抛 KeyError。"""
+        self._touch(col)
+        if col not in self.arrays:
+            raise KeyError(f"codebook 中没有列 {col} 的整数编码标签。")
+        return self.arrays[col]
+
+    def label_dict(self, col) -> dict:
+        """{编码: 标签}（整数编码的列 key 为 int），没有标签时返回空 dict。"""
+        self._touch(col)
+        return dict(self.dicts.get(col, {}))
+
+    def question_text(self, col):
+        self._touch(col)
+        return self.info.get(col, {}).get("question_text")
+
+    def q_no(self, col):
+        self._touch(col)
+        return self.info.get(col, {}).get("q_no")
+
+    def label(self, col, codes):
+        """
+        编码 → 标签，一次向量化 take。
+        codes 可以是 Series（结果保留 index）、数组或列表；
+        缺失、非整数、超出范围或没有标签的编码 → NaN。
+        """
+        labels = self.labels_of(col)
+        index = codes.index if isinstance(codes, pd.Series) else None
+
+        values = pd.to_numeric(pd.Series(np.asarray(codes, dtype=object)), errors="coerce")
+        values = values.to_numpy(dtype="float64", na_value=np.nan)
+        ok = np.isfinite(values) & (values >= 0) & (values < len(labels))
+        ok &= values == np.round(values)
+
+        out = np.full(len(values), np.nan, dtype=object)
+        taken = labels[values[ok].astype(np.int64)]
+        out[ok] = np.where(pd.isna(taken), np.nan, taken)
+
+        if index is not None:
+            return pd.Series(out, index=index, name=getattr(codes, "name", None))
+        return out
+
+
+def build_codebook(meta_path: Path = META_PATH, out_path: Path = CODEBOOK_PATH) -> Codebook:
+    """从 metadata 编译 codebook 并写盘（02_clean_by_qtype 写完 metadata 后调用）。"""
+    meta_sha = file_sha256(meta_path)
+    cb = Codebook.from_metadata(pd.read_csv(meta_path), meta_sha)
+    pd.to_pickle({"version": CODEBOOK_VERSION, "codebook": cb}, out_path)
+    cb._sources = (meta_path, out_path)     # 不进 pickle，只用于列级依赖记录
+    _LOADED[meta_sha] = cb
+    return cb
+
+
+def load_codebook(meta_path: Path = META_PATH, path: Path = CODEBOOK_PATH) -> Codebook:
+    """
+    加载 codebook：进程内已加载 → 直接返回；磁盘上的编译结果与 metadata 内容一致 → 读 pickle；
+    否则重新编译并写盘。
+    """
+    meta_sha = file_sha256(meta_path)
+    if meta_sha in _LOADED:
+        return _LOADED[meta_sha]
+
+    if path.exists():
+        try:
+            saved = pd.read_pickle(path)
+            cb = saved.get("codebook")
+            if saved.get("version") == CODEBOOK_VERSION and cb.meta_sha == meta_sha:
+                cb._sources = (meta_path, path)
+                _LOADED[meta_sha] = cb
+                return cb
+        except Exception as e:
+            print(f"⚠️ 读取 {path} 失败，将重新编译 codebook：{e}")
+
+    return build_codebook(meta_path, path)
@@ -0,0 +1,128 @@
+"""
+crosstab.py
+
+“目标变量 × 分层变量 × high_stress_group”的计数和组内百分比。
+
+原来 14、18、20、28、30、31、39、42、43 各自写一遍
+groupby([标签, (学位,) high_stress_group]).size() 再 groupby(...).transform("sum") 算百分比；
+一个脚本里有几个目标变量就重复几遍 groupby。现在统一为：
+
+    from gradlife.crosstab import crosstab, crosstabs
+    ct = crosstab(df, "debt_label")                                   # debt_label × high_stress_group
+    ct = crosstab(df, "help_label", by=["degree_code_int", "degree_label"],
+                  within=["help_label", "degree_code_int"])
+    tables = crosstabs(df, ["v079_num_cat", "v091_num_cat"], by=["degree_label"])
+
+- 每个键列先 factorize 成整数编码（缺失 → -1，该行不参与统计），分层列只编码一次，多个目标共用；
+- 各列编码合成一个整数键，np.bincount 一次数完所有格子，不再逐组 groupby；
+- 组内总数同样对合成键做 bincount，百分比 = count / 组内总数 × 100；
+- 传入 boot（gradlife.bootstrap.Bootstrap）时把 df 的每一行当作一个受访者重抽样，
+  所有格子的 B 次重抽样百分比一起算出，多出 百分比列_ci_low / 百分比列_ci_high 两列。
+
+输出与原来的 groupby 一致：列为 target, *by, stress_col, count, 百分比列；
+只包含出现过的组合，按各键列的取值排序（category 列按类别顺序）。
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from gradlife.bootstrap import cell_sums
+
+STRESS_COL = "high_stress_group"
+
+# 格子总数不超过这个数时用稠密 bincount，否则先把出现过的键压缩一遍
+_DENSE_LIMIT = 1 << 24
+
+
+def _factorize(s: pd.Series):
+    """(编码, 排好序的取值)；缺失为 -1。"""
+    codes, uniques = pd.factorize(s, sort=True)
+    return codes.astype(np.int64, copy=False), uniques
+
+
+def _count_cells(codes: list, shape: tuple):
+    """所有键都非缺失的行 → (出现过的格子的平铺下标, 每格计数)。"""
+    valid = np.ones(len(codes[0]), dtype=bool)
+    for c in codes:
+        valid &= c >= 0
+    flat = np.ravel_multi_index([c[valid] for c in codes], shape)
+    n_cells = int(np.prod(shape, dtype=np.int64))
+    if n_cells <= _DENSE_LIMIT:
+        counts = np.bincount(flat, minlength=n_cells)
+        cells = np.flatnonzero(counts)
+        return cells, counts[cells]
+    return np.unique(flat, return_counts=True)
+
+
+def _table(codes, uniques, names, within, percent_col, boot=None) -> pd.DataFrame:
+    shape = tuple(max(len(u), 1) for u in uniques)
+    cells, counts = _count_cells(codes, shape)
+    idx = np.unravel_index(cells, shape)
+
+    pos = [names.index(c) for c in within]
+    if pos:
+        group = np.ravel_multi_index([idx[p] for p in pos], [shape[p] for p in pos])
+        _, inverse = np.unique(group, return_inverse=True)
+        totals = np.bincount(inverse, weights=counts)[inverse]
+    else:
+        inverse = np.zeros(len(counts), dtype=np.int64)
+        totals = np.full(len(counts), counts.sum(), dtype="float64")
+
+    out = {name: u.take(i) for name, u, i in zip(names, uniques, idx)}
+    out["count"] = counts.astype("int64")
+    out[percent_col] = counts / totals * 100
+    if boot is not None:
+        out[f"{percent_col}_ci_low"], out[f"{percent_col}_ci_high"] = _percent_ci(
+            codes, shape, cells, inverse, boot)
+    return pd.DataFrame(out)
+
+
+def _percent_ci(codes, shape, cells, inverse, boot):
+    """每个格子组内百分比的 bootstrap 区间：格子计数和组内总数都按同一组权重重抽样。"""
+    valid = np.ones(len(codes[0]), dtype=bool)
+    for c in codes:
+        valid &= c >= 0
+    rows = np.flatnonzero(valid)
+    cell_of_row = np.searchsorted(cells, np.ravel_multi_index([c[valid] for c in codes], shape))
+
+    W = boot.weights(len(codes[0]))
+    n_groups = int(inverse.max()) + 1 if len(inverse) else 0
+    (counts,) = cell_sums(W, rows, cell_of_row, len(cells))
+    (totals,) = cell_sums(W, rows, inverse[cell_of_row], n_groups)
+    totals = totals[:, inverse]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stats = np.where(totals > 0, counts / totals * 100, np.nan)
+    return boot.interval(stats)
+
+
+def crosstabs(df: pd.DataFrame, targets, by=(), stress_col: str | None = STRESS_COL,
+              within=None, percent_col: str = "percent", boot=None) -> dict:
+    """
+    对每个目标变量算 target × by × stress_col 的计数和组内百分比，返回 {target: DataFrame}。
+
+    within 是算百分比的分组（默认 target + by，即每个 target × by 组合内部高压 / 非高压的占比）；
+    写成 "target" 代表当前目标变量。分层列只 factorize 一次，所有目标共用。
+    boot 为 Bootstrap 时加上百分比的置信区间列（df 须一行一个受访者）。
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    strata = by + ([stress_col] if stress_col else [])
+    missing = [c for c in list(targets) + strata if c not in df.columns]
+    if missing:
+        raise KeyError(f"交叉表需要这些列，但数据中没有：{missing}")
+
+    strata_codes = [_factorize(df[c]) for c in strata]
+    tables = {}
+    for target in targets:
+        names = [target] + strata
+        codes, uniques = zip(_factorize(df[target]), *strata_codes)
+        keep = [target] + by if within is None else [target if c == "target" else c for c in within]
+        tables[target] = _table(list(codes), list(uniques), names, keep, percent_col, boot)
+    return tables
+
+
+def crosstab(df: pd.DataFrame, target: str, by=(), stress_col: str | None = STRESS_COL,
+             within=None, percent_col: str = "percent", boot=None) -> pd.DataFrame:
+    """单个目标变量的 crosstabs。"""
+    return crosstabs(df, [target], by, stress_col, within, percent_col, boot)[target]
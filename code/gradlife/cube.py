@@ -0,0 +1,359 @@
+"""
+cube.py
+
+高压组的预计算立方体（OLAP cube）：主要的受访者维度的每一种组合（grouping set）
+都预先算好 high_stress_count / total_count，看板要哪个切片直接查表。
+
+原来学位、大洲、国家、工时、支持象限每个切片都有自己的导出脚本和 viz_*_high_stress.csv，
+各自 groupby 一遍。现在 build_cube 一次算完所有 2^5 = 32 个 grouping set：
+
+- 每个维度 factorize 成整数编码，缺失单独占一个编码；
+- 所有维度的编码合成一个整数键，对最细粒度（所有维度都分组）的格子做一次 np.bincount，
+  分别数总人数和高压人数；
+- 其余 grouping set 都由这个最细的数组沿“不分组的维度”求和得到（上卷），不再扫原始行；
+- 不参与分组的维度记为 "ALL"；参与分组的维度上取值缺失的行不计入该 grouping set
+  （和各导出脚本 dropna 的做法一致），high_stress_group 缺失的行都不计。
+
+结果是一张长表（CUBE_PARQUET），列为 grouping_id、各维度、high_stress_count、total_count、
+high_stress_percent。grouping_id 是位掩码：第 i 位为 1 表示 DIMS[i] 参与分组。
+表按 grouping_id、各维度排序，维度列是字典编码的 category，读一个 grouping set 时
+Parquet 的行组统计可以直接跳过其他部分。
+
+    from gradlife.cube import read_cube, cube_slice
+    cube = read_cube()
+    cube_slice(cube, ["degree_label"])                         # 相当于 viz_degree_high_stress
+    cube_slice(cube, ["region_continent", "country_name"])     # 相当于 viz_country_high_stress
+    cube_slice(cube, ["hours_level"], degree_label="Doctorate")  # 只看博士的工时切片
+
+量表立方体（ITEM_CUBE_PARQUET）：学位 × 大洲的所有 grouping set × 条目 × 高压组，
+每格存 n、score_sum、score_sumsq，均值 / 标准差由它们算出（缺失的学位 / 大洲和 95、98 一样记为
+"Unknown degree" / "Unknown region"）。
+
+两个立方体只存可加的量（计数、和、平方和），按键相加就能合并：新一批受访者到来时，
+append_wave 只对这一批算立方体再并进已有的立方体，用时与批次大小（和格子数）成正比，
+不需要从 01 重跑全部数据。已经计入的 resp_id 记在 MEMBERS_PARQUET 里，防止同一批追加两次。
+
+build_cube / build_item_cube 传入 boot（gradlife.bootstrap.Bootstrap）时，每个格子还带
+high_stress_percent / mean_score 的 bootstrap 置信区间（*_ci_low、*_ci_high）：所有 grouping set
+共用同一个受访者权重矩阵，每个 grouping set 一次分组求和算完全部格子。区间不可加，
+merge_cubes / append_wave 合并后不再带区间列，全量重建时重新算。
+"""
+
+from __future__ import annotations
+
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from gradlife import tracking
+from gradlife.keys import ID_COL, align
+from gradlife.master_store import fill_label
+
+CUBE_DIR = Path("/workspace/output/99_master")
+CUBE_PARQUET = CUBE_DIR / "high_stress_cube.parquet"
+CUBE_CSV = CUBE_DIR / "high_stress_cube.csv"        # 没装 pyarrow 时的兜底
+ITEM_CUBE_PARQUET = CUBE_DIR / "likert_cube.parquet"
+ITEM_CUBE_CSV = CUBE_DIR / "likert_cube.csv"
+MEMBERS_PARQUET = CUBE_DIR / "cube_members.parquet"
+MEMBERS_CSV = CUBE_DIR / "cube_members.csv"
+
+DIMS = ["degree_label", "region_continent", "country_name", "hours_level", "support_quadrant_label"]
+STRESS_COL = "high_stress_group"
+ALL = "ALL"
+
+# 量表立方体的上卷维度；缺失值的填充标签与 95 / 98 一致
+ITEM_DIMS = ["degree_label", "region_continent"]
+UNKNOWN = {"degree_label": "Unknown degree", "region_continent": "Unknown region"}
+
+CUBE_KEYS = ["grouping_id"] + DIMS
+CUBE_MEASURES = ["high_stress_count", "total_count"]
+ITEM_KEYS = ["grouping_id"] + ITEM_DIMS + ["item_id", STRESS_COL]
+ITEM_MEASURES = ["n", "score_sum", "score_sumsq"]
+CUBE_CI = ["high_stress_percent_ci_low", "high_stress_percent_ci_high"]
+ITEM_CI = ["mean_score_ci_low", "mean_score_ci_high"]
+
+# 最细粒度的格子数超过这个数就报错（各维度取值太多时不适合做稠密立方体）
+MAX_CELLS = 1 << 26
+
+
+def grouping_id(dims, all_dims=DIMS) -> int:
+    """参与分组的维度 → 位掩码（第 i 位对应 all_dims[i]）。"""
+    unknown = [d for d in dims if d not in all_dims]
+    if unknown:
+        raise KeyError(f"立方体中没有这些维度：{unknown}")
+    return sum(1 << all_dims.index(d) for d in dims)
+
+
+def grouping_sets(all_dims=DIMS) -> list[tuple]:
+    """所有 grouping set，从全部汇总（空集）到全部维度，按维度个数排列。"""
+    return [combo for k in range(len(all_dims) + 1) for combo in combinations(all_dims, k)]
+
+
+def _encode(cols, rows):
+    """各键列 → (编码, 排好序的取值)；缺失占最后一个编码。"""
+    codes, uniques = [], []
+    for s in cols:
+        c, u = pd.factorize(s, sort=True)
+        codes.append(np.where(c < 0, len(u), c)[rows])
+        uniques.append(np.asarray(u, dtype=object))
+    return codes, uniques
+
+
+def _rollup(codes, uniques, names, rollup, measures: dict, ci=None) -> pd.DataFrame:
+    """
+    对最细粒度的格子做一次 bincount（每个度量一次），再对 rollup 中维度的每个 grouping set
+    沿不分组的维度求和。不在 rollup 中的键始终分组。measures 为 {列名: 权重}，
+    权重为 None 表示计数；第一个度量为 0 的格子不输出。
+
+    ci(valid, key, n_cells) 给出时，对每个 grouping set 调用一次：valid 为参与该 grouping set 的行，
+    key 为这些行所在格子的编号（0 .. n_cells-1，与输出的格子同序），返回要加到这些格子上的列。
+    """
+    shape = tuple(len(u) + 1 for u in uniques)
+    n_cells = int(np.prod(shape, dtype=np.int64))
+    if n_cells > MAX_CELLS:
+        raise ValueError(f"立方体最细粒度有 {n_cells} 个格子，维度取值太多，请减少维度。")
+
+    key = np.ravel_multi_index(codes, shape) if len(codes[0]) else np.zeros(0, dtype=np.int64)
+    full = {m: np.bincount(key, weights=w, minlength=n_cells).reshape(shape) for m, w in measures.items()}
+    first = next(iter(measures))
+
+    parts = []
+    for combo in grouping_sets(rollup):
+        keep = [i for i, name in enumerate(names) if name not in rollup or name in combo]
+        drop = tuple(i for i in range(len(names)) if i not in keep)
+        # 参与分组的维度去掉“缺失”那一格；全部汇总时是一个 1 格的数组
+        sel = tuple(slice(0, shape[i] - 1) for i in keep)
+        arrs = {m: np.atleast_1d(a.sum(axis=drop)[sel]) for m, a in full.items()}
+        cells = np.flatnonzero(arrs[first])
+        idx = np.unravel_index(cells, arrs[first].shape)
+        if ci is not None:
+            valid = np.ones(len(codes[0]), dtype=bool)
+            for i in keep:
+                valid &= codes[i] < shape[i] - 1
+            sub_shape = [shape[i] - 1 for i in keep]
+            flat = (np.ravel_multi_index([codes[i][valid] for i in keep], sub_shape) if keep
+                    else np.zeros(int(valid.sum()), dtype=np.int64))
+            extra = ci(valid, np.searchsorted(cells, flat), len(cells))
+
+        part = {"grouping_id": np.full(len(cells), grouping_id(combo, rollup), dtype="int8")}
+        for i, name in enumerate(names):
+            if i in keep:
+                part[name] = uniques[i][idx[keep.index(i)]]
+            else:
+                part[name] = np.full(len(cells), ALL, dtype=object)
+        for m, a in arrs.items():
+            part[m] = a.ravel()[cells].astype("int64")
+        if ci is not None:
+            part.update(extra)
+        parts.append(pd.DataFrame(part))
+    return pd.concat(parts, ignore_index=True)
+
+
+def _finish_cube(cube: pd.DataFrame) -> pd.DataFrame:
+    cube = cube.sort_values(CUBE_KEYS, kind="stable", ignore_index=True)
+    for m in CUBE_MEASURES:
+        cube[m] = cube[m].astype("int32")
+    cube["high_stress_percent"] = cube["high_stress_count"] / cube["total_count"] * 100
+    cube = cube[CUBE_KEYS + CUBE_MEASURES + ["high_stress_percent"] + [c for c in CUBE_CI if c in cube.columns]]
+    for d in DIMS:
+        cube[d] = cube[d].astype(object).astype("category")
+    return cube
+
+
+def _finish_item_cube(cube: pd.DataFrame) -> pd.DataFrame:
+    cube = cube.sort_values(ITEM_KEYS, kind="stable", ignore_index=True)
+    cube["item_id"] = cube["item_id"].astype("int16")
+    cube[STRESS_COL] = cube[STRESS_COL].astype("int8")
+    cube["n"] = cube["n"].astype("int32")
+    for d in ITEM_DIMS:
+        cube[d] = cube[d].astype(object).astype("category")
+    return cube
+
+
+def build_cube(df: pd.DataFrame, dims=DIMS, stress_col: str = STRESS_COL, boot=None) -> pd.DataFrame:
+    """
+    一次 bincount 算出最细粒度的格子，再上卷出所有 grouping set。
+    boot 为 Bootstrap 时加上 high_stress_percent 的置信区间列（df 须一行一个受访者）。
+    """
+    dims = list(dims)
+    missing = [c for c in dims + [stress_col] if c not in df.columns]
+    if missing:
+        raise KeyError(f"建立立方体需要这些列，但数据中没有：{missing}")
+
+    stress = pd.to_numeric(df[stress_col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    rows = ~np.isnan(stress)
+    codes, uniques = _encode([df[d] for d in dims], rows)
+    high = stress[rows] == 1
+    ci = None
+    if boot is not None:
+        units = np.flatnonzero(rows)
+
+        def ci(valid, key, n_cells):
+            lo, hi = boot.ratio_ci(len(df), units[valid], key, n_cells, num=high[valid], scale=100)
+            return {"high_stress_percent_ci_low": lo, "high_stress_percent_ci_high": hi}
+
+    cube = _rollup(codes, uniques, dims, dims, {"total_count": None, "high_stress_count": high}, ci)
+    extra = [c for c in CUBE_CI if c in cube.columns]
+    return _finish_cube(cube[CUBE_KEYS + CUBE_MEASURES + extra])
+
+
+def build_item_cube(fact: pd.DataFrame, persons: pd.DataFrame, boot=None) -> pd.DataFrame:
+    """
+    量表立方体：fact 为窄事实表 (resp_id, item_id, score)，persons 提供每个 resp_id 的
+    学位、大洲和 high_stress_group。每格 n / score_sum / score_sumsq。
+    boot 为 Bootstrap 时按 persons 的受访者重抽样，加上 mean_score 的置信区间列。
+    """
+    missing = [c for c in [ID_COL, STRESS_COL] + ITEM_DIMS if c not in persons.columns]
+    if missing:
+        raise KeyError(f"建立量表立方体需要这些列，但数据中没有：{missing}")
+
+    pos = align(fact[ID_COL].to_numpy(), persons[ID_COL].to_numpy())
+    stress = pd.to_numeric(persons[STRESS_COL], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    rows = pos >= 0
+    rows[rows] = ~np.isnan(stress[pos[rows]])
+    take = np.where(pos >= 0, pos, 0)
+
+    cols = [fill_label(persons[d], UNKNOWN[d]).take(take).reset_index(drop=True) for d in ITEM_DIMS]
+    cols += [fact["item_id"].reset_index(drop=True), pd.Series(stress[take])]
+    codes, uniques = _encode(cols, rows)
+    score = fact["score"].to_numpy(dtype="float64")[rows]
+    ci = None
+    if boot is not None:
+        units = pos[rows]
+
+        def ci(valid, key, n_cells):
+            lo, hi = boot.ratio_ci(len(persons), units[valid], key, n_cells, num=score[valid])
+            return {"mean_score_ci_low": lo, "mean_score_ci_high": hi}
+
+    cube = _rollup(codes, uniques, ITEM_KEYS[1:], ITEM_DIMS,
+                   {"n": None, "score_sum": score, "score_sumsq": score * score}, ci)
+    return _finish_item_cube(cube)
+
+
+def merge_cubes(base: pd.DataFrame, delta: pd.DataFrame, item: bool = False) -> pd.DataFrame:
+    """两个立方体按键相加（计数、和、平方和都可加），用时与格子数成正比。"""
+    keys, measures = (ITEM_KEYS, ITEM_MEASURES) if item else (CUBE_KEYS, CUBE_MEASURES)
+    both = pd.concat([base[keys + measures], delta[keys + measures]], ignore_index=True)
+    for k in keys:
+        if isinstance(both[k].dtype, pd.CategoricalDtype) or both[k].dtype == object:
+            both[k] = both[k].astype(object)
+    merged = both.groupby(keys, sort=False)[measures].sum().reset_index()
+    return _finish_item_cube(merged) if item else _finish_cube(merged)
+
+
+def item_stats(cube: pd.DataFrame) -> pd.DataFrame:
+    """量表立方体加上 mean_score 和 sd_score（样本标准差，n = 1 时为缺失）。"""
+    out = cube.copy()
+    n = out["n"].to_numpy(dtype="float64")
+    out["mean_score"] = out["score_sum"] / n
+    ss = out["score_sumsq"] - out["score_sum"] ** 2 / n
+    out["sd_score"] = np.sqrt(np.clip(ss, 0, None) / np.where(n > 1, n - 1, np.nan))
+    return out
+
+
+# ---------- 读写 ----------
+
+def _write(df: pd.DataFrame, parquet: Path, csv: Path) -> Path:
+    CUBE_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        df.to_parquet(parquet, index=False, row_group_size=4096)
+    except ImportError:
+        print(f"⚠️ 未安装 pyarrow，改为写出 CSV：{csv}")
+        df.to_csv(csv, index=False)
+        if parquet.exists():
+            parquet.unlink()  # 旧的 Parquet 会优先被读到，必须删掉
+        return csv
+    if csv.exists():
+        csv.unlink()
+    return parquet
+
+
+def _read(parquet: Path, csv: Path, dtype=None, filters=None) -> pd.DataFrame:
+    if parquet.exists():
+        tracking.record(parquet)
+        return pd.read_parquet(parquet, filters=filters)
+    tracking.record(csv)
+    df = pd.read_csv(csv, dtype=dtype)
+    for col, op, value in filters or ():
+        df = df[df[col] == value].reset_index(drop=True)
+    return df
+
+
+def write_cube(cube: pd.DataFrame) -> Path:
+    """写出高压组立方体（Parquet，没装 pyarrow 时退回 CSV），返回路径。"""
+    return _write(cube, CUBE_PARQUET, CUBE_CSV)
+
+
+def write_item_cube(cube: pd.DataFrame) -> Path:
+    return _write(cube, ITEM_CUBE_PARQUET, ITEM_CUBE_CSV)
+
+
+def write_members(ids) -> Path:
+    """已计入立方体的 resp_id（排好序）。"""
+    ids = np.unique(np.asarray(ids, dtype=np.int64))
+    return _write(pd.DataFrame({ID_COL: ids}), MEMBERS_PARQUET, MEMBERS_CSV)
+
+
+def read_cube(dims=None) -> pd.DataFrame:
+    """
+    读取立方体；dims 给出时只读这一个 grouping set（Parquet 按 grouping_id 过滤）。
+    """
+    filters = None if dims is None else [("grouping_id", "==", grouping_id(dims))]
+    return _read(CUBE_PARQUET, CUBE_CSV, {d: "category" for d in DIMS}, filters)
+
+
+def read_item_cube(dims=None) -> pd.DataFrame:
+    """读取量表立方体；dims 为 ITEM_DIMS 的子集时只读这一个 grouping set。"""
+    filters = None if dims is None else [("grouping_id", "==", grouping_id(dims, ITEM_DIMS))]
+    return _read(ITEM_CUBE_PARQUET, ITEM_CUBE_CSV, {d: "category" for d in ITEM_DIMS}, filters)
+
+
+def read_members() -> np.ndarray:
+    return _read(MEMBERS_PARQUET, MEMBERS_CSV)[ID_COL].to_numpy(dtype=np.int64)
+
+
+def cube_slice(cube: pd.DataFrame, dims, **filters) -> pd.DataFrame:
+    """
+    查一个切片：按 dims 分组的 high_stress_count / total_count / high_stress_percent。
+    filters 是固定取值的维度（如 degree_label="Doctorate"），这些维度同样参与分组，
+    但不出现在结果列里。
+    """
+    dims = list(dims)
+    gid = grouping_id(dims + [d for d in filters if d not in dims])
+    sub = cube[cube["grouping_id"] == gid]
+    for d, value in filters.items():
+        sub = sub[sub[d] == value]
+    cols = dims + ["high_stress_count", "total_count", "high_stress_percent"]
+    cols += [c for c in CUBE_CI if c in sub.columns]
+    out = sub[cols].reset_index(drop=True)
+    for d in dims:
+        out[d] = out[d].astype(object)
+    return out
+
+
+# ---------- 分批追加 ----------
+
+def append_wave(persons: pd.DataFrame, fact: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    把新一批受访者并进已有的两个立方体并写回，返回 (高压组立方体, 量表立方体)。
+    persons：这一批的人级表（resp_id、DIMS、high_stress_group）；fact：这一批的窄事实表。
+    resp_id 已经计入过立方体时报错（同一批不能追加两次）。
+    """
+    members = read_members()
+    ids = persons[ID_COL].to_numpy(dtype=np.int64)
+    if len(np.unique(ids)) != len(ids):
+        raise ValueError("这一批受访者的 resp_id 有重复。")
+    pos = np.searchsorted(members, ids)
+    seen = (pos < len(members)) & (members[np.minimum(pos, len(members) - 1)] == ids) if len(members) else np.zeros(len(ids), bool)
+    if seen.any():
+        raise ValueError(f"有 {int(seen.sum())} 个 resp_id 已经计入立方体（前几个：{ids[seen][:5].tolist()}），"
+                         "不能重复追加。")
+
+    cube = merge_cubes(read_cube(), build_cube(persons))
+    item_cube = merge_cubes(read_item_cube(), build_item_cube(fact, persons), item=True)
+    write_cube(cube)
+    write_item_cube(item_cube)
+    write_members(np.concatenate([members, ids]))
+    return cube, item_cube
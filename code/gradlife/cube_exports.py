@@ -0,0 +1,140 @@
+"""
+cube_exports.py
+
+从两个立方体（gradlife.cube）直接查出 viz_* 导出表，列、行顺序和数值与原来的导出脚本相同
+（35 的百分比是从 region_vs_high_stress.csv 读回来的，最后一位可能差 1 ulp，其余逐字节相同）：
+
+- viz_region_high_stress.csv                    （35）
+- viz_country_high_stress.csv                   （37）
+- satisfaction_by_stress / _deg_region          （94、95，分析用和可视化用各一份）
+- support_by_stress / _deg_region               （96、98，同上）
+
+全量构建时这些表仍由原来的编号脚本生成；新一批受访者追加进立方体后
+（93_append_wave_to_cubes.py），用 write_exports 从合并后的立方体重新写出，
+用时只和格子数有关，与受访者总数无关。
+
+学位（22，用 codebook 的完整学位名）、工时（47，组内百分比的方向不同）、支持象限（45，
+从 typed_clean 重新分档）以及各编码题的交叉表不在立方体的维度里，追加后仍需全量重跑。
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+from gradlife.cube import ITEM_DIMS, STRESS_COL, cube_slice, grouping_id, item_stats
+from gradlife.long_tables import SATISFACTION, SUPPORT
+
+OUTPUT_DIR = Path("/workspace/output")
+VIZ_DIR = OUTPUT_DIR / "08_viz_data"
+SAT_DIR = OUTPUT_DIR / "11_satisfaction_master"
+SUP_DIR = OUTPUT_DIR / "12_support_master"
+
+STRESS_LABELS = {0: "Non-high-stress", 1: "High-stress"}
+ITEM_TEXT_COLS = ["item_code", "q_no", "scale_group", "item_text", "item_short"]
+SAT_RENAME = {"item_code": "aspect_code", "item_text": "aspect_text", "item_short": "aspect_short"}
+
+
+def region_viz(cube: pd.DataFrame) -> pd.DataFrame:
+    """大洲 × 高压的宽表（35_region_for_viz 的格式），按总人数降序。"""
+    s = cube_slice(cube, ["region_continent"])
+    out = pd.DataFrame({
+        "region_continent": s["region_continent"],
+        "high_stress_count": s["high_stress_count"].astype(int),
+        "high_stress_percent": s["high_stress_count"] / s["total_count"] * 100,
+        "non_high_stress_count": (s["total_count"] - s["high_stress_count"]).astype(int),
+        "non_high_stress_percent": (s["total_count"] - s["high_stress_count"]) / s["total_count"] * 100,
+        "total_count": s["total_count"].astype(int),
+    })
+    return out.sort_values("total_count", ascending=False).reset_index(drop=True)
+
+
+def country_viz(cube: pd.DataFrame) -> pd.DataFrame:
+    """国家 × 高压的宽表（37_country_high_stress_for_viz 的格式），先按大洲、再按总人数降序。"""
+    s = cube_slice(cube, ["region_continent", "country_name"])
+    high = s["high_stress_count"].astype(float)
+    low = (s["total_count"] - s["high_stress_count"]).astype(float)
+    total = (high + low).astype(int)
+    out = pd.DataFrame({
+        "region_continent": s["region_continent"],
+        "country_name": s["country_name"],
+        "high_stress_count": high,
+        "high_stress_percent": high / total * 100,
+        "non_high_stress_count": low,
+        "non_high_stress_percent": low / total * 100,
+        "total_count": total,
+    })
+    return out.sort_values(by=["region_continent", "total_count"], ascending=[True, False]).reset_index(drop=True)
+
+
+def likert_by_stress(item_cube: pd.DataFrame, items: pd.DataFrame, prefixes, by=()) -> pd.DataFrame:
+    """
+    题号前缀属于 prefixes 的条目 × by × 高压组的 n / mean_score，
+    列为 item_code, q_no, scale_group, item_text, item_short, *by, high_stress_group, high_stress_label, n, mean_score。
+    """
+    by = list(by)
+    sub = item_cube[item_cube["grouping_id"] == grouping_id(by, ITEM_DIMS)]
+    its = items[items["scale_group"].isin(list(prefixes))]
+    sub = item_stats(sub[sub["item_id"].isin(its["item_id"])])
+
+    pos = pd.Index(its["item_id"]).get_indexer(sub["item_id"])
+    out = {c: its[c].to_numpy()[pos] for c in ITEM_TEXT_COLS}
+    for d in by:
+        out[d] = sub[d].astype(object).to_numpy()
+    out[STRESS_COL] = sub[STRESS_COL].astype("Int64").to_numpy()
+    out["high_stress_label"] = sub[STRESS_COL].map(STRESS_LABELS).to_numpy()
+    out["n"] = sub["n"].astype("int64").to_numpy()
+    out["mean_score"] = sub["mean_score"].to_numpy()
+    return pd.DataFrame(out)
+
+
+def satisfaction_by_stress(item_cube, items, by=()) -> pd.DataFrame:
+    """94 / 95 的格式：aspect_* 列名，按 q_no 排出 aspect_order。"""
+    by = list(by)
+    agg = likert_by_stress(item_cube, items, SATISFACTION, by).drop(columns="scale_group").rename(columns=SAT_RENAME)
+    order = agg[["aspect_code", "q_no"]].drop_duplicates().sort_values("q_no").reset_index(drop=True)
+    order["aspect_order"] = range(len(order))
+    agg = agg.merge(order[["aspect_code", "aspect_order"]], on="aspect_code", how="left")
+    return agg.sort_values(["aspect_order"] + by + [STRESS_COL])
+
+
+def support_by_stress(item_cube, items, by=()) -> pd.DataFrame:
+    """96 / 98 的格式：按 scale_group + q_no 排出 item_order。"""
+    by = list(by)
+    agg = likert_by_stress(item_cube, items, SUPPORT, by)
+    order = (agg[["item_code", "scale_group", "q_no"]].drop_duplicates()
+             .sort_values(["scale_group", "q_no"]).reset_index(drop=True))
+    order["item_order"] = range(len(order))
+    agg = agg.merge(order[["item_code", "item_order"]], on="item_code", how="left")
+    return agg.sort_values(["scale_group", "item_order"] + by + [STRESS_COL])
+
+
+def build_exports(cube: pd.DataFrame, item_cube: pd.DataFrame, items: pd.DataFrame) -> dict:
+    """{输出路径: (DataFrame, to_csv 的额外参数)}。"""
+    sat = satisfaction_by_stress(item_cube, items)
+    sat_dr = satisfaction_by_stress(item_cube, items, ITEM_DIMS)
+    sup = support_by_stress(item_cube, items)
+    sup_dr = support_by_stress(item_cube, items, ITEM_DIMS)
+    return {
+        VIZ_DIR / "viz_region_high_stress.csv": (region_viz(cube), {}),
+        VIZ_DIR / "viz_country_high_stress.csv": (country_viz(cube), {"encoding": "utf-8-sig"}),
+        SAT_DIR / "satisfaction_by_stress.csv": (sat, {}),
+        VIZ_DIR / "viz_satisfaction_by_stress.csv": (sat, {}),
+        SAT_DIR / "satisfaction_by_stress_deg_region.csv": (sat_dr, {}),
+        VIZ_DIR / "viz_satisfaction_by_stress_deg_region.csv": (sat_dr, {}),
+        SUP_DIR / "support_by_stress.csv": (sup, {}),
+        VIZ_DIR / "viz_support_by_stress.csv": (sup, {}),
+        SUP_DIR / "support_by_stress_deg_region.csv": (sup_dr, {}),
+        VIZ_DIR / "viz_support_by_stress_deg_region.csv": (sup_dr, {}),
+    }
+
+
+def write_exports(cube: pd.DataFrame, item_cube: pd.DataFrame, items: pd.DataFrame) -> list[Path]:
+    """从立方体重新写出上面这些导出表，返回写出的路径。"""
+    written = []
+    for path, (df, kwargs) in build_exports(cube, item_cube, items).items():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(path, index=False, **kwargs)
+        written.append(path)
+    return written
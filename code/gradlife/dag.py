@@ -0,0 +1,689 @@
+"""
+dag.py
+
+编号脚本的依赖图 + 增量重建。
+
+每个步骤（Step）声明自己读哪些文件、写哪些文件（gradlife.steps.STEPS）。这里：
+- 把每个输入解析到“写它的那个步骤”，得到依赖图并做拓扑排序；
+- 每个步骤的指纹 = 脚本代码哈希（含它 import 的 gradlife 模块）+ 各输入文件的内容哈希；
+- 指纹没变、输出文件也没被删改 → 跳过；否则重跑，再记录输出的内容哈希；
+- 输出内容没变（比如 metadata 改了一个标签，但某张表根本不用它），
+  下游的指纹也就不变，不会继续往下重跑（early cutoff）。
+
+状态存在 /workspace/output/.pipeline_state.json。
+
+run(jobs=N) 并行：上游都完成的步骤立即开始，最多同时运行 N 个脚本（每个脚本是独立进程，
+不受 GIL 影响）；跳过 / 重跑的判断和状态记录都在主线程里做。
+
+run(in_process=True) 是 session 模式：所有脚本在当前进程里顺序运行（runpy），
+typed_clean / metadata / 派生变量表只从磁盘解析一次（见 gradlife.session）。
+
+输出缓存（见 gradlife.artifacts）：输出文件按内容哈希另存一份到 output/.artifacts/，
+原位置仍是普通文件。要重跑的步骤如果（代码, 输入）和以前某次一模一样，直接把当时的输出复制回来，
+不再运行脚本（“♻ 缓存”）；每个步骤保留最近 MAX_BUILDS 次构建，其余对象在运行结束时清理。
+
+每次（非 dry-run）运行结束后写一份运行清单：每个步骤的用时、CPU、峰值内存、
+输入输出的行列数和字节数（见 gradlife.manifest）。
+
+原地改写的文件（master_person_wide 被 90 → 92 → 97 依次改写）：
+- 92 / 97 读的是上一个写它的步骤的版本，其他步骤读最后一版；
+- 链上任何一步要重跑时，磁盘上已经是最后一版了，所以会连同它前面的写入步骤一起重跑，
+  保证它读到的是正确的中间版本；
+- 前面的步骤重写了文件后，后面的写入步骤因为“输出被改动”也会重跑。
+
+    from gradlife.dag import Pipeline
+    from gradlife.steps import STEPS
+    Pipeline(STEPS).run()
+"""
+
+from __future__ import annotations
+
+import contextlib
+import heapq
+import json
+import os
+import re
+import runpy
+import subprocess
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from gradlife import session, tracking
+from gradlife.artifacts import ArtifactStore
+from gradlife.hashing import combine_hashes, file_sha256, json_sha256
+from gradlife.manifest import RunManifest, file_shape
+
+try:
+    import resource
+except ImportError:                     # Windows 没有 resource 模块
+    resource = None
+
+WORKSPACE = Path("/workspace")
+CODE_DIR = Path(__file__).resolve().parent.parent
+STATE_PATH = WORKSPACE / "output" / ".pipeline_state.json"
+LOG_DIR = WORKSPACE / "output" / ".pipeline_logs"
+ARTIFACT_DIR = WORKSPACE / "output" / ".artifacts"
+STATE_VERSION = 1
+MAX_BUILDS = 3                          # 每个步骤在缓存里保留最近几次构建的输出
+
+_GRADLIFE_IMPORT_RE = re.compile(r"^\s*(?:from|import)\s+gradlife\.(\w+)", re.M)
+
+
+class Step:
+    """
+    一个编号脚本：name 默认就是脚本文件名（不含 .py），路径都相对于 /workspace。
+    几个步骤共用一个脚本时（如 gradlife.topics 的各个话题），用 script 指定脚本、args 给出命令行参数。
+    """
+
+    def __init__(self, name: str, inputs=(), outputs=(), script: str | None = None, args=()):
+        self.name = name
+        self.script = script or f"{name}.py"
+        self.args = [str(a) for a in args]
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+
+    def __repr__(self):
+        return f"Step({self.name!r})"
+
+
+# ---------- 哈希 ----------
+
+def stat_signature(path: Path):
+    """文件：[大小, 修改时间]；目录：每个文件的 [相对路径, 大小, 修改时间]；不存在：None。"""
+    if path.is_file():
+        st = path.stat()
+        return [st.st_size, st.st_mtime_ns]
+    if path.is_dir():
+        sig = []
+        for p in sorted(path.rglob("*")):
+            if p.is_file():
+                st = p.stat()
+                sig.append([str(p.relative_to(path)), st.st_size, st.st_mtime_ns])
+        return sig
+    return None
+
+
+def path_sha256(path: Path):
+    """文件按内容哈希；目录按（相对路径, 内容哈希）整体哈希；不存在返回 None。"""
+    if path.is_file():
+        return file_sha256(path)
+    if path.is_dir():
+        parts = []
+        for p in sorted(path.rglob("*")):
+            if p.is_file():
+                parts += [str(p.relative_to(path)), file_sha256(p)]
+        return combine_hashes("dir", *parts)
+    return None
+
+
+def code_sha256(script: Path, code_dir: Path = CODE_DIR) -> str:
+    """脚本本身 + 它（递归）import 的 gradlife 模块的源码哈希。"""
+    seen, todo, parts = set(), [script], []
+    while todo:
+        path = todo.pop()
+        if path in seen or not path.exists():
+            continue
+        seen.add(path)
+        text = path.read_text(encoding="utf-8")
+        parts += [str(path.relative_to(code_dir)), file_sha256(path)]
+        for mod in _GRADLIFE_IMPORT_RE.findall(text):
+            todo.append(code_dir / "gradlife" / f"{mod}.py")
+    return combine_hashes(*sorted(parts))
+
+
+def _maxrss_mb(maxrss: int) -> float:
+    """ru_maxrss 在 Linux 上是 KB，在 macOS 上是字节。"""
+    return round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# ---------- 依赖图 ----------
+
+class Pipeline:
+    def __init__(self, steps, workspace: Path = WORKSPACE, code_dir: Path = CODE_DIR,
+                 state_path: Path = STATE_PATH, log_dir: Path = LOG_DIR,
+                 artifact_dir: Path = ARTIFACT_DIR, cache: bool = True,
+                 column_hashers: dict | None = None):
+        self.steps = {s.name: s for s in steps}
+        if len(self.steps) != len(steps):
+            raise ValueError("步骤名称有重复。")
+        self.workspace = Path(workspace)
+        self.code_dir = Path(code_dir)
+        self.state_path = Path(state_path)
+        self.log_dir = Path(log_dir)
+
+        self.producer = {}                     # {(步骤, 输入路径): 写它的步骤 或 None（源文件）}
+        self.writers = {}                      # {输出路径: [写它的步骤，按声明顺序]}
+        self.deps = {s.name: set() for s in steps}
+        self._resolve(steps)
+        self.order = self._toposort(steps)
+        self.state = self._load_state()
+        self._shape_cache = {}                 # {路径: (文件签名, file_shape 结果)}
+        # 列级依赖：{文件: 逐列哈希函数}；步骤读过哪些列记在 state["reads"] 里
+        self.column_hashers = dict(column_hashers or {})
+        self.reads = self.state.setdefault("reads", {})
+
+        # {"objects": {对象名: 签名}, "builds": {步骤: [{"key", "outputs": {路径: 对象名}}, ...]}}
+        artifacts = self.state.setdefault("artifacts", {"objects": {}, "builds": {}})
+        self.cache = cache
+        self.store = ArtifactStore(artifact_dir, artifacts["objects"])
+        self.builds = artifacts["builds"]
+
+    def _resolve(self, steps):
+        writers = self.writers
+        for s in steps:
+            for p in s.outputs:
+                writers.setdefault(p, []).append(s.name)
+        index = {s.name: i for i, s in enumerate(steps)}
+
+        for s in steps:
+            for p in s.inputs:
+                ws = writers.get(p, [])
+                if p in s.outputs:
+                    # 原地改写：读上一个写它的步骤的版本
+                    earlier = [w for w in ws if index[w] < index[s.name]]
+                    prod = earlier[-1] if earlier else None
+                else:
+                    prod = ws[-1] if ws else None
+                self.producer[(s.name, p)] = prod
+                if prod is not None:
+                    self.deps[s.name].add(prod)
+            # 同一文件的多个写入步骤按声明顺序排队
+            for p in s.outputs:
+                earlier = [w for w in writers[p] if index[w] < index[s.name]]
+                if earlier:
+                    self.deps[s.name].add(earlier[-1])
+
+    def _toposort(self, steps):
+        index = {s.name: i for i, s in enumerate(steps)}
+        children = {name: [] for name in self.deps}
+        indegree = {name: len(d) for name, d in self.deps.items()}
+        for name, d in self.deps.items():
+            for dep in d:
+                children[dep].append(name)
+
+        heap = [(index[n], n) for n, k in indegree.items() if k == 0]
+        heapq.heapify(heap)
+        order = []
+        while heap:
+            _, name = heapq.heappop(heap)
+            order.append(name)
+            for child in children[name]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    heapq.heappush(heap, (index[child], child))
+        if len(order) != len(self.deps):
+            cycle = sorted(n for n, k in indegree.items() if k > 0)
+            raise ValueError(f"步骤之间存在循环依赖：{cycle}")
+        return order
+
+    def upstream(self, names) -> set:
+        """names 及其所有上游步骤。"""
+        out, todo = set(), list(names)
+        while todo:
+            name = todo.pop()
+            if name not in out:
+                out.add(name)
+                todo.extend(self.deps[name])
+        return out
+
+    def downstream(self, names) -> set:
+        """names 及其所有下游步骤。"""
+        out = set(names)
+        for name in self.order:
+            if self.deps[name] & out:
+                out.add(name)
+        return out
+
+    def match(self, prefixes) -> list[str]:
+        """按名称前缀（如 "05"、"44_mental"）找步骤；找不到时抛 KeyError。"""
+        names = []
+        for prefix in prefixes:
+            hits = [n for n in self.order if n.startswith(prefix)]
+            if not hits:
+                raise KeyError(f"没有以 {prefix!r} 开头的步骤。")
+            names += hits
+        return list(dict.fromkeys(names))
+
+    # ---------- 状态 ----------
+
+    def _load_state(self) -> dict:
+        if self.state_path.exists():
+            try:
+                state = json.loads(self.state_path.read_text(encoding="utf-8"))
+                if state.get("version") == STATE_VERSION:
+                    return state
+            except (OSError, ValueError) as e:
+                print(f"⚠️ 读取 {self.state_path} 失败，将视为全部未运行：{e}")
+        return {"version": STATE_VERSION, "steps": {}, "sources": {}}
+
+    def save_state(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, indent=1, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    def _abs(self, rel: str) -> Path:
+        return self.workspace / rel
+
+    def _source_sha(self, rel: str):
+        """源文件（没有步骤写它）的内容哈希；大小和修改时间没变就用上次算好的。"""
+        path = self._abs(rel)
+        sig = stat_signature(path)
+        if sig is None:
+            return None
+        cached = self.state["sources"].get(rel)
+        if cached and cached["sig"] == sig:
+            return cached["sha256"]
+        sha = path_sha256(path)
+        self.state["sources"][rel] = {"sig": sig, "sha256": sha}
+        return sha
+
+    def _shape(self, rel: str, producer=None):
+        """运行清单用的行列数 / 字节数：优先用写它的步骤记录下的版本，否则看磁盘上的文件。"""
+        rec = self._recorded_output(producer, rel) if producer else None
+        if rec is not None and "shape" in rec:
+            return rec["shape"]
+        path = self._abs(rel)
+        sig = stat_signature(path)
+        hit = self._shape_cache.get(rel)
+        if hit is None or hit[0] != sig:
+            hit = self._shape_cache[rel] = (sig, file_shape(path))
+        return hit[1]
+
+    def _manifest_entry(self, manifest: RunManifest, name: str, status: str,
+                        reason=None, usage=None):
+        step = self.steps[name]
+        inputs = {rel: self._shape(rel, self.producer[(name, rel)]) for rel in step.inputs}
+        outputs = {rel: self._shape(rel, name) for rel in step.outputs}
+        manifest.add_step(name, status, reason, usage, inputs, outputs)
+
+    def _recorded_output(self, name: str, rel: str):
+        return self.state["steps"].get(name, {}).get("outputs", {}).get(rel)
+
+    def _output_intact(self, name: str, rel: str) -> bool:
+        """磁盘上的输出是否还是该步骤上次写出的内容。"""
+        rec = self._recorded_output(name, rel)
+        if rec is None:
+            return False
+        path = self._abs(rel)
+        sig = stat_signature(path)
+        if sig is None:
+            return rec["sha256"] is None
+        if sig == rec["sig"]:
+            return True
+        # 只是修改时间变了（比如被原样重写）→ 再比一次内容
+        if path_sha256(path) == rec["sha256"]:
+            rec["sig"] = sig
+            return True
+        return False
+
+    def _output_current(self, name: str, rel: str) -> bool:
+        """
+        输出是否仍然有效：磁盘上就是它写的内容，或者后面的写入步骤读走了这一版
+        （或根本不读、直接覆盖），而那一步的输出本身也有效。
+        """
+        if self._output_intact(name, rel):
+            return True
+        rec = self._recorded_output(name, rel)
+        ws = self.writers[rel]
+        later = ws[ws.index(name) + 1:]
+        if rec is None or not later:
+            return False
+        nxt = self.state["steps"].get(later[0])
+        # 后面的步骤只读了几列时，它记录的是这几列的哈希（与 input_hashes 的算法相同）
+        expected = rec["sha256"]
+        cols = self.reads.get(later[0], {}).get(rel)
+        if cols is not None and rec.get("columns") is not None:
+            expected = tracking.columns_digest(rec["columns"], cols)
+        if nxt is None or nxt["inputs"].get(rel, expected) != expected:
+            return False
+        return self._output_current(later[0], rel)
+
+    def input_hashes(self, step: Step) -> dict:
+        """
+        {输入路径: 内容哈希}；上游步骤的输出用它记录的哈希，源文件直接算。
+        有逐列哈希的输入，如果上次运行只读了其中几列，就只用这几列的哈希。
+        """
+        out = {}
+        reads = self.reads.get(step.name, {})
+        for rel in step.inputs:
+            prod = self.producer[(step.name, rel)]
+            if prod is None:
+                out[rel] = self._source_sha(rel)
+                continue
+            rec = self._recorded_output(prod, rel)
+            cols = reads.get(rel)
+            if rec and cols is not None and rec.get("columns") is not None:
+                out[rel] = tracking.columns_digest(rec["columns"], cols)
+            else:
+                out[rel] = rec["sha256"] if rec else None
+        return out
+
+    def why_run(self, step: Step, code_sha: str, inputs: dict):
+        """需要重跑时返回原因（中文短句），不需要时返回 None。"""
+        rec = self.state["steps"].get(step.name)
+        if rec is None:
+            return "从未运行"
+        if rec["code_sha"] != code_sha:
+            return "脚本代码有改动"
+        changed = [p for p in step.inputs if rec["inputs"].get(p) != inputs[p]]
+        if changed:
+            return "输入有变化：" + ", ".join(Path(p).name for p in changed)
+        broken = [p for p in step.outputs if not self._output_current(step.name, p)]
+        if broken:
+            return "输出缺失或被改动：" + ", ".join(Path(p).name for p in broken)
+        return None
+
+    # ---------- 运行 ----------
+
+    def _inplace_forced(self, selected: list[str], forced: set) -> set:
+        """
+        原地改写链：某个写入步骤可能要重跑，而磁盘上的文件已经不是它该读的版本
+        （被后面的步骤改写过）→ 把上一个写入步骤也加入强制重跑，递归往前。
+        """
+        may_run = set(forced)
+        for name in selected:
+            step = self.steps[name]
+            if self.deps[name] & may_run:
+                may_run.add(name)
+                continue
+            code_sha = self.code_sha(step)
+            if self.why_run(step, code_sha, self.input_hashes(step)):
+                may_run.add(name)
+
+        forced = set(forced)
+        for name in reversed(self.order):
+            if name not in may_run:
+                continue
+            step = self.steps[name]
+            for rel in step.inputs:
+                prod = self.producer[(name, rel)]
+                if rel in step.outputs and prod is not None and not self._output_intact(prod, rel):
+                    forced.add(prod)
+                    may_run.add(prod)
+        return forced
+
+    def _run_script(self, step: Step):
+        """子进程运行脚本，返回 (返回码, 资源用量)；资源用量取自该子进程自己的 rusage。"""
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        log_path = self.log_dir / f"{step.name}.log"
+        env = dict(os.environ, **{tracking.ENV_VAR: str(self._access_log(step.name))})
+        t0 = time.perf_counter()
+        with open(log_path, "w", encoding="utf-8") as log:
+            proc = subprocess.Popen(
+                [sys.executable, step.script, *step.args],
+                cwd=self.code_dir, stdout=log, stderr=subprocess.STDOUT, env=env,
+            )
+            if hasattr(os, "wait4"):
+                _, status, ru = os.wait4(proc.pid, 0)
+                proc.returncode = os.waitstatus_to_exitcode(status)
+            else:                       # Windows：只有墙钟时间
+                proc.wait()
+                ru = None
+        usage = {"wall_s": round(time.perf_counter() - t0, 3)}
+        if ru is not None:
+            usage.update(cpu_user_s=round(ru.ru_utime, 3), cpu_sys_s=round(ru.ru_stime, 3),
+                         peak_rss_mb=_maxrss_mb(ru.ru_maxrss))
+        return proc.returncode, usage
+
+    def _run_in_process(self, step: Step):
+        """在当前进程里以 __main__ 身份运行脚本（session 模式），返回 (返回码, 资源用量)。"""
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        log_path = self.log_dir / f"{step.name}.log"
+        old_cwd, old_argv = os.getcwd(), sys.argv
+        tracking.reset()
+        os.environ[tracking.ENV_VAR] = str(self._access_log(step.name))
+        ru0 = resource.getrusage(resource.RUSAGE_SELF) if resource else None
+        t0 = time.perf_counter()
+        with open(log_path, "w", encoding="utf-8") as log, \
+                contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            try:
+                os.chdir(self.code_dir)
+                sys.argv = [step.script, *step.args]
+                runpy.run_path(str(self.code_dir / step.script), run_name="__main__")
+                code = 0
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os.chdir(old_cwd)
+                sys.argv = old_argv
+                os.environ.pop(tracking.ENV_VAR, None)
+        usage = {"wall_s": round(time.perf_counter() - t0, 3)}
+        if ru0 is not None:
+            ru = resource.getrusage(resource.RUSAGE_SELF)
+            # 峰值内存是整个进程到目前为止的峰值，不是这个步骤单独的
+            usage.update(cpu_user_s=round(ru.ru_utime - ru0.ru_utime, 3),
+                         cpu_sys_s=round(ru.ru_stime - ru0.ru_stime, 3),
+                         peak_rss_mb=_maxrss_mb(ru.ru_maxrss))
+        return code, usage
+
+    def _access_log(self, name: str) -> Path:
+        return self.log_dir / f"{name}.access.jsonl"
+
+    def _collect_reads(self, step: Step) -> dict:
+        """
+        从访问日志整理出步骤读了有逐列哈希的输入的哪些列：{输入: 排好序的列名 或 None（整个文件）}。
+        日志里没出现的输入按读了整个文件算（可能是用别的方式读的）。
+        """
+        logged = tracking.read_log(self._access_log(step.name))
+        reads = {}
+        for rel in step.inputs:
+            if rel in self.column_hashers:
+                cols = logged.get(tracking.norm_path(self._abs(rel)))
+                reads[rel] = sorted(cols) if cols else None
+        return reads
+
+    def _record(self, step: Step, code_sha: str):
+        outputs = {}
+        for rel in step.outputs:
+            path = self._abs(rel)
+            sig = stat_signature(path)
+            if sig is None:
+                print(f"   ⚠️ 声明的输出不存在：{rel}")
+            outputs[rel] = {"sig": sig, "sha256": path_sha256(path), "shape": file_shape(path)}
+            if rel in self.column_hashers and sig is not None:
+                outputs[rel]["columns"] = self.column_hashers[rel](path)
+        self.state["steps"][step.name] = {
+            "code_sha": code_sha,
+            "inputs": self.input_hashes(step),
+            "outputs": outputs,
+            "finished_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    def code_sha(self, step: Step) -> str:
+        """步骤的代码哈希：脚本及其 import 的 gradlife 模块；有命令行参数时参数也算在内。"""
+        sha = code_sha256(self.code_dir / step.script, self.code_dir)
+        return combine_hashes(sha, *step.args) if step.args else sha
+
+    # ---------- 输出缓存 ----------
+
+    def build_key(self, step: Step, code_sha: str) -> str:
+        """一次构建的键：脚本代码哈希 + 各输入的内容哈希。"""
+        return combine_hashes(code_sha, json_sha256(self.input_hashes(step)))
+
+    def _cached_build(self, step: Step, key: str):
+        """缓存里有这个键、且所有输出对象都完好的构建；没有返回 None。"""
+        for build in self.builds.get(step.name, []):
+            if build["key"] == key:
+                outputs = build["outputs"]
+                if set(outputs) == set(step.outputs) and all(map(self.store.valid, outputs.values())):
+                    return build
+                return None
+        return None
+
+    def _remember_build(self, step: Step, key: str, outputs: dict):
+        history = [b for b in self.builds.get(step.name, []) if b["key"] != key]
+        build = {"key": key, "outputs": outputs, "reads": self.reads.get(step.name, {})}
+        self.builds[step.name] = ([build] + history)[:MAX_BUILDS]
+
+    def _restore(self, step: Step, key: str) -> bool:
+        """从缓存恢复输出（复制回原位置，不运行脚本）。"""
+        build = self._cached_build(step, key)
+        if build is None:
+            return False
+        for rel, obj in build["outputs"].items():
+            self.store.restore(self._abs(rel), obj)
+        self.reads[step.name] = build.get("reads", {})
+        self._remember_build(step, key, build["outputs"])
+        return True
+
+    def _store_outputs(self, step: Step, key: str):
+        """把步骤的输出另存一份进缓存；有目录输出或输出缺失的步骤不缓存。"""
+        if not step.outputs or not all(self._abs(rel).is_file() for rel in step.outputs):
+            return
+        outputs = {rel: self.store.put(self._abs(rel)) for rel in step.outputs}
+        self._remember_build(step, key, outputs)
+
+    def _adopt_outputs(self, step: Step, code_sha: str):
+        """跳过的步骤：如果磁盘上还是它自己写出的版本（而不是后面原地改写的版本），顺便放进缓存。"""
+        if not all(self._output_intact(step.name, rel) for rel in step.outputs):
+            return
+        key = self.build_key(step, code_sha)
+        if self._cached_build(step, key) is None:
+            self._store_outputs(step, key)
+            self._record(step, code_sha)
+
+    def prune_cache(self):
+        keep = {obj for history in self.builds.values() for b in history for obj in b["outputs"].values()}
+        removed = self.store.prune(keep)
+        if removed:
+            print(f"清理了 {removed} 个不再引用的缓存对象。")
+
+    def _decide(self, name: str, force, forced: set, upstream_dirty: set):
+        """返回 (是否运行, 原因, 代码哈希)。"""
+        step = self.steps[name]
+        code_sha = self.code_sha(step)
+        reason = self.why_run(step, code_sha, self.input_hashes(step))
+        if name in force:
+            reason = "强制重跑"
+        elif name in forced:
+            reason = reason or "原地改写链需要重建"
+        elif reason is None and self.deps[name] & upstream_dirty:
+            reason = "上游将重跑（可能有变化）"
+        return reason, code_sha
+
+    def run(self, targets=None, force=(), dry_run: bool = False, jobs: int = 1,
+            in_process: bool = False) -> bool:
+        """
+        targets：只构建这些步骤及其上游（None = 全部）；
+        force：无论指纹如何都重跑的步骤；
+        dry_run：只打印哪些步骤会重跑，不执行；
+        jobs：同时运行的脚本数（每个脚本是独立进程），上游都完成的步骤即可开始；
+        in_process：session 模式，在当前进程里顺序运行，共享内存中的表（忽略 jobs）。
+        返回是否全部成功。
+        """
+        if in_process:
+            session.activate()
+            try:
+                manifest = RunManifest("session", 1)
+                return self._run(targets, force, dry_run, 1, self._run_in_process, manifest)
+            finally:
+                session.deactivate()
+        manifest = RunManifest("subprocess", jobs)
+        return self._run(targets, force, dry_run, jobs, self._run_script, manifest)
+
+    def _run(self, targets, force, dry_run: bool, jobs: int, runner, manifest) -> bool:
+        selected = set(self.order) if targets is None else self.upstream(targets)
+        selected = [n for n in self.order if n in selected]
+        forced = self._inplace_forced(selected, set(force) & set(selected))
+        upstream_dirty = set()          # dry-run 时：上游会重跑，下游只能标“可能重跑”
+
+        pending = list(selected)
+        done, failed = set(), []
+        running = {}                    # {future: (步骤名, 代码哈希, 原因)}
+        n_run = n_skip = n_cached = 0
+        t_all = time.time()
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            while pending or running:
+                # 1) 把所有上游已完成的步骤拿出来：能跳过的直接跳过，要跑的提交
+                progressed = True
+                while progressed and not failed:
+                    progressed = False
+                    for name in list(pending):
+                        if len(running) >= max(1, jobs):
+                            break
+                        if not (self.deps[name] & set(selected)) <= done:
+                            continue
+                        pending.remove(name)
+                        progressed = True
+                        step = self.steps[name]
+                        reason, code_sha = self._decide(name, force, forced, upstream_dirty)
+                        if reason is None:
+                            n_skip += 1
+                            done.add(name)
+                            print(f"  跳过  {name}")
+                            if not dry_run:
+                                if self.cache:
+                                    self._adopt_outputs(step, code_sha)
+                                self._manifest_entry(manifest, name, "skipped")
+                            continue
+
+                        use_cache = self.cache and name not in force and not (self.deps[name] & upstream_dirty)
+                        key = self.build_key(step, code_sha) if use_cache else None
+                        if dry_run:
+                            done.add(name)
+                            if key and self._cached_build(step, key):
+                                n_cached += 1
+                                print(f"  将从缓存恢复 {name}  ← {reason}")
+                            else:
+                                n_run += 1
+                                upstream_dirty.add(name)
+                                print(f"  将运行 {name}  ← {reason}")
+                        elif key and self._restore(step, key):
+                            n_cached += 1
+                            self._record(step, code_sha)
+                            self._manifest_entry(manifest, name, "cached", reason)
+                            done.add(name)
+                            print(f"♻ 缓存  {name}  ← {reason}")
+                        else:
+                            n_run += 1
+                            print(f"▶ 运行  {name}  ← {reason}")
+                            self._access_log(name).unlink(missing_ok=True)
+                            fut = pool.submit(runner, step)
+                            running[fut] = (name, code_sha, reason)
+
+                if not running:
+                    break
+
+                # 2) 等任意一个步骤结束，记录输出哈希（状态只在主线程里改）
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    name, code_sha, reason = running.pop(fut)
+                    code, usage = fut.result()
+                    if code != 0:
+                        failed.append(name)
+                        self._manifest_entry(manifest, name, "failed", reason, usage)
+                        print(f"❌ {name} 失败（返回码 {code}），日志：{self.log_dir / (name + '.log')}")
+                        continue
+                    # 先记下这次实际读了哪些列，构建键按它计算
+                    self.reads[name] = self._collect_reads(self.steps[name])
+                    if self.cache:
+                        self._store_outputs(self.steps[name], self.build_key(self.steps[name], code_sha))
+                    self._record(self.steps[name], code_sha)
+                    self._manifest_entry(manifest, name, "ran", reason, usage)
+                    done.add(name)
+                    rss = f"，峰值内存 {usage['peak_rss_mb']:.0f} MB" if "peak_rss_mb" in usage else ""
+                    print(f"   完成 {name}，用时 {usage['wall_s']:.1f}s{rss}")
+                self.save_state()
+
+        if self.cache and not dry_run:
+            self.prune_cache()
+        self.save_state()
+        if not dry_run:
+            print(f"\n运行清单：{manifest.write()}")
+        if failed:
+            print(f"\n⚠️ 有步骤失败：{failed}；其下游步骤未运行。")
+            return False
+
+        verb = "将运行" if dry_run else "运行"
+        cached = f"，从缓存恢复 {n_cached} 个" if n_cached else ""
+        print(f"\n共 {len(selected)} 个步骤：{verb} {n_run} 个{cached}，跳过 {n_skip} 个，"
+              f"用时 {time.time() - t_all:.1f}s")
+        return True
@@ -0,0 +1,244 @@
+"""
+derive.py
+
+声明式派生变量：文本 → 分值 / 档次的映射、阈值标记、取值范围清洗、分档、标记的组合。
+
+原来 05 用手写字典 + .map，28 / 30 / 31 / 42 用逐值调用的 Python 函数
+（cat_satisfaction、clean_likert_1_to_7、map_change_category ……）一行一行地算。
+现在每个派生变量是一条规格（见 gradlife.derived_vars），derive() 把它们编译成
+对编码数组的 NumPy 运算，一次算出所有需要的变量：
+
+- 文本列先 factorize 成整数编码，映射只对每个不同的取值做一次，再按编码 take；
+- 数值编码用查找表（下标即编码）；
+- 阈值 / 分档 / 组合都是整列的布尔运算。
+
+    from gradlife.derive import derive
+    from gradlife.derived_vars import SPECS
+    out = derive(df, SPECS, targets=["high_stress_group", "worklife_score"])
+
+规格之间可以互相引用（如 high_stress_group 依赖 high_hours、low_worklife），
+derive 只计算 targets 及其依赖。输出类型：分值 / 清洗后的数值为 float64（缺失为 NaN），
+标签为 category（类别按字母序排，groupby 的顺序与字符串列一致），0/1 标记为 int8（缺失视为 0）。
+"""
+
+from __future__ import annotations
+
+import operator
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+_OPS = {
+    "<=": operator.le,
+    "<": operator.lt,
+    ">=": operator.ge,
+    ">": operator.gt,
+    "==": operator.eq,
+}
+
+
+def _as_float(values) -> np.ndarray:
+    if isinstance(values, pd.Categorical):
+        values = np.asarray(values, dtype=object)
+    if isinstance(values, np.ndarray) and values.dtype.kind in "biuf":
+        return values.astype("float64", copy=False)
+    return pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _as_categorical(values) -> pd.Categorical:
+    """文本列 → Categorical（已经是 category 的列直接用它的编码，不再逐行处理字符串）。"""
+    if isinstance(values, pd.Categorical):
+        return values
+    return pd.Categorical(pd.Series(values, dtype="object"))
+
+
+def _from_index(idx: np.ndarray, labels: list) -> pd.Categorical:
+    """
+    idx 为每行在 labels 中的下标（-1 = 缺失）→ Categorical。
+    类别按字母序排，groupby / sort 的顺序与普通字符串列一致。
+    """
+    cats = sorted(set(labels))
+    remap = np.array([cats.index(label) for label in labels] + [-1], dtype=np.int64)
+    return pd.Categorical.from_codes(remap[idx], categories=cats)
+
+
+class Derived(ABC):
+    """一条派生变量规格：name 由 sources（原始列或其他派生变量）算出。子类实现 evaluate。"""
+
+    kind = "numeric"          # numeric / label / flag，决定输出类型
+
+    def __init__(self, name: str, sources):
+        self.name = name
+        self.sources = [sources] if isinstance(sources, str) else list(sources)
+
+    @abstractmethod
+    def evaluate(self, values: dict):
+        """values：{列名或派生变量名: 整列取值} → 本变量的整列结果。"""
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r} ← {', '.join(self.sources)})"
+
+
+class TextMap(Derived):
+    """文本取值 → 分值或标签（字典里没有的取值 → 缺失）。strip=True 先去掉首尾空格。"""
+
+    def __init__(self, name: str, source: str, mapping: dict, strip: bool = False):
+        super().__init__(name, source)
+        self.mapping = dict(mapping)
+        self.strip = strip
+        numeric = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in self.mapping.values())
+        self.kind = "numeric" if numeric else "label"
+
+    def evaluate(self, values):
+        cat = _as_categorical(values[self.sources[0]])
+        keys = [str(c).strip() if self.strip else c for c in cat.categories]
+        codes = np.asarray(cat.codes, dtype=np.int64)      # -1 = 缺失
+        if self.kind == "numeric":
+            lut = np.array([self.mapping.get(k, np.nan) for k in keys] + [np.nan], dtype="float64")
+            return lut[codes]
+        labels = list(dict.fromkeys(v for v in self.mapping.values()))
+        lut = np.array([labels.index(self.mapping[k]) if k in self.mapping else -1 for k in keys] + [-1])
+        return _from_index(lut[codes], labels)
+
+
+class CodeMap(Derived):
+    """整数编码 → 标签（查找表，下标即编码）；不在字典里的编码 / 非数值 → 缺失。"""
+
+    kind = "label"
+
+    def __init__(self, name: str, source: str, mapping: dict):
+        super().__init__(name, source)
+        self.mapping = {int(k): v for k, v in mapping.items()}
+
+    def evaluate(self, values):
+        v = _as_float(values[self.sources[0]])
+        labels = list(dict.fromkeys(self.mapping.values()))
+        lut = np.full(max(self.mapping) + 2, -1, dtype=np.int64)   # 最后一格给越界 / 缺失
+        for code, label in self.mapping.items():
+            lut[code] = labels.index(label)
+        valid = ~np.isnan(v)
+        codes = np.full(len(v), len(lut) - 1, dtype=np.int64)
+        codes[valid] = np.trunc(v[valid])
+        codes[(codes < 0) | (codes >= len(lut))] = len(lut) - 1
+        return _from_index(lut[codes], labels)
+
+
+class InRange(Derived):
+    """只保留 lo ≤ 值 ≤ hi 的数值，其他（含 8 = Not applicable 之类的编码）→ 缺失。"""
+
+    def __init__(self, name: str, source: str, lo: float, hi: float):
+        super().__init__(name, source)
+        self.lo, self.hi = lo, hi
+
+    def evaluate(self, values):
+        v = _as_float(values[self.sources[0]])
+        return np.where((v >= self.lo) & (v <= self.hi), v, np.nan)
+
+
+class Bands(Derived):
+    """
+    数值分档：按顺序检查 rules 中的 (比较符, 阈值, 标签)，第一个满足的给出标签；
+    都不满足的非缺失值给 default；缺失值保持缺失。
+    """
+
+    kind = "label"
+
+    def __init__(self, name: str, source: str, rules, default=None):
+        super().__init__(name, source)
+        self.rules = [(op, value, label) for op, value, label in rules]
+        self.default = default
+
+    def evaluate(self, values):
+        v = _as_float(values[self.sources[0]])
+        labels = [label for _, _, label in self.rules]
+        if self.default is not None:
+            labels.append(self.default)
+        idx = np.full(len(v), -1, dtype=np.int64)
+        valid = ~np.isnan(v)
+        if self.default is not None:
+            idx[valid] = len(labels) - 1
+        for i, (op, value, _) in reversed(list(enumerate(self.rules))):   # 倒着覆盖 = 第一个满足的优先
+            idx[_OPS[op](v, value) & valid] = i
+        return _from_index(idx, labels)
+
+
+class Flag(Derived):
+    """0/1 标记：值满足 op value（op 为比较符或 "in"）为 1，其他（含缺失）为 0。"""
+
+    kind = "flag"
+
+    def __init__(self, name: str, source: str, op: str, value):
+        super().__init__(name, source)
+        if op != "in" and op not in _OPS:
+            raise ValueError(f"不支持的比较符：{op}")
+        self.op, self.value = op, value
+
+    def evaluate(self, values):
+        if self.op == "in":
+            cat = _as_categorical(values[self.sources[0]])
+            lut = np.append(cat.categories.isin(list(self.value)), False)
+            hit = lut[np.asarray(cat.codes, dtype=np.int64)]
+        else:
+            v = _as_float(values[self.sources[0]])
+            hit = _OPS[self.op](v, self.value) & ~np.isnan(v)
+        return hit.astype("int8")
+
+
+class AllOf(Derived):
+    """几个 0/1 标记同时为 1 → 1，否则 0。"""
+
+    kind = "flag"
+
+    def evaluate(self, values):
+        hit = np.ones(len(values[self.sources[0]]), dtype=bool)
+        for src in self.sources:
+            hit &= _as_float(values[src]) == 1
+        return hit.astype("int8")
+
+
+def _plan(specs, targets) -> list:
+    """targets 及其依赖，按规格列表中的顺序排好（依赖必须写在前面）。"""
+    by_name = {s.name: s for s in specs}
+    if targets is None:
+        return list(specs)
+    unknown = [t for t in targets if t not in by_name]
+    if unknown:
+        raise KeyError(f"没有这些派生变量的规格：{unknown}")
+    needed, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name in needed:
+            continue
+        needed.add(name)
+        todo += [src for src in by_name[name].sources if src in by_name]
+    return [s for s in specs if s.name in needed]
+
+
+def derive(df: pd.DataFrame, specs, targets=None) -> pd.DataFrame:
+    """
+    一次算出 targets（默认全部规格）及其依赖，返回只含派生列的 DataFrame（index 与 df 相同）。
+    原始列只取一次数组；派生列按规格顺序依次计算，后面的规格直接用前面算好的数组。
+    """
+    plan = _plan(specs, targets)
+    produced = {s.name for s in plan}
+    raw = sorted({src for s in plan for src in s.sources if src not in produced})
+    missing = [c for c in raw if c not in df.columns]
+    if missing:
+        raise KeyError(f"计算派生变量需要这些列，但数据中没有：{missing}")
+
+    values = {}
+    for c in raw:
+        s = df[c]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            values[c] = s.array                     # 直接用类别编码
+        elif pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            values[c] = s.to_numpy(dtype="float64", na_value=np.nan)
+        else:
+            values[c] = s.to_numpy(dtype=object)
+    out = {}
+    for spec in plan:
+        out[spec.name] = values[spec.name] = spec.evaluate(values)
+
+    keep = plan if targets is None else [s for s in plan if s.name in set(targets)]
+    return pd.DataFrame({s.name: out[s.name] for s in keep}, index=df.index)
@@ -0,0 +1,126 @@
+"""
+derived_vars.py
+
+派生变量的规格（由 gradlife.derive 编译执行）。改映射 / 阈值只需改这里，
+引用这些变量的脚本（05、28、30、31、42）会因为代码哈希变化自动重跑。
+
+- 学位（90、新一批受访者追加时）：v004_code → degree_label
+- 大洲 / 国家（34、97）：v031–v036 → region_continent / country_name
+- 工时 / work-life / 高压组（05）：hours_level → high_hours，worklife_score → low_worklife，
+  两者同时成立 → high_stress_group
+- Q23 / Q25 满意度（28）：原始文本 → 1–7 分 → 低 / 中立 / 高 三档
+- 支持 / 关系题（30、31）：*_num 只保留 1–7 → 低 / 中立 / 高 三档
+- Q26 满意度变化（42）：v073_code → Worsened / Stayed the same / Improved
+"""
+
+from __future__ import annotations
+
+from gradlife.derive import AllOf, Bands, CodeMap, Flag, InRange, TextMap
+
+# ======== 学位 ========
+DEGREE_CODE_COL = "v004_code"
+DEGREE_LABELS = {
+    1: "Doctorate",
+    2: "Master's",
+    3: "Dual degree",
+}
+
+# ======== 大洲 / 国家 ========
+# 各大洲的国家题（34、97）：答了哪一题就在哪个大洲（多题都答时后面的优先，与 34 相同），
+# 国家名取从左到右第一个非空的回答（与 37、97 相同）
+COUNTRY_REGIONS = {
+    "v031": "Asia",
+    "v032": "Australasia",
+    "v033": "Africa",
+    "v034": "Europe",
+    "v035": "North/Central America",
+    "v036": "South America",
+}
+COUNTRY_COLS = list(COUNTRY_REGIONS)
+
+# ======== 工时 / work-life / 高压组 ========
+# 原始工时选项文本所在列（没有 _code 的那一列）
+HOURS_TEXT_COL = "v089"          # Q29 原始回答文本
+# 工作–生活平衡满意度：原始文本所在列（注意：不是 _num）
+WORKLIFE_TEXT_COL = "v084"       # Q27.k 原始回答文本
+
+# 这里的 key 一定要和 v089 的原始文本完全一致（注意大小写和空格）
+HOURS_TEXT_TO_LEVEL = {
+    "Less than 11 hours": "low",
+    "11-20 hours": "low",
+    "21-30 hours": "medium",
+    "31-40 hours": "medium",
+    "41-50 hours": "high",
+    "51-60 hours": "high",
+    "61-70 hours": "very_high",
+    "71-80 hours": "very_high",
+    "More than 80 hours": "very_high",
+}
+
+HIGH_LEVELS = {"high", "very_high"}
+
+# 下面的 key 必须和 v084 原始值一模一样
+WORKLIFE_TEXT_TO_SCORE = {
+    "1 = Not at all satisfied": 1,
+    "2": 2,
+    "3": 3,
+    "4 = Neither satisfied not dissatisfied": 4,
+    "5": 5,
+    "6": 6,
+    "7 = Extremely satisfied": 7,
+    # "Not applicable" 不在字典里 → 缺失
+}
+
+LOW_WORKLIFE_THRESHOLD = 3  # 1/2/3 视为“低工作生活平衡”
+
+# ======== Q23.a / Q25.a 满意度 ========
+SATISFACTION_TEXT_TO_SCORE = {
+    "1 = Not at all satisfied": 1,
+    "2": 2,
+    "3": 3,
+    "4 = Neither satisfied nor dissatisfied": 4,
+    "5": 5,
+    "6": 6,
+    "7 = Extremely satisfied": 7,
+}
+
+SATISFACTION_BANDS = [("<=", 3, "Low satisfaction (1–3)"), ("==", 4, "Neutral (4)")]
+SATISFACTION_HIGH = "High satisfaction (5–7)"
+
+# ======== 支持 / 关系题 ========
+SUPPORT_NUM = ["v079_num", "v091_num", "v097_num", "v100_num", "v101_num"]
+SUPPORT_BANDS = [("<=", 3, "Low support (1–3)"), ("==", 4, "Neutral (4)")]
+SUPPORT_HIGH = "High support (5–7)"
+
+# ======== Q26 满意度变化 ========
+# 1 = Worsened a little, 2 = Improved slightly, 3 = Significantly worsened,
+# 4 = Stayed the same, 5 = Improved greatly
+SAT_CHANGE_CODES = {
+    1: "Worsened",
+    3: "Worsened",
+    4: "Stayed the same",
+    2: "Improved",
+    5: "Improved",
+}
+
+SPECS = [
+    CodeMap("degree_label", DEGREE_CODE_COL, DEGREE_LABELS),
+
+    TextMap("hours_level", HOURS_TEXT_COL, HOURS_TEXT_TO_LEVEL, strip=True),
+    Flag("high_hours", "hours_level", "in", HIGH_LEVELS),
+    TextMap("worklife_score", WORKLIFE_TEXT_COL, WORKLIFE_TEXT_TO_SCORE, strip=True),
+    Flag("low_worklife", "worklife_score", "<=", LOW_WORKLIFE_THRESHOLD),
+    AllOf("high_stress_group", ["high_hours", "low_worklife"]),
+
+    TextMap("sat_decision", "v070", SATISFACTION_TEXT_TO_SCORE),
+    TextMap("sat_experience", "v072", SATISFACTION_TEXT_TO_SCORE),
+    Bands("sat_decision_cat", "sat_decision", SATISFACTION_BANDS, default=SATISFACTION_HIGH),
+    Bands("sat_experience_cat", "sat_experience", SATISFACTION_BANDS, default=SATISFACTION_HIGH),
+
+    *[InRange(f"{col}_clean", col, 1, 7) for col in SUPPORT_NUM],
+    *[Bands(f"{col}_cat", f"{col}_clean", SUPPORT_BANDS, default=SUPPORT_HIGH) for col in SUPPORT_NUM],
+
+    CodeMap("sat_change_cat", "v073_code", SAT_CHANGE_CODES),
+]
+
+WORKLIFE_VARS = ["hours_level", "high_hours", "worklife_score", "low_worklife", "high_stress_group"]
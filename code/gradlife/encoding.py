@@ -0,0 +1,180 @@
+"""
+encoding.py
+
+题目编码的向量化实现（给 02_clean_by_qtype.py 用）。
+
+原来 encode_single_choice / encode_likert 每列调用一次，
+并且用 .map(standardize_str) 对每个单元格调用一次 Python 函数。
+这里把所有 single / likert 列放在一起处理：
+- 文本标准化：整块 astype("string") 后摊平成一个 Series，只调用一次 .str.strip()
+- 编码：对所有值做一次全局 factorize，再用 (列号, 取值) 组合键 + np.unique 计数，
+  每列内部按“出现次数降序、首次出现位置升序”编号 1..k（与原来 value_counts 的顺序一致）
+- 输出紧凑的可空整数列（Int8 / Int16 / Int32，按每列最大编码自动选择）
+
+这样 typed-clean 这一步的耗时只和总单元格数有关，而不是每个单元格一次 Python 调用。
+
+多选题（同一个 multi_group 的若干列）打包成一个位掩码列：
+- 第 i 个选项选中 ⇔ 掩码第 i 位为 1（选项顺序 = metadata 中该组列的顺序）
+- 选项数 ≤8 / ≤16 / ≤32 / ≤64 分别用 uint8 / uint16 / uint32 / uint64
+- expand_bitmask() 按需展开回原来的 *_bin 0/1 列
+- option_counts() / coselection_counts() 用位运算统计每个选项、每两个选项同时被选的人数
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+def smallest_int_dtype(max_code: int) -> str:
+    """按最大编码值选择最小的可空整数类型。"""
+    if max_code <= np.iinfo(np.int8).max:
+        return "Int8"
+    if max_code <= np.iinfo(np.int16).max:
+        return "Int16"
+    return "Int32"
+
+
+def normalize_text_block(df: pd.DataFrame, cols) -> np.ndarray:
+    """
+    把若干列统一转成去掉首尾空格的字符串，返回按列摊平（column-major）的一维数组。
+    缺失值保持为 <NA>。整个过程只有一次向量化的 .str.strip()。
+    """
+    block = df[cols].astype("string")
+    flat = pd.Series(block.to_numpy(dtype=object).ravel(order="F"), dtype="string")
+    return flat.str.strip().to_numpy(dtype=object, na_value=None)
+
+
+def encode_categorical_frame(df: pd.DataFrame, cols):
+    """
+    一次性编码多列分类变量（single / likert）。
+
+    返回：
+    - codes: DataFrame（index 与 df 相同，列为 cols），值为 1..k 的可空小整数，缺失为 <NA>
+    - value_labels: {col: {code(int): label(str)}}
+    """
+    cols = list(cols)
+    n_rows, n_cols = len(df), len(cols)
+    if n_cols == 0:
+        return pd.DataFrame(index=df.index), {}
+
+    flat = normalize_text_block(df, cols)
+
+    # 全局 factorize：所有列共享一套取值编号，缺失为 -1
+    gcodes, uniques = pd.factorize(flat, use_na_sentinel=True)
+    n_uniques = max(len(uniques), 1)
+    col_idx = np.repeat(np.arange(n_cols, dtype=np.int64), n_rows)
+
+    valid = gcodes >= 0
+    keys = col_idx[valid] * n_uniques + gcodes[valid]
+
+    # 每个 (列, 取值) 的出现次数和首次出现位置（摊平数组按列排列，列内就是行顺序）
+    uniq_keys, first_pos, counts = np.unique(keys, return_index=True, return_counts=True)
+    key_col = uniq_keys // n_uniques
+
+    # 列内排序：出现次数降序，次数相同按首次出现的先后
+    order = np.lexsort((first_pos, -counts, key_col))
+    sorted_col = key_col[order]
+    group_start = np.searchsorted(sorted_col, sorted_col, side="left")
+    rank = np.arange(len(order)) - group_start
+
+    code_by_key = np.empty(len(uniq_keys), dtype=np.int64)
+    code_by_key[order] = rank + 1
+
+    # 把编码写回到每个单元格
+    flat_codes = np.zeros(n_rows * n_cols, dtype=np.int64)
+    flat_codes[valid] = code_by_key[np.searchsorted(uniq_keys, keys)]
+    code_matrix = flat_codes.reshape(n_cols, n_rows)
+
+    # 每列的标签字典 {code: label}
+    labels_flat = uniques[uniq_keys % n_uniques]
+    value_labels = {col: {} for col in cols}
+    for c, code, label in zip(key_col[order], rank + 1, labels_flat[order]):
+        value_labels[cols[c]][int(code)] = str(label)
+
+    codes = {}
+    for j, col in enumerate(cols):
+        col_codes = code_matrix[j]
+        max_code = int(col_codes.max()) if n_rows else 0
+        arr = pd.array(col_codes, dtype=smallest_int_dtype(max_code))
+        arr[col_codes == 0] = pd.NA
+        codes[col] = arr
+
+    return pd.DataFrame(codes, index=df.index), value_labels
+
+
+# ============ 多选题位掩码 ============
+
+# 视为“未选中”的取值（去空格、小写后比较）
+NEGATIVE_TOKENS = ["", "nan", "none", "no", "not selected", "0", "false"]
+
+MASK_DTYPES = [(8, np.uint8), (16, np.uint16), (32, np.uint32), (64, np.uint64)]
+
+
+def mask_dtype(n_options: int):
+    """按选项个数选择位掩码的无符号整数类型。"""
+    for n_bits, dtype in MASK_DTYPES:
+        if n_options <= n_bits:
+            return dtype
+    raise ValueError(f"多选题选项数 {n_options} 超过 64，无法打包成单个位掩码列，请拆分题组。")
+
+
+def pack_multiple_choice(df: pd.DataFrame, cols) -> np.ndarray:
+    """
+    把一组多选题列打包成位掩码数组（长度 = 行数）。
+    任意非空、且不是明显否定值（NEGATIVE_TOKENS）的单元格视为选中。
+    """
+    cols = list(cols)
+    n_rows, n_options = len(df), len(cols)
+    dtype = mask_dtype(n_options)
+
+    block = df[cols].astype("string")
+    flat = pd.Series(block.to_numpy(dtype=object).ravel(order="F"), dtype="string")
+    flat = flat.str.strip().str.lower()
+    selected = (flat.notna() & ~flat.isin(NEGATIVE_TOKENS)).to_numpy(dtype=bool)
+    selected = selected.reshape(n_options, n_rows)
+
+    mask = np.zeros(n_rows, dtype=dtype)
+    for bit in range(n_options):
+        mask |= selected[bit].astype(dtype) << dtype(bit)
+    return mask
+
+
+def _bit_matrix(mask: np.ndarray, n_options: int) -> np.ndarray:
+    """位掩码 → (行数 × 选项数) 的 0/1 矩阵。"""
+    mask = np.asarray(mask)
+    shifts = np.arange(n_options, dtype=mask.dtype)
+    return ((mask[:, None] >> shifts) & mask.dtype.type(1)).astype(np.int8)
+
+
+def expand_bitmask(mask, option_cols, suffix: str = "_bin") -> pd.DataFrame:
+    """
+    按需把位掩码展开成原来的 *_bin 列（0/1），列名 = 选项列名 + suffix。
+    mask 可以是 Series（保留其 index）或 ndarray。
+    """
+    index = mask.index if isinstance(mask, pd.Series) else None
+    values = np.asarray(mask)
+    bits = _bit_matrix(values, len(option_cols))
+    return pd.DataFrame(bits, columns=[f"{c}{suffix}" for c in option_cols], index=index)
+
+
+def _unique_patterns(mask):
+    """把所有受访者的掩码压缩成“不同的选择组合 + 人数”，后续统计只在组合上做。"""
+    values = np.asarray(mask)
+    return np.unique(values, return_counts=True)
+
+
+def option_counts(mask, n_options: int) -> np.ndarray:
+    """每个选项被选中的人数（长度 n_options）。"""
+    patterns, counts = _unique_patterns(mask)
+    bits = _bit_matrix(patterns, n_options).astype(np.int64)
+    return counts @ bits
+
+
+def coselection_counts(mask, n_options: int) -> np.ndarray:
+    """
+    选项两两同时被选中的人数（n_options × n_options 对称矩阵，对角线 = option_counts）。
+    """
+    patterns, counts = _unique_patterns(mask)
+    bits = _bit_matrix(patterns, n_options).astype(np.int64)
+    return (bits * counts[:, None]).T @ bits
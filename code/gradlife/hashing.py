@@ -0,0 +1,37 @@
+"""
+hashing.py
+
+内容哈希小工具：判断“文件 / 配置是否真的变了”，而不是看修改时间。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+BLOCK_SIZE = 1 << 20  # 1 MB，分块读取，大文件也不会一次读进内存
+
+
+def file_sha256(path: Path) -> str:
+    """按文件字节内容计算 sha256（十六进制字符串）。"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def json_sha256(obj) -> str:
+    """对可 JSON 序列化的对象（配置 dict 等）计算稳定的 sha256。"""
+    text = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def combine_hashes(*parts: str) -> str:
+    """把多个哈希串（或普通字符串）合成一个哈希。"""
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(str(p).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
@@ -0,0 +1,406 @@
+"""
+ingest.py
+
+原始问卷 Excel（data/data.xlsx）的流式读取。
+
+pd.read_excel 会把整张表一次性读进内存，问卷导出越大越慢、越占内存。
+这里改用 openpyxl 的 read_only 模式逐行读取：
+- 第 1 行 → orig_code_row1（原始编号，可能错位）
+- 第 2 行 → question_text（题目文本）
+- 第 3 行起是正式数据，每攒够 chunk_rows 行就写出一个分块文件，
+  内存里最多只保留一个分块，峰值内存与表的总行数无关。
+
+输出：
+- chunk_dir/part-00000.parquet, part-00001.parquet, ...
+    第一列 resp_id（受访者主键，按行顺序 1..N，int64），
+    其余列名 v001, v002, ...，统一存成字符串（缺失为 null），
+    保证各分块 schema 一致，之后可以用 pd.read_parquet(chunk_dir) 整体读取。
+- csv_path（可选）：同样的数据逐块追加写入一份 CSV，兼容后续脚本。
+
+另外提供一个按内容哈希索引的读取缓存（ingest cache）：
+- key = sha256(工作簿字节内容) + sha256(表头处理相关设置)
+- 命中时直接加载二进制快照（metadata.pkl + data/part-*.parquet），不再解析 Excel；
+- 工作簿任何一个字节变化，key 就变，缓存自然失效。
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+from gradlife.hashing import combine_hashes, file_sha256, json_sha256
+from gradlife.keys import ID_COL, assign_ids
+
+HEADER_ROWS = 2          # 前两行是表头：原始编号 + 题目文本
+CHUNK_ROWS = 20_000      # 每个分块的行数
+CACHE_KEEP = 3           # 读取缓存最多保留几个版本（按最近使用时间）
+
+
+def make_col_names(n_cols: int) -> list[str]:
+    """生成规范的技术变量名：v001, v002, v003, ..."""
+    return [f"v{str(i + 1).zfill(3)}" for i in range(n_cols)]
+
+
+def build_basic_metadata(col_names, row_codes, row_questions) -> pd.DataFrame:
+    """根据两行表头构建基础 metadata 表（与 01_prepare_headers 原来的结构一致）。"""
+    metadata = pd.DataFrame({
+        "col_name": col_names,               # 之后分析中真正使用的列名
+        "question_text": row_questions,      # 来自第 2 行
+        "orig_code_row1": row_codes,         # 来自第 1 行（可能错位）
+    })
+
+    # 预留一些后面要填的列（先设为 None / 空）
+    metadata["q_no"] = None          # 问卷题号（如 Q1, Q2, Q12_a 等，后面人工/半自动补）
+    metadata["q_type"] = None        # 题型：single/multiple/likert/grid/open/numeric...
+    metadata["multi_group"] = None   # 对于矩阵/多列题，标记它们属于哪个题组
+    metadata["value_type"] = None    # numeric/category/text...
+    metadata["value_labels"] = None  # 之后可以存 JSON 字符串或留空
+    return metadata
+
+
+def iter_sheet_rows(path: Path):
+    """
+    以 read_only 模式逐行读取第一个工作表，每次产出一个 tuple（单元格的值）。
+    和 pd.read_excel 默认行为一致：读第一个 sheet，公式取缓存值。
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        for row in ws.iter_rows(values_only=True):
+            yield row
+    finally:
+        wb.close()
+
+
+def cell_to_str(val):
+    """
+    把单元格的值统一转成字符串，用于分块 Parquet：
+    - 空单元格 → None
+    - 整数值的浮点数（3.0）→ "3"，避免不同分块里同一列一会儿 "3" 一会儿 "3.0"
+    """
+    if val is None:
+        return None
+    if isinstance(val, float):
+        if val != val:  # NaN
+            return None
+        if val.is_integer():
+            return str(int(val))
+        return repr(val)
+    if isinstance(val, (dt.datetime, dt.date, dt.time)):
+        return val.isoformat()
+    return str(val)
+
+
+def _fit_row(row, n_cols):
+    """把一行补齐 / 截断到 n_cols 个单元格。"""
+    row = tuple(row)
+    if len(row) < n_cols:
+        return row + (None,) * (n_cols - len(row))
+    return row[:n_cols]
+
+
+class _ChunkWriter:
+    """把数据行按块写成 Parquet（以及可选的 CSV）。"""
+
+    def __init__(self, col_names, chunk_dir: Path, csv_path: Path | None):
+        self.col_names = col_names
+        self.chunk_dir = chunk_dir
+        self.csv_path = csv_path
+        self.n_chunks = 0
+        self.n_rows = 0
+        self._part_widths = []   # 每个已写分块的列数（不含 resp_id）
+        self._csv_width = None   # CSV 表头的列数
+
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            self._pa, self._pq = pa, pq
+        except ImportError:
+            print("⚠️ 未安装 pyarrow，流式读取只写 CSV，不生成分块 Parquet。")
+            self._pa = self._pq = None
+
+        if self._pa is not None:
+            chunk_dir.mkdir(parents=True, exist_ok=True)
+            # 清掉上一次运行留下的分块，避免新旧数据混在一起
+            for old in chunk_dir.glob("part-*.parquet"):
+                old.unlink()
+
+        if csv_path is not None and csv_path.exists():
+            csv_path.unlink()
+
+    def widen(self, col_names):
+        """后面的数据行比表头宽：之后按新列名写，已写的分块 / CSV 在 finish() 时补空列。"""
+        self.col_names = col_names
+
+    def write(self, rows):
+        if not rows:
+            return
+
+        n_cols = len(self.col_names)
+        rows = [_fit_row(r, n_cols) for r in rows]
+        ids = assign_ids(len(rows), start=self.n_rows + 1)
+
+        if self._pa is not None:
+            columns = list(zip(*rows))
+            arrays = {ID_COL: self._pa.array(ids, type=self._pa.int64())}
+            arrays.update({
+                name: self._pa.array([cell_to_str(v) for v in values], type=self._pa.string())
+                for name, values in zip(self.col_names, columns)
+            })
+            table = self._pa.table(arrays)
+            part_path = self.chunk_dir / f"part-{self.n_chunks:05d}.parquet"
+            self._pq.write_table(table, part_path)
+            self._part_widths.append(n_cols)
+
+        if self.csv_path is not None:
+            frame = pd.DataFrame(rows, columns=self.col_names)
+            frame.insert(0, ID_COL, ids)
+            frame.to_csv(
+                self.csv_path,
+                mode="a",
+                header=(self.n_rows == 0),
+                index=False,
+            )
+            if self._csv_width is None:
+                self._csv_width = n_cols
+
+        self.n_chunks += 1
+        self.n_rows += len(rows)
+
+    def finish(self, chunk_rows: int = CHUNK_ROWS):
+        """给 widen() 之前写出的分块和 CSV 补上后来出现的列（全为缺失），保证各分块 schema 一致。"""
+        n_cols = len(self.col_names)
+        if self._pa is not None:
+            for i, width in enumerate(self._part_widths):
+                if width == n_cols:
+                    continue
+                part_path = self.chunk_dir / f"part-{i:05d}.parquet"
+                table = self._pq.read_table(part_path)
+                for name in self.col_names[width:]:
+                    table = table.append_column(name, self._pa.nulls(table.num_rows, self._pa.string()))
+                self._pq.write_table(table, part_path)
+                self._part_widths[i] = n_cols
+
+        if self.csv_path is not None and self._csv_width is not None and self._csv_width < n_cols:
+            # 按文本原样读回（不做类型推断、不把空串当缺失），只在右边补空列
+            tmp = self.csv_path.with_name(f".{self.csv_path.name}.tmp")
+            reader = pd.read_csv(self.csv_path, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+            for k, frame in enumerate(reader):
+                for name in self.col_names[self._csv_width:]:
+                    frame[name] = ""
+                frame.to_csv(tmp, mode="w" if k == 0 else "a", header=(k == 0), index=False)
+            tmp.replace(self.csv_path)
+            self._csv_width = n_cols
+
+
+def stream_workbook(
+    path: Path,
+    chunk_dir: Path,
+    csv_path: Path | None = None,
+    chunk_rows: int = CHUNK_ROWS,
+):
+    """
+    流式读取 Excel：前两行生成 metadata，其余行分块写盘。
+
+    列数先按表头定（去掉表尾两行表头都为空的列）；之后某个数据行在这些列之外还有内容时，
+    列数扩到该行最后一个非空单元格，多出的列照常命名 vNNN（metadata 里表头为空）并给出提示，
+    不截掉这些数据（和 pd.read_excel 一样）。
+
+    返回 (metadata, n_rows, n_cols)。
+    """
+    rows = iter_sheet_rows(path)
+
+    header = []
+    for _ in range(HEADER_ROWS):
+        header.append(next(rows, ()))
+
+    n_cols = max(len(r) for r in header)
+    row_codes = _fit_row(header[0], n_cols)
+    row_questions = _fit_row(header[1], n_cols)
+
+    # 和 pd.read_excel 一样，去掉表尾全空的列
+    while n_cols > 0 and row_codes[n_cols - 1] is None and row_questions[n_cols - 1] is None:
+        n_cols -= 1
+
+    header_cols = n_cols
+    writer = _ChunkWriter(make_col_names(n_cols), chunk_dir, csv_path)
+    buffer = []
+    pending_empty = []  # 全空行先攒着：如果后面再没有数据，就是表尾空行，丢掉
+
+    for row_no, row in enumerate(rows, start=HEADER_ROWS + 1):
+        row = tuple(row)
+        if len(row) > n_cols and any(v is not None for v in row[n_cols:]):
+            width = len(row)
+            while row[width - 1] is None:
+                width -= 1
+            names = make_col_names(width)
+            print(f"⚠️ 工作簿第 {row_no} 行在第 {n_cols} 列之后还有内容（到第 {width} 列），"
+                  f"保留为 {names[n_cols]}–{names[-1]}；表头只有 {header_cols} 列，请检查工作簿。")
+            n_cols = width
+            writer.widen(names)
+        if all(v is None for v in row):
+            pending_empty.append(row)
+            continue
+        if pending_empty:
+            buffer.extend(pending_empty)
+            pending_empty = []
+        buffer.append(row)
+        if len(buffer) >= chunk_rows:
+            writer.write(buffer)
+            buffer = []
+
+    writer.write(buffer)
+    writer.finish(chunk_rows)
+
+    col_names = make_col_names(n_cols)
+    metadata = build_basic_metadata(
+        col_names, _fit_row(row_codes, n_cols), _fit_row(row_questions, n_cols)
+    )
+    if n_cols > header_cols:
+        print(f"⚠️ 共有 {n_cols - header_cols} 列只有数据、没有表头：{col_names[header_cols:]}")
+
+    return metadata, writer.n_rows, n_cols
+
+
+# ============ 按内容哈希索引的读取缓存 ============
+
+def ingest_cache_key(data_path: Path, settings: dict) -> str:
+    """缓存 key：工作簿内容哈希 + 表头处理设置的哈希。"""
+    return combine_hashes(file_sha256(data_path), json_sha256(settings))
+
+
+def _file_sig(path: Path):
+    st = path.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+def load_ingest_cache(cache_dir: Path, key: str):
+    """
+    命中返回 metadata（来自 pickle），未命中返回 None。
+    数据快照（分块 Parquet）这里不读：输出文件都还在时用不到，
+    需要恢复时再由 restore_chunks / restore_data_csv 逐块读取。
+    """
+    entry = cache_dir / key
+    meta_path = entry / "metadata.pkl"
+    data_dir = entry / "data"
+    if not meta_path.exists() or not data_dir.exists():
+        return None
+
+    try:
+        metadata = pd.read_pickle(meta_path)
+    except Exception as e:
+        print(f"⚠️ 读取缓存失败，将重新解析工作簿：{e}")
+        return None
+
+    # 更新使用时间，方便清理时保留最近用过的版本
+    os.utime(entry)
+    return metadata
+
+
+def cached_shape(cache_dir: Path, key: str):
+    """快照的 (行数, 列数)，只读各分块的 Parquet 文件尾，不读数据。"""
+    import pyarrow.parquet as pq
+
+    n_rows, n_cols = 0, 0
+    for part in sorted((cache_dir / key / "data").glob("part-*.parquet")):
+        meta = pq.ParquetFile(part).metadata
+        n_rows += meta.num_rows
+        n_cols = meta.num_columns
+    return n_rows, n_cols
+
+
+def save_ingest_cache(
+    cache_dir: Path,
+    key: str,
+    metadata: pd.DataFrame,
+    chunk_dir: Path | None = None,
+    df_data: pd.DataFrame | None = None,
+):
+    """
+    保存快照。流式模式传 chunk_dir（直接复用已经写好的分块），
+    一次性读入模式传 df_data（转成字符串后写成单个分块）。
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("⚠️ 未安装 pyarrow，跳过读取缓存。")
+        return
+
+    entry = cache_dir / key
+    tmp = cache_dir / f".{key}.tmp"
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    (tmp / "data").mkdir(parents=True)
+
+    if chunk_dir is not None:
+        for part in sorted(chunk_dir.glob("part-*.parquet")):
+            dst = tmp / "data" / part.name
+            try:
+                os.link(part, dst)      # 硬链接：不额外占空间
+            except OSError:
+                shutil.copy2(part, dst)
+    elif df_data is not None:
+        snapshot = df_data.map(cell_to_str).astype("string")
+        snapshot.to_parquet(tmp / "data" / "part-00000.parquet", index=False)
+
+    metadata.to_pickle(tmp / "metadata.pkl")
+
+    if entry.exists():
+        shutil.rmtree(entry)
+    tmp.rename(entry)
+    _prune_cache(cache_dir)
+
+
+def _prune_cache(cache_dir: Path):
+    entries = [p for p in cache_dir.iterdir() if p.is_dir() and not p.name.startswith(".")]
+    entries.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in entries[CACHE_KEEP:]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def restore_chunks(cache_dir: Path, key: str, chunk_dir: Path):
+    """把缓存里的分块拷回 chunk_dir（输出文件被删或被改时用）。"""
+    chunk_dir.mkdir(parents=True, exist_ok=True)
+    for old in chunk_dir.glob("part-*.parquet"):
+        old.unlink()
+    for part in sorted((cache_dir / key / "data").glob("part-*.parquet")):
+        shutil.copy2(part, chunk_dir / part.name)
+
+
+def restore_data_csv(cache_dir: Path, key: str, csv_path: Path):
+    """从缓存快照逐块重写数据 CSV（每次只读一个分块）。"""
+    tmp = csv_path.with_name(f".{csv_path.name}.tmp")
+    parts = sorted((cache_dir / key / "data").glob("part-*.parquet"))
+    for i, part in enumerate(parts):
+        pd.read_parquet(part).to_csv(tmp, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+    tmp.replace(csv_path)
+
+
+def record_outputs(cache_dir: Path, key: str, paths):
+    """记录这次写出的输出文件（大小 + 修改时间），下次命中缓存时用来判断要不要重写。"""
+    sigs = {str(p): _file_sig(p) for p in paths if p.exists()}
+    # 没装 pyarrow 时 save_ingest_cache 不建缓存目录，这里补上，只存输出签名
+    (cache_dir / key).mkdir(parents=True, exist_ok=True)
+    with open(cache_dir / key / "outputs.json", "w", encoding="utf-8") as f:
+        json.dump(sigs, f, ensure_ascii=False, indent=2)
+
+
+def outputs_match(cache_dir: Path, key: str, paths) -> bool:
+    """输出文件都还在、且和上次写出时一样（大小 + 修改时间）→ True。"""
+    sig_path = cache_dir / key / "outputs.json"
+    if not sig_path.exists():
+        return False
+    with open(sig_path, encoding="utf-8") as f:
+        sigs = json.load(f)
+    paths = {str(p) for p in paths} | set(sigs)
+    for p in paths:
+        if not Path(p).exists() or sigs.get(p) != _file_sig(Path(p)):
+            return False
+    return True
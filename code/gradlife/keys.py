@@ -0,0 +1,96 @@
+"""
+keys.py
+
+受访者主键 resp_id 与按主键的表连接。
+
+01_prepare_headers 给每个受访者分配一次 resp_id（按工作簿中的行顺序 1, 2, ..., N），
+之后 typed_clean、worklife_derived_vars、region_worklife_derived、master_person_wide
+都带着这一列。原来各脚本用 reset_index + pd.concat(axis=1) 或直接按行号赋值拼表，
+92 / 97 在行数不一致时还会悄悄截断到 min(len)；现在统一按 resp_id 连接：
+
+    from gradlife.keys import attach
+    df = attach(df, worklife, ["high_stress_group"])      # 相当于按 resp_id 的 left join
+
+- 右表按 resp_id 排序一次，左表每个 key 用 searchsorted 找位置，再 take 取值；
+- 左表的行顺序和行数保持不变（可以先筛选 / 分片，再连接）；
+- 右表没有的 key → 缺失值；右表 key 重复直接报错，而不是悄悄复制行。
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+ID_COL = "resp_id"
+
+
+def assign_ids(n_rows: int, start: int = 1) -> np.ndarray:
+    """按行顺序生成 resp_id：start, start+1, ...（int64）。"""
+    return np.arange(start, start + n_rows, dtype=np.int64)
+
+
+def _key_array(df: pd.DataFrame, on: str, name: str) -> np.ndarray:
+    if on not in df.columns:
+        raise KeyError(f"{name} 中缺少主键列 {on}，请先重新运行 01_prepare_headers.py 及其下游脚本。")
+    keys = pd.to_numeric(df[on], errors="coerce")
+    if keys.isna().any():
+        raise ValueError(f"{name} 的 {on} 列有缺失或非数字的值。")
+    return keys.to_numpy(dtype=np.int64)
+
+
+def align(left_keys, right_keys) -> np.ndarray:
+    """
+    对 left_keys 中每个 key，返回它在 right_keys 中的位置；找不到为 -1。
+    right_keys 不能有重复。
+    """
+    left_keys = np.asarray(left_keys, dtype=np.int64)
+    right_keys = np.asarray(right_keys, dtype=np.int64)
+
+    # 最常见的情况：两张表本来就是同一批受访者、同样的顺序（严格递增，顺带保证了没有重复）
+    if (len(left_keys) == len(right_keys) and np.array_equal(left_keys, right_keys)
+            and (right_keys[1:] > right_keys[:-1]).all()):
+        return np.arange(len(right_keys))
+
+    order = np.argsort(right_keys, kind="stable")
+    sorted_keys = right_keys[order]
+    if len(sorted_keys) > 1 and (sorted_keys[1:] == sorted_keys[:-1]).any():
+        dup = np.unique(sorted_keys[1:][sorted_keys[1:] == sorted_keys[:-1]])
+        raise ValueError(f"主键有重复值（前几个：{dup[:5].tolist()}），无法一对一连接。")
+
+    if len(sorted_keys) == 0:
+        return np.full(len(left_keys), -1)
+    pos = np.minimum(np.searchsorted(sorted_keys, left_keys), len(sorted_keys) - 1)
+    found = sorted_keys[pos] == left_keys
+    return np.where(found, order[pos], -1)
+
+
+def subset(df: pd.DataFrame, keys, on: str = ID_COL, name: str = "表") -> pd.DataFrame:
+    """只保留 on 列的值在 keys 中的行（顺序不变），比如把 typed_clean 限定到 master 中的受访者。"""
+    keys = np.unique(np.asarray(keys, dtype=np.int64))
+    keep = align(_key_array(df, on, name), keys) >= 0
+    return df[keep]
+
+
+def attach(left: pd.DataFrame, right: pd.DataFrame, columns, on: str = ID_COL,
+           left_name: str = "左表", right_name: str = "右表") -> pd.DataFrame:
+    """
+    按主键把 right 的 columns 列接到 left 上（left join），返回新的 DataFrame。
+    left 的行顺序、行数、index 都不变；right 中没有的 key 对应缺失值。
+    columns 里和 left 重名的列原位覆盖，其余追加在最后。
+    """
+    columns = [c for c in columns if c != on]
+    pos = align(_key_array(left, on, left_name), _key_array(right, on, right_name))
+    missing = pos < 0
+
+    sub = right[columns].reset_index(drop=True)
+    if missing.any():
+        print(f"⚠️ {left_name} 中有 {int(missing.sum())} 个 {on} 在 {right_name} 中找不到，对应值设为缺失。")
+        taken = sub.reindex(pos)          # 位置 -1 不存在 → 缺失值
+    else:
+        taken = sub.take(pos)
+    taken.index = left.index
+
+    out = left.copy()
+    for col in columns:
+        out[col] = taken[col]             # 已有的列原位覆盖，新列追加在后面
+    return out
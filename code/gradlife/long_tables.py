@@ -0,0 +1,240 @@
+"""
+long_tables.py
+
+Likert 量表题的长表：一张窄事实表 + 一张条目维度表。
+
+原来 91（满意度 Q27）和 93（支持 Q32 / Q35）各自 melt 一遍 typed_clean，
+每行都重复完整题干，support_long.csv 3 万多行就有 4 MB。现在统一为：
+
+- 事实表 likert_long.parquet：resp_id（int32）、item_id（int16）、score（int8），
+  只保留有作答的行；
+- 维度表 likert_items.csv：item_id、item_code（原始列名，如 v084_num）、q_no、
+  scale_group（题号前缀，如 "Q27"）、item_text（完整题干）、item_short（短标签）。
+
+metadata 中每个有 likert_numeric *_num 列的题号前缀（Q20、Q27、Q32、Q35、Q52 ……）都是一个量表，
+build_long_tables 一次读入所有量表列、一次生成事实表。下游按题号前缀取出带文本的长表：
+
+    from gradlife.long_tables import SATISFACTION, read_long
+    sat = read_long(SATISFACTION)   # resp_id, item_code, q_no, scale_group, item_text, item_short, score
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from gradlife import session, tracking
+from gradlife.keys import ID_COL, subset
+from gradlife.typed_store import read_typed
+
+LONG_DIR = Path("/workspace/output/99_master")
+LONG_PARQUET = LONG_DIR / "likert_long.parquet"
+LONG_CSV = LONG_DIR / "likert_long.csv"        # 没装 pyarrow 时的兜底
+ITEMS_CSV = LONG_DIR / "likert_items.csv"
+
+SATISFACTION = ("Q27",)          # How satisfied are you with ... of your degree?
+SUPPORT = ("Q32", "Q35")         # My supervisor ... / My university ...
+
+ITEM_COLS = ["item_id", "item_code", "q_no", "scale_group", "item_text", "item_short"]
+LONG_COLS = ["resp_id", "item_code", "q_no", "scale_group", "item_text", "item_short", "score"]
+
+
+def short_after_question(text: str) -> str:
+    """
+    满意度类题干的短标签：取 '?' / ':' / 破折号之后、最后一个 '.' 之后的核心短语。
+    "How satisfied are you with ... ? Work-life balance [numeric]" → "Work-life balance"
+    """
+    if not isinstance(text, str):
+        return ""
+
+    t = text.strip()
+    for sep in ["?", ":", "â€”", "—"]:
+        if sep in t:
+            t = t.split(sep)[-1].strip()
+
+    if "[numeric]" in t:
+        t = t.replace("[numeric]", "").strip()
+
+    if "." in t:
+        t = t.split(".")[-1].strip()
+
+    # 按两个空格分割（防御性）
+    if "  " in t:
+        t = t.split("  ")[-1].strip()
+
+    return t
+
+
+def short_after_ellipsis(text: str) -> str:
+    """
+    “My supervisor … Makes time for ...” 这类题干的短标签：去掉 [numeric]，
+    保留第一个省略号（"…" / "..." / 编码错乱的 "â¦"）之后的部分。
+    """
+    if not isinstance(text, str):
+        return ""
+
+    t = text.strip()
+    if "[numeric]" in t:
+        t = t.replace("[numeric]", "").strip()
+
+    for sep in ["…", "...", "â¦"]:
+        if sep in t:
+            parts = t.split(sep, 1)
+            if len(parts) == 2:
+                t = parts[1].strip()
+                break
+    return t
+
+
+# 题号前缀 → 短标签规则；没列出的用 short_after_question
+SHORT_LABEL_RULES = {
+    "Q32": short_after_ellipsis,
+    "Q35": short_after_ellipsis,
+}
+
+
+def scale_prefix(q_no) -> str:
+    """'Q27.k' → 'Q27'。"""
+    return str(q_no).split(".")[0].strip()
+
+
+def select_items(meta: pd.DataFrame, prefixes=None) -> pd.DataFrame:
+    """
+    从 metadata 中选出量表条目（维度表，不含 item_id）：
+    - 列名以 _num 结尾；
+    - q_type 为 likert_numeric；某个前缀下一个都没有时，该前缀退一步用任何 numeric 类型；
+    - prefixes=None 时取所有有 likert_numeric 列的题号前缀。
+    """
+    m = meta.copy()
+    m["scale_group"] = m["q_no"].map(scale_prefix)
+    q_type = m["q_type"].astype(str)
+    is_num_col = m["col_name"].astype(str).str.endswith("_num")
+    likert = m[is_num_col & q_type.str.contains("likert_numeric", case=False, na=False)]
+
+    if prefixes is None:
+        prefixes = list(dict.fromkeys(likert["scale_group"]))
+
+    parts = []
+    for prefix in prefixes:
+        part = likert[likert["scale_group"] == prefix]
+        if part.empty:
+            print(f"⚠️ 没有找到 {prefix} 的 likert_numeric *_num 列，退一步使用任何 numeric 类型。")
+            any_num = is_num_col & q_type.str.contains("numeric", case=False, na=False)
+            part = m[any_num & (m["scale_group"] == prefix)]
+        if part.empty:
+            print(f"⚠️ metadata 中没有 {prefix} 的 *_num numeric 列，跳过。")
+            continue
+        parts.append(part)
+
+    if not parts:
+        raise RuntimeError("在 metadata 中没有找到任何量表题的 *_num numeric 列，请检查 q_no / q_type / col_name。")
+
+    items = pd.concat(parts, ignore_index=True).drop_duplicates("col_name")
+    items = items.rename(columns={"col_name": "item_code", "question_text": "item_text"})
+    items["item_short"] = [
+        SHORT_LABEL_RULES.get(g, short_after_question)(t)
+        for g, t in zip(items["scale_group"], items["item_text"])
+    ]
+    return items[ITEM_COLS[1:]].reset_index(drop=True)
+
+
+def build_long_tables(meta: pd.DataFrame, keys=None, prefixes=None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    一次读入所有量表列，返回 (事实表, 维度表)。
+    keys 给出时只保留这些 resp_id（如 master 中的受访者）。
+    """
+    items = select_items(meta, prefixes)
+    if len(items) > np.iinfo(np.int16).max:
+        raise ValueError(f"量表条目数 {len(items)} 超出 int16 范围。")
+    items.insert(0, "item_id", np.arange(1, len(items) + 1, dtype="int16"))
+
+    cols = items["item_code"].tolist()
+    typed = read_typed([ID_COL] + cols)
+    missing = [c for c in cols if c not in typed.columns]
+    if missing:
+        raise KeyError("data_step2_typed_clean 中缺少以下量表列： " + ", ".join(missing))
+    if keys is not None:
+        typed = subset(typed, keys, name="data_step2_typed_clean")
+    return wide_to_fact(typed, items), items
+
+
+def wide_to_fact(df: pd.DataFrame, items: pd.DataFrame) -> pd.DataFrame:
+    """
+    一人一行、每个条目一列（列名为 item_code）的表 → 窄事实表 (resp_id, item_id, score)。
+    按条目顺序依次堆叠（与 melt 相同的行顺序），只保留有作答的格子。
+    """
+    cols = items["item_code"].tolist()
+    missing = [c for c in cols if c not in df.columns]
+    if missing:
+        raise KeyError("缺少以下量表列： " + ", ".join(missing))
+    scores = df[cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64")
+    answered = ~np.isnan(scores.T)
+    values = scores.T[answered]
+    if len(values) and (not np.all(values == np.round(values)) or values.min() < -128 or values.max() > 127):
+        raise ValueError("量表得分不全是 int8 范围内的整数，无法写入窄事实表，请检查输入数据。")
+
+    ids = df[ID_COL].to_numpy()
+    return pd.DataFrame({
+        ID_COL: np.broadcast_to(ids, scores.T.shape)[answered].astype("int32"),
+        "item_id": np.broadcast_to(items["item_id"].to_numpy()[:, None], scores.T.shape)[answered],
+        "score": values.astype("int8"),
+    })
+
+
+def write_long_tables(fact: pd.DataFrame, items: pd.DataFrame) -> Path:
+    """写出维度表（CSV）和事实表（Parquet，没装 pyarrow 时退回 CSV），返回事实表路径。"""
+    LONG_DIR.mkdir(parents=True, exist_ok=True)
+    items.to_csv(ITEMS_CSV, index=False)
+    try:
+        fact.to_parquet(LONG_PARQUET, index=False)
+    except ImportError:
+        print(f"⚠️ 未安装 pyarrow，改为写出 CSV：{LONG_CSV}")
+        fact.to_csv(LONG_CSV, index=False)
+        if LONG_PARQUET.exists():
+            LONG_PARQUET.unlink()  # 旧的 Parquet 会优先被读到，必须删掉
+        return LONG_CSV
+    if LONG_CSV.exists():
+        LONG_CSV.unlink()
+    return LONG_PARQUET
+
+
+def _load_fact(path: Path) -> pd.DataFrame:
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    return pd.read_csv(path, dtype={ID_COL: "int32", "item_id": "int16", "score": "int8"})
+
+
+def read_items() -> pd.DataFrame:
+    """读取条目维度表。"""
+    return session.read_csv(ITEMS_CSV, dtype={"item_id": "int16"})
+
+
+def read_fact() -> pd.DataFrame:
+    """读取窄事实表（resp_id, item_id, score）；session 模式下返回缓存对象本身，调用方不要原地修改。"""
+    path = LONG_PARQUET
+    if not path.exists():
+        print(f"⚠️ 未找到 {LONG_PARQUET}，改读 CSV：{LONG_CSV}")
+        path = LONG_CSV
+    tracking.record(path)
+    return session.cached_frame(path, _load_fact)
+
+
+def read_long(prefixes=None) -> pd.DataFrame:
+    """
+    取出题号前缀属于 prefixes 的量表长表（None = 全部），列为 LONG_COLS：
+    事实表按 item_id 接上维度表的文本列，只包含有作答的行。
+    """
+    fact = read_fact()
+    items = read_items()
+    if prefixes is not None:
+        items = items[items["scale_group"].isin(list(prefixes))]
+        fact = fact[fact["item_id"].isin(items["item_id"])]
+
+    pos = pd.Index(items["item_id"]).get_indexer(fact["item_id"])
+    out = {ID_COL: fact[ID_COL].to_numpy()}
+    for col in ITEM_COLS[1:]:
+        out[col] = items[col].to_numpy()[pos]
+    out["score"] = fact["score"].to_numpy()
+    return pd.DataFrame(out, columns=LONG_COLS)
@@ -0,0 +1,197 @@
+"""
+manifest.py
+
+运行清单（run manifest）：每次 run_pipeline.py 运行后，记录每个步骤的
+- 墙钟时间 wall_s、CPU 时间 cpu_user_s / cpu_sys_s、峰值内存 peak_rss_mb
+- 输入 / 输出文件的行数、列数、字节数（rows_in / rows_out / bytes_in / bytes_out）
+写到 /workspace/output/run_manifests/run_<时间>.json。
+
+数据刷新后想知道哪个步骤变慢 / 变大了：
+
+    python run_pipeline.py --diff                 # 比较最近两次运行
+    python run_pipeline.py --diff A.json B.json   # 比较指定的两个清单
+
+说明：
+- 子进程模式下 CPU / 峰值内存来自 os.wait4 返回的 rusage，是该脚本进程自己的；
+- session 模式（单进程）下只能拿到整个进程到目前为止的峰值内存，步骤之间不可比；
+- 行数 / 列数：Parquet 读文件尾的元数据，CSV 只解析第一列计数；
+  其他格式（xlsx、pickle）只记字节数。
+"""
+
+from __future__ import annotations
+
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+MANIFEST_DIR = Path("/workspace/output/run_manifests")
+MANIFEST_VERSION = 1
+
+# 比较时：变慢超过这个比例、且绝对值超过 MIN_DELTA_S 秒才标成回退
+REGRESSION_RATIO = 1.2
+MIN_DELTA_S = 0.5
+
+
+def _is_data_file(p: Path) -> bool:
+    return p.suffix.lower() in (".csv", ".parquet")
+
+
+def file_shape(path: Path) -> dict:
+    """
+    {"bytes", "rows", "cols"}；目录按其中的文件累加（rows / cols 取 Parquet 分块之和 / 首块）。
+    不存在返回 None；不认识的格式 rows / cols 为 None。
+    """
+    path = Path(path)
+    if path.is_dir():
+        parts = sorted(p for p in path.rglob("*") if p.is_file())
+        shapes = [file_shape(p) for p in parts]
+        data = [s for p, s in zip(parts, shapes) if _is_data_file(p) and s["rows"] is not None]
+        return {
+            "bytes": sum(s["bytes"] for s in shapes),
+            "rows": sum(s["rows"] for s in data) if data else None,
+            "cols": data[0]["cols"] if data else None,
+        }
+    if not path.is_file():
+        return None
+
+    shape = {"bytes": path.stat().st_size, "rows": None, "cols": None}
+    suffix = path.suffix.lower()
+    try:
+        if suffix == ".parquet":
+            import pyarrow.parquet as pq
+            meta = pq.read_metadata(path)
+            shape["rows"], shape["cols"] = meta.num_rows, meta.num_columns
+        elif suffix == ".csv":
+            header = pd.read_csv(path, nrows=0)
+            shape["cols"] = len(header.columns)
+            shape["rows"] = len(pd.read_csv(path, usecols=[0], low_memory=False)) if shape["cols"] else 0
+    except ImportError:
+        pass
+    except Exception as e:
+        print(f"⚠️ 无法统计 {path} 的行列数：{e}")
+    return shape
+
+
+def _sum(shapes, key):
+    vals = [s[key] for s in shapes if s and s.get(key) is not None]
+    return sum(vals) if vals else None
+
+
+class RunManifest:
+    """一次运行的清单；Pipeline 每跑完 / 跳过一个步骤就 add_step 一次。"""
+
+    def __init__(self, mode: str, jobs: int, directory: Path = MANIFEST_DIR):
+        self.directory = Path(directory)
+        self.t0 = time.time()
+        self.data = {
+            "version": MANIFEST_VERSION,
+            "started_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "mode": mode,
+            "jobs": jobs,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "steps": [],
+        }
+
+    def add_step(self, name: str, status: str, reason=None, usage=None,
+                 inputs=None, outputs=None):
+        """
+        status：ran / skipped / failed；usage：{"wall_s", "cpu_user_s", "cpu_sys_s", "peak_rss_mb"}；
+        inputs / outputs：{相对路径: file_shape(...) 结果}。
+        """
+        inputs, outputs = inputs or {}, outputs or {}
+        rec = {"name": name, "status": status, "reason": reason}
+        rec.update(usage or {})
+        rec.update({
+            "rows_in": _sum(inputs.values(), "rows"),
+            "rows_out": _sum(outputs.values(), "rows"),
+            "bytes_in": _sum(inputs.values(), "bytes"),
+            "bytes_out": _sum(outputs.values(), "bytes"),
+            "inputs": inputs,
+            "outputs": outputs,
+        })
+        self.data["steps"].append(rec)
+
+    def write(self) -> Path:
+        self.data["finished_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.data["total_wall_s"] = round(time.time() - self.t0, 3)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.t0))
+        path = self.directory / f"run_{stamp}.json"
+        n = 1
+        while path.exists():
+            n += 1
+            path = self.directory / f"run_{stamp}_{n}.json"
+        path.write_text(json.dumps(self.data, indent=1, ensure_ascii=False), encoding="utf-8")
+        return path
+
+
+# ---------- 比较两次运行 ----------
+
+def list_manifests(directory: Path = MANIFEST_DIR) -> list[Path]:
+    return sorted(Path(directory).glob("run_*.json"), key=lambda p: p.stat().st_mtime)
+
+
+def load_manifest(path: Path) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+DIFF_METRICS = ["wall_s", "cpu_user_s", "peak_rss_mb", "rows_in", "rows_out", "bytes_in", "bytes_out"]
+
+
+def diff_manifests(old: dict, new: dict) -> pd.DataFrame:
+    """
+    按步骤对比两次运行：每个指标给出 old / new / delta，另加 status 和是否回退（regressed）。
+    只有两次都真正运行过（status == "ran"）的步骤才比较时间和内存。
+    """
+    def frame(m):
+        df = pd.DataFrame(m["steps"])
+        if df.empty:
+            return pd.DataFrame(columns=["name", "status"] + DIFF_METRICS)
+        for col in DIFF_METRICS:
+            if col not in df.columns:
+                df[col] = None
+        return df[["name", "status"] + DIFF_METRICS].set_index("name")
+
+    a, b = frame(old), frame(new)
+    out = a.join(b, how="outer", lsuffix="_old", rsuffix="_new")
+    for col in DIFF_METRICS:
+        out[f"{col}_old"] = pd.to_numeric(out[f"{col}_old"], errors="coerce")
+        out[f"{col}_new"] = pd.to_numeric(out[f"{col}_new"], errors="coerce")
+        out[f"{col}_delta"] = out[f"{col}_new"] - out[f"{col}_old"]
+
+    both_ran = (out["status_old"] == "ran") & (out["status_new"] == "ran")
+    slower = out["wall_s_new"] > out["wall_s_old"] * REGRESSION_RATIO
+    out["regressed"] = both_ran & slower & (out["wall_s_delta"] > MIN_DELTA_S)
+    return out.reset_index()
+
+
+def print_diff(old_path: Path, new_path: Path):
+    old, new = load_manifest(old_path), load_manifest(new_path)
+    df = diff_manifests(old, new)
+
+    print(f"旧：{old_path}（{old.get('started_at')}，{old.get('mode')}，总计 {old.get('total_wall_s')}s）")
+    print(f"新：{new_path}（{new.get('started_at')}，{new.get('mode')}，总计 {new.get('total_wall_s')}s）\n")
+
+    cols = ["name", "status_old", "status_new",
+            "wall_s_old", "wall_s_new", "wall_s_delta",
+            "peak_rss_mb_old", "peak_rss_mb_new",
+            "rows_out_old", "rows_out_new", "bytes_out_delta"]
+    view = df.sort_values("wall_s_delta", ascending=False, na_position="last")
+    with pd.option_context("display.width", 200, "display.max_rows", None):
+        print(view[cols].to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+
+    regressed = df.loc[df["regressed"], "name"].tolist()
+    changed_rows = df.loc[df["rows_out_delta"].fillna(0) != 0, "name"].tolist()
+    print()
+    if regressed:
+        print(f"⚠️ 变慢的步骤（>{REGRESSION_RATIO:.0%} 且 >{MIN_DELTA_S}s）：{regressed}")
+    else:
+        print("没有明显变慢的步骤。")
+    if changed_rows:
+        print(f"输出行数有变化的步骤：{changed_rows}")
+    return df
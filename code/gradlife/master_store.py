@@ -0,0 +1,280 @@
+"""
+master_store.py
+
+主表 master_person_wide 的紧凑列式存储：按列组分开存，以 resp_id 为键。
+
+原来主表存成 CSV（3,253 行约 850 KB）：
+"High supervisor / High institution"、"Doctorate"、"More than 7 years" 这样的标签每行重复一遍，
+0/1 标记存成 float，读进来又全是 object / float64。现在统一按下面的 schema 存成 Parquet：
+
+- resp_id：int32
+- 标签 / 文本列（degree_label、region_continent、*_cat、support_quadrant_label ……）：category
+  （Parquet 中为字典编码，每个不同的标签只存一次）
+- *_flag、high_stress_group、*_code、*_code_int、*_num：可空小整数（Int8，放不下时 Int16 / Int32；
+  有非整数值的 *_num 退为 float32）
+- *_z、*_raw、*_years、worklife_score：float32
+
+92 / 97 原来各自读入整张主表、补几列、再整张写回：每次补列都是 O(全表)，两个补列脚本同时跑还会互相覆盖。
+现在主表是目录 99_master/master_person_wide/ 下的几个列组文件（GROUPS），每个都带 resp_id：
+
+- core（90）：学位、高压组、学制 / 进度
+- worklife（90）：工时、work-life 得分和各种标记
+- support（90）：支持题原始分、支持指数与象限
+- geography（90 写 region_continent 等，97 补 country_name）
+- demographics（92）：学位准备程度、照护责任
+
+补列的脚本只写自己的列组（write_group / add_columns，先写临时文件再替换）。
+read_master 按需读取用到的列组，按 resp_id 拼成一张表；各组 resp_id 顺序相同时直接拼列，不做连接：
+
+    from gradlife.master_store import read_master, write_group
+    master = read_master(["resp_id", "degree_label", "high_stress_group"])
+
+注意：标签列是 category，fillna 用 fill_label()，groupby 时加 observed=True。
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from gradlife import session, tracking
+from gradlife.keys import ID_COL, align, attach
+
+MASTER_DIR = Path("/workspace/output/99_master")
+GROUP_DIR = MASTER_DIR / "master_person_wide"
+# 旧格式：整张主表一个文件，只在没有列组文件时兜底
+MASTER_PARQUET = MASTER_DIR / "master_person_wide.parquet"
+MASTER_CSV = MASTER_DIR / "master_person_wide.csv"
+
+# 列组 → 列（不含 resp_id）；顺序即 read_master() 拼接的列顺序。没列出的列写进 core
+GROUPS = {
+    "core": ["degree_label", "degree_code_int", "high_stress_group",
+             "degree_duration_text", "degree_duration_years",
+             "degree_progress_text", "degree_progress_years"],
+    "worklife": ["hours_level", "v089", "v089_code", "worklife_score", "v084_num",
+                 "high_hours_flag", "low_worklife_flag", "high_hours_only_flag",
+                 "low_worklife_only_flag", "both_high_hours_and_low_wlb_flag"],
+    "support": ["v079_num", "v091_num", "v097_num", "v100_num", "v101_num",
+                "supervisor_support_raw", "institution_support_raw",
+                "supervisor_z", "institution_z", "supervisor_cat", "institution_cat",
+                "support_quadrant_label"],
+    "demographics": ["degree_prep_code", "degree_prep_label",
+                     "caring_responsibility_code", "caring_responsibility_label"],
+    "geography": ["region_continent", "study_in_home_country", "study_in_home_country_flag",
+                  "country_name"],
+}
+GROUP_OF = {col: group for group, cols in GROUPS.items() for col in cols}
+
+SMALL_INT_COLS = {"high_stress_group", "degree_code_int"}
+SMALL_INT_SUFFIXES = ("_flag", "_code", "_code_int", "_num")
+FLOAT32_COLS = {"worklife_score"}
+FLOAT32_SUFFIXES = ("_z", "_raw", "_years")
+
+
+def _small_int(s: pd.Series) -> pd.Series:
+    """整数值的数值列 → 能放下的最小可空整数类型；有小数的退为 float32。"""
+    num = pd.to_numeric(s, errors="coerce")
+    values = num.dropna().to_numpy(dtype="float64")
+    if len(values) and not np.all(values == np.round(values)):
+        return num.astype("float32")
+    lo, hi = (values.min(), values.max()) if len(values) else (0, 0)
+    for dtype in ("Int8", "Int16", "Int32"):
+        info = np.iinfo(dtype.lower())
+        if info.min <= lo and hi <= info.max:
+            return num.astype(dtype)
+    return num.astype("Int64")
+
+
+def to_master_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """按主表 schema 整理列类型（见模块说明）；不认识的数值列保持不变。"""
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if col == ID_COL:
+            out[col] = pd.to_numeric(s).astype("int32")
+        elif col in SMALL_INT_COLS or col.endswith(SMALL_INT_SUFFIXES):
+            out[col] = _small_int(s)
+        elif col in FLOAT32_COLS or col.endswith(FLOAT32_SUFFIXES):
+            out[col] = pd.to_numeric(s, errors="coerce").astype("float32")
+        elif isinstance(s.dtype, pd.CategoricalDtype) or pd.api.types.is_numeric_dtype(s) \
+                or pd.api.types.is_bool_dtype(s):
+            out[col] = s
+        else:
+            out[col] = s.astype("string").astype("category")
+    return pd.DataFrame(out, index=df.index)
+
+
+def group_path(group: str) -> Path:
+    """列组文件路径（Parquet）；没装 pyarrow 时写的是同名 .csv。"""
+    return GROUP_DIR / f"{group}.parquet"
+
+
+def _existing_file(group: str):
+    path = group_path(group)
+    if path.exists():
+        return path
+    csv = path.with_suffix(".csv")
+    return csv if csv.exists() else None
+
+
+def write_group(group: str, df: pd.DataFrame) -> Path:
+    """
+    整组写出一个列组（resp_id + df 的其他列），其他列组不动，返回实际写出的路径。
+    先写临时文件再 os.replace，读的一方不会读到写了一半的文件。
+    """
+    if ID_COL not in df.columns:
+        raise KeyError(f"写出列组 {group} 需要 {ID_COL} 列。")
+    others = sorted({GROUP_OF[c] for c in df.columns if GROUP_OF.get(c, group) != group})
+    if others:
+        wrong = [c for c in df.columns if GROUP_OF.get(c, group) != group]
+        raise ValueError(f"列 {wrong} 属于列组 {others}，不能写进 {group}。")
+
+    cols = [ID_COL] + [c for c in df.columns if c != ID_COL]
+    store = to_master_dtypes(df[cols])
+    GROUP_DIR.mkdir(parents=True, exist_ok=True)
+    path = group_path(group)
+    csv = path.with_suffix(".csv")
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        store.to_parquet(tmp, index=False)
+    except ImportError:
+        print(f"⚠️ 未安装 pyarrow，改为写出 CSV：{csv}")
+        store.to_csv(tmp, index=False)
+        os.replace(tmp, csv)
+        if path.exists():
+            path.unlink()  # 旧的 Parquet 会优先被读到，必须删掉
+        return csv
+    os.replace(tmp, path)
+    if csv.exists():
+        csv.unlink()
+    return path
+
+
+def write_master(df: pd.DataFrame) -> list[Path]:
+    """
+    把整张主表按 GROUPS 拆开写出（90 用），返回写出的列组文件。
+    df 中没有列的列组不写（比如 demographics 由 92 负责）。旧格式的单文件主表会被删掉。
+    """
+    by_group = {}
+    for col in df.columns:
+        if col != ID_COL:
+            by_group.setdefault(GROUP_OF.get(col, "core"), []).append(col)
+    unlisted = [c for c in by_group.get("core", []) if c not in GROUP_OF]
+    if unlisted:
+        print(f"⚠️ 这些列没有在 GROUPS 中登记，写进 core：{unlisted}")
+
+    paths = [write_group(group, df[[ID_COL] + by_group[group]])
+             for group in GROUPS if group in by_group]
+    for old in (MASTER_PARQUET, MASTER_CSV):
+        if old.exists():
+            old.unlink()  # 旧格式会和新数据不一致，删掉避免误读
+    return paths
+
+
+def add_columns(group: str, df: pd.DataFrame) -> Path:
+    """
+    把 df 的列（按 resp_id）补进一个列组并写回，只读写这一个列组。
+    已有的同名列原位覆盖；列组还不存在时以 core 的 resp_id 为行。
+    """
+    if _existing_file(group) is not None:
+        base = read_master(None, groups=[group])
+    else:
+        base = read_master([ID_COL])
+    base = attach(base, df, [c for c in df.columns if c != ID_COL],
+                  left_name=f"master_person_wide/{group}", right_name="新增列")
+    return write_group(group, base)
+
+
+def _load_group(path: Path) -> pd.DataFrame:
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    return to_master_dtypes(pd.read_csv(path, low_memory=False))
+
+
+def _group_names(path: Path) -> list[str]:
+    tracking.record(path, [tracking.SCHEMA])
+    if path.suffix == ".parquet" and not session.is_active():
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(path).names)
+    return list(session.cached_frame(path, _load_group).columns)
+
+
+def _read_group(path: Path, columns: list[str]) -> pd.DataFrame:
+    tracking.record(path, columns)
+    if session.is_active() or path.suffix != ".parquet":
+        return session.cached_frame(path, _load_group)[columns]
+    return pd.read_parquet(path, columns=columns)
+
+
+def _read_legacy(columns) -> pd.DataFrame:
+    path = MASTER_PARQUET if MASTER_PARQUET.exists() else MASTER_CSV
+    print(f"⚠️ 未找到列组目录 {GROUP_DIR}，改读旧格式主表：{path}")
+    tracking.record(path, columns)
+    full = session.cached_frame(path, _load_group)
+    if columns is None:
+        return full.copy()
+    return full[[c for c in columns if c in full.columns]].copy()
+
+
+def read_master(columns=None, groups=None) -> pd.DataFrame:
+    """
+    读取主表。columns=None 读全部列；传入列名列表时只读这些列（不存在的列会被忽略并提示）。
+    只读用到的列组，按 core 的 resp_id 顺序拼接（某组的 resp_id 与 core 不同时按 resp_id 对齐）。
+    groups 可限定只看哪几个列组（默认全部）。
+    session 模式下每个列组文件只读一次（被改写后自动重读），列投影在内存里做。
+    """
+    groups = list(GROUPS) if groups is None else list(groups)
+    files = {g: _existing_file(g) for g in groups}
+    files = {g: p for g, p in files.items() if p is not None}
+    if not files:
+        if _existing_file("core") is None and (MASTER_PARQUET.exists() or MASTER_CSV.exists()):
+            return _read_legacy(columns)
+        raise FileNotFoundError(f"没有找到主表列组文件（{GROUP_DIR}），请先运行 90_build_master_person.py。")
+
+    # 每列取第一个含有它的列组
+    owner = {}
+    for group, path in files.items():
+        for col in _group_names(path):
+            if col != ID_COL:
+                owner.setdefault(col, group)
+
+    if columns is None:
+        wanted = list(owner)
+    else:
+        columns = list(dict.fromkeys(columns))  # 去重且保持顺序
+        missing = [c for c in columns if c != ID_COL and c not in owner]
+        if missing:
+            print(f"⚠️ master_person_wide 中没有这些列，将忽略：{missing}")
+        wanted = [c for c in columns if c in owner]
+
+    need = {}
+    for col in wanted:
+        need.setdefault(owner[col], []).append(col)
+
+    # 行以 core 为准（core 不在 groups 里时以第一个列组为准）
+    base_group = "core" if "core" in files else next(iter(files))
+    base_ids = _read_group(files[base_group], [ID_COL])[ID_COL]
+    data = {ID_COL: base_ids}
+    for group, cols in need.items():
+        part = _read_group(files[group], [ID_COL] + cols)
+        pos = align(base_ids.to_numpy(), part[ID_COL].to_numpy())
+        if (pos < 0).any() or not np.array_equal(pos, np.arange(len(pos))):
+            part = part.reset_index(drop=True).reindex(pos)  # 位置 -1 → 缺失值
+        for col in cols:
+            data[col] = part[col].set_axis(base_ids.index)
+
+    order = [ID_COL] + wanted if columns is None or ID_COL in columns else wanted
+    out = pd.DataFrame(data, copy=False)[order]
+    return out.copy() if session.is_active() else out
+
+
+def fill_label(s: pd.Series, value) -> pd.Series:
+    """标签列的 fillna：category 列先把 value 加进类别再填。"""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        if value not in s.cat.categories:
+            s = s.cat.add_categories([value])
+    return s.fillna(value)
@@ -0,0 +1,76 @@
+"""
+session.py
+
+单进程 “session” 模式下共享的内存表。
+
+平时每个编号脚本是独立进程，typed_clean、metadata、worklife_derived_vars、
+region_worklife_derived、master_person_wide 会被十几个脚本各自从磁盘重新解析一遍。
+run_pipeline.py --session 在同一个进程里依次运行这些脚本，并先调用 activate()：
+
+- read_csv(path)：同一个文件（大小、修改时间都没变）只解析一次，之后返回内存里的副本；
+  文件被后面的步骤改写（比如 master 被 92 / 97 原地改写）后会自动重新读取；
+- typed_store.read_typed：整张 typed_clean 只读一次，之后的列投影直接在内存里做。
+
+没有 activate() 时（单独运行某个脚本），read_csv 就是 pd.read_csv，什么都不缓存。
+每次返回的都是副本，脚本对它做的修改不会影响其他脚本。
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+from gradlife import tracking
+
+_ACTIVE = False
+_FRAMES: dict = {}     # {(绝对路径, 读取参数): (文件签名, DataFrame)}
+
+
+def activate():
+    """开启 session 模式（清空之前的缓存）。"""
+    global _ACTIVE
+    _ACTIVE = True
+    _FRAMES.clear()
+
+
+def deactivate():
+    global _ACTIVE
+    _ACTIVE = False
+    _FRAMES.clear()
+
+
+def is_active() -> bool:
+    return _ACTIVE
+
+
+def _signature(path: Path):
+    st = path.stat()
+    return (st.st_size, st.st_mtime_ns)
+
+
+def cached_frame(path: Path, loader, key_extra="") -> pd.DataFrame:
+    """
+    session 模式下按 (路径, key_extra) 缓存 loader(path) 的结果，文件变了就重新加载。
+    返回缓存对象本身（调用方负责复制）；不在 session 模式时直接调用 loader。
+    """
+    path = Path(path)
+    if not _ACTIVE:
+        return loader(path)
+    key = (str(path.resolve()), key_extra)
+    sig = _signature(path)
+    hit = _FRAMES.get(key)
+    if hit is not None and hit[0] == sig:
+        return hit[1]
+    df = loader(path)
+    _FRAMES[key] = (sig, df)
+    return df
+
+
+def read_csv(path, **kwargs) -> pd.DataFrame:
+    """pd.read_csv；session 模式下同一文件只解析一次。"""
+    tracking.record(path)
+    if not _ACTIVE:
+        return pd.read_csv(path, **kwargs)
+    df = cached_frame(path, lambda p: pd.read_csv(p, **kwargs), repr(sorted(kwargs.items())))
+    return df.copy()
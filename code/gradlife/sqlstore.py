@@ -0,0 +1,151 @@
+"""
+sqlstore.py
+
+嵌入式分析库：把主表和量表长表装进一个 SQLite 文件，新问题写成一条带参数的查询，
+不用再为每个交叉表写一个编号脚本和一段 groupby。
+
+库里的表（99_build_sql_store.py 从最新的输出重建）：
+- master        ：read_master() 的整张主表（标签列存 TEXT，标记 / 编码存 INTEGER）
+- likert_long   ：resp_id, item_id, score（窄事实表）
+- likert_items  ：item_id, item_code, q_no, scale_group, item_text, item_short
+- likert        ：视图，likert_long 接上 likert_items 和 master 的常用维度
+
+索引建在 master 的 degree_label、region_continent、country_name、high_stress_group
+（存在的列才建）和 likert_long 的 item_id、resp_id 上。
+
+    from gradlife.sqlstore import crosstab, query
+    query("SELECT degree_label, AVG(worklife_score) FROM master GROUP BY 1")
+    crosstab("support_quadrant_label", by=["degree_label"])   # 每个 degree_label 内的百分比
+    crosstab("degree_prep_label", where="region_continent = ?", params=["Europe"])
+
+列名不能作为 SQL 参数，crosstab 会先核对列名是否存在于表中；取值一律用 ? 参数传入。
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from gradlife.keys import ID_COL
+
+DB_PATH = Path("/workspace/output/99_master/gradlife.sqlite")
+
+INDEX_COLS = ["degree_label", "region_continent", "country_name", "high_stress_group"]
+# likert 视图从 master 带过去的维度列（存在的列才带）
+VIEW_DIM_COLS = ["degree_label", "region_continent", "country_name", "high_stress_group"]
+
+
+def _to_sql_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """category / 可空整数 → SQLite 能直接存的 object / int / float（缺失值写成 NULL）。"""
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(s):
+            out[col] = s.astype(object).where(s.notna(), None)
+        elif pd.api.types.is_extension_array_dtype(s) and pd.api.types.is_integer_dtype(s):
+            out[col] = s.astype(object).where(s.notna(), None)
+        else:
+            out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def build_db(master: pd.DataFrame, fact: pd.DataFrame, items: pd.DataFrame, path: Path = DB_PATH) -> Path:
+    """
+    重建整个库：先写到临时文件，建好表、索引和视图后再替换，
+    重建过程中正在跑的查询仍然读旧文件。
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    if tmp.exists():
+        tmp.unlink()
+
+    con = sqlite3.connect(tmp)
+    try:
+        _to_sql_frame(master).to_sql("master", con, index=False)
+        _to_sql_frame(items).to_sql("likert_items", con, index=False)
+        fact.to_sql("likert_long", con, index=False)
+
+        con.execute(f"CREATE UNIQUE INDEX idx_master_{ID_COL} ON master({ID_COL})")
+        for col in INDEX_COLS:
+            if col in master.columns:
+                con.execute(f"CREATE INDEX idx_master_{col} ON master({col})")
+        con.execute("CREATE UNIQUE INDEX idx_items_item_id ON likert_items(item_id)")
+        con.execute("CREATE INDEX idx_long_item_id ON likert_long(item_id)")
+        con.execute(f"CREATE INDEX idx_long_{ID_COL} ON likert_long({ID_COL})")
+
+        dims = "".join(f", m.{c}" for c in VIEW_DIM_COLS if c in master.columns)
+        con.execute(
+            f"""CREATE VIEW likert AS
+                SELECT l.{ID_COL}, i.item_id, i.item_code, i.q_no, i.scale_group,
+                       i.item_text, i.item_short, l.score{dims}
+                FROM likert_long l
+                JOIN likert_items i ON i.item_id = l.item_id
+                LEFT JOIN master m ON m.{ID_COL} = l.{ID_COL}"""
+        )
+        con.execute("ANALYZE")
+        con.commit()
+    finally:
+        con.close()
+    os.replace(tmp, path)
+    return path
+
+
+def connect(path: Path = DB_PATH) -> sqlite3.Connection:
+    """只读连接。"""
+    if not Path(path).exists():
+        raise FileNotFoundError(f"没有找到 {path}，请先运行 99_build_sql_store.py。")
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def query(sql: str, params=(), path: Path = DB_PATH) -> pd.DataFrame:
+    """执行一条查询（取值用 ? 占位符 + params 传入），返回 DataFrame。"""
+    con = connect(path)
+    try:
+        return pd.read_sql_query(sql, con, params=list(params))
+    finally:
+        con.close()
+
+
+def table_columns(table: str, path: Path = DB_PATH) -> list[str]:
+    """表或视图的列名。"""
+    con = connect(path)
+    try:
+        return [row[1] for row in con.execute("SELECT * FROM pragma_table_info(?)", [table])]
+    finally:
+        con.close()
+
+
+def crosstab(target: str, by=(), table: str = "master", stress_col: str = "high_stress_group",
+             where: str | None = None, params=(), dropna: bool = True, path: Path = DB_PATH) -> pd.DataFrame:
+    """
+    target × high_stress_group × by 的计数，以及在每个 (by, high_stress_group) 组合内的百分比：
+    列为 by..., high_stress_group, target, count, percent_within_group。
+
+    where 是附加的过滤条件（如 "degree_label = ?"），取值放在 params 里。
+    dropna=True 时去掉 target / 分组列为 NULL 的行。
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    groups = by + ([stress_col] if stress_col else [])
+    cols = groups + [target]
+    known = set(table_columns(table, path))
+    unknown = [c for c in cols if c not in known]
+    if unknown:
+        raise KeyError(f"{table} 中没有这些列：{unknown}")
+
+    conds = [f"{c} IS NOT NULL" for c in cols] if dropna else []
+    if where:
+        conds.append(f"({where})")
+    where_sql = ("WHERE " + " AND ".join(conds)) if conds else ""
+    sel = ", ".join(cols)
+    part = f"PARTITION BY {', '.join(groups)}" if groups else ""
+
+    sql = f"""
+        SELECT {sel}, count,
+               100.0 * count / SUM(count) OVER ({part}) AS percent_within_group
+        FROM (SELECT {sel}, COUNT(*) AS count FROM {table} {where_sql} GROUP BY {sel})
+        ORDER BY {sel}
+    """
+    return query(sql, params, path)
@@ -0,0 +1,207 @@
+"""
+steps.py
+
+流水线各步骤的声明：每个编号脚本读哪些文件、写哪些文件（路径相对于 /workspace）。
+gradlife.dag 根据这里的声明建依赖图，run_pipeline.py 负责执行。
+
+约定：
+- 列表顺序就是原来手动运行的顺序，依赖图的拓扑排序在并列时沿用这个顺序；
+- 同一个文件被多个步骤写（如主表的 geography 列组被 90 → 97 原地改写），
+  原地改写的步骤读的是“上一个写它的步骤”的版本，其他步骤读最终版本；
+- 编码题 × 高压组的话题步骤（14_<话题>_vs_worklife）按 gradlife.topics.TOPICS 生成，
+  都运行 14_coded_topic_vs_worklife.py，新增话题不用改这里；
+- 只打印、不写文件的检查 / 汇总脚本（13、15、19、21）也列在这里，
+  输入没变时同样跳过；
+- 不在这里的脚本（00、03_check、04、06–11 的查找脚本、36 复制到网站目录等）需要手动运行。
+
+COLUMN_HASHERS 列出按列记录哈希的共享表：脚本只通过 read_typed / codebook / read_master 读了其中几列时，
+只有这几列变了才重跑（见 gradlife.tracking）。
+"""
+
+from __future__ import annotations
+
+from gradlife.dag import Step
+from gradlife.topics import TOPICS, generic_topics
+from gradlife.tracking import codebook_column_hashes, metadata_column_hashes, parquet_column_hashes
+
+TYPED = "output/02_typed_clean/data_step2_typed_clean.parquet"
+META2 = "output/02_typed_clean/metadata_step2_typed_clean.csv"
+CODEBOOK = "output/02_typed_clean/codebook.pkl"
+WORKLIFE = "output/04_worklife/worklife_derived_vars.csv"
+REGION = "output/05_region/region_worklife_derived.csv"
+MASTER_DIR = "output/99_master/master_person_wide/"
+MASTER_CORE = MASTER_DIR + "core.parquet"
+MASTER_WORKLIFE = MASTER_DIR + "worklife.parquet"
+MASTER_SUPPORT = MASTER_DIR + "support.parquet"
+MASTER_DEMO = MASTER_DIR + "demographics.parquet"
+MASTER_GEO = MASTER_DIR + "geography.parquet"
+# read_master 拼出的整张主表；读者按实际读到的列判断是否需要重跑
+MASTER = [MASTER_CORE, MASTER_WORKLIFE, MASTER_SUPPORT, MASTER_DEMO, MASTER_GEO]
+LIKERT_LONG = "output/99_master/likert_long.parquet"
+LIKERT_ITEMS = "output/99_master/likert_items.csv"
+SQL_DB = "output/99_master/gradlife.sqlite"
+SUPPORT_SCALING = "output/99_master/support_scaling.json"
+BITMAP_INDEX = "output/99_master/bitmap_index.npz"
+CUBE = "output/99_master/high_stress_cube.parquet"
+ITEM_CUBE = "output/99_master/likert_cube.parquet"
+CUBE_MEMBERS = "output/99_master/cube_members.parquet"
+VIZ = "output/08_viz_data/"
+
+SUPPORT_NUM = ["v079_num", "v091_num", "v097_num", "v100_num", "v101_num"]
+
+TOPIC_SCRIPT = "14_coded_topic_vs_worklife.py"
+
+
+def topic_steps():
+    """TOPICS 里每个没有专门脚本的话题一个步骤：14_coded_topic_vs_worklife.py <话题名>。"""
+    return [Step(f"14_{name}_vs_worklife",
+                 inputs=[TYPED, META2, CODEBOOK, WORKLIFE],
+                 outputs=[TOPICS[name].rel],
+                 script=TOPIC_SCRIPT, args=[name])
+            for name in generic_topics()]
+
+
+STEPS = [
+    Step("01_prepare_headers",
+         inputs=["data/data.xlsx"],
+         outputs=["output/01_cleaning/data_step1_raw_clean.csv",
+                  "output/01_cleaning/metadata_step1_basic.csv",
+                  "output/01_cleaning/data_step1_chunks"]),
+    Step("02_clean_by_qtype",
+         inputs=["output/01_cleaning/data_step1_raw_clean.csv",
+                 "output/01_cleaning/metadata_step1_basic.xlsx"],
+         outputs=[TYPED, META2, CODEBOOK]),
+    Step("03_descriptives_export",
+         inputs=[TYPED, META2, CODEBOOK],
+         outputs=["output/03_descriptives/single_freq_long.csv",
+                  "output/03_descriptives/likert_freq_long.csv",
+                  "output/03_descriptives/multiple_freq_long.csv"]),
+    Step("05_worklife_analysis",
+         inputs=[TYPED],
+         outputs=[WORKLIFE,
+                  "output/04_worklife/high_stress_overall.csv",
+                  "output/04_worklife/high_stress_by_degree.csv"]),
+    Step("12_label_high_stress_by_degree",
+         inputs=[META2, CODEBOOK, "output/04_worklife/high_stress_by_degree.csv"],
+         outputs=["output/04_worklife/high_stress_by_degree_labeled.csv"]),
+    Step("13_summarize_high_stress_by_degree",
+         inputs=["output/04_worklife/high_stress_by_degree_labeled.csv"]),
+    *topic_steps(),
+    Step("15_summarize_debt_vs_worklife",
+         inputs=["output/05_debt/debt_vs_high_stress.csv"]),
+    Step("19_summarize_mental_help_vs_worklife",
+         inputs=["output/06_mental_health/mental_help_vs_high_stress.csv"]),
+    Step("21_summarize_bullying_vs_worklife",
+         inputs=["output/07_bullying/bullying_vs_high_stress.csv"]),
+    Step("22_export_viz_degree",
+         inputs=["output/04_worklife/high_stress_by_degree_labeled.csv"],
+         outputs=[VIZ + "viz_degree_high_stress.csv"]),
+    Step("23_export_viz_debt",
+         inputs=["output/05_debt/debt_vs_high_stress.csv"],
+         outputs=[VIZ + "viz_debt_high_stress.csv"]),
+    Step("24_export_viz_mental_help",
+         inputs=["output/06_mental_health/mental_help_vs_high_stress.csv"],
+         outputs=[VIZ + "viz_mental_help_high_stress.csv"]),
+    Step("25_export_viz_bullying",
+         inputs=["output/07_bullying/bullying_vs_high_stress.csv"],
+         outputs=[VIZ + "viz_bullying_high_stress.csv"]),
+    Step("28_satisfaction_vs_worklife",
+         inputs=[TYPED, WORKLIFE],
+         outputs=["output/06_satisfaction/q23_decision_satisfaction_vs_high_stress.csv",
+                  "output/06_satisfaction/q25_experience_satisfaction_vs_high_stress.csv",
+                  "output/06_satisfaction/viz_satisfaction_high_stress.csv"]),
+    Step("30_support_vs_worklife",
+         inputs=[TYPED, WORKLIFE],
+         outputs=[f"output/07_support/{c}_vs_high_stress.csv" for c in SUPPORT_NUM]
+                 + ["output/07_support/viz_support_high_stress.csv"]),
+    Step("31_support_vs_worklife_by_degree",
+         inputs=[TYPED, META2, CODEBOOK, WORKLIFE],
+         outputs=[f"output/07_support/{c}_vs_high_stress_by_degree.csv" for c in SUPPORT_NUM]
+                 + ["output/07_support/viz_support_high_stress_by_degree.csv"]),
+    Step("34_build_region_var",
+         inputs=[TYPED, WORKLIFE],
+         outputs=["output/05_region/region_vs_high_stress.csv", REGION]),
+    Step("35_region_for_viz",
+         inputs=["output/05_region/region_vs_high_stress.csv"],
+         outputs=[VIZ + "viz_region_high_stress.csv"]),
+    Step("37_country_high_stress_for_viz",
+         inputs=[REGION],
+         outputs=[VIZ + "viz_country_high_stress.csv"]),
+    Step("39_harassment_vs_worklife",
+         inputs=[TYPED, META2, CODEBOOK, WORKLIFE],
+         outputs=["output/07_harassment/harassment_vs_high_stress.csv"]),
+    Step("40_harassment_viz_export",
+         inputs=["output/07_harassment/harassment_vs_high_stress.csv"],
+         outputs=[VIZ + "viz_harassment_high_stress.csv"]),
+    Step("42_satisfaction_change_vs_worklife",
+         inputs=[TYPED, WORKLIFE],
+         outputs=["output/06_satisfaction/satisfaction_change_vs_high_stress.csv",
+                  VIZ + "viz_satisfaction_change_high_stress.csv"]),
+    Step("43_mental_help_vs_worklife_by_degree",
+         inputs=[TYPED, META2, CODEBOOK, WORKLIFE],
+         outputs=["output/06_mental_health/mental_help_vs_high_stress_by_degree.csv"]),
+    Step("44_mental_help_viz_export_by_degree",
+         inputs=["output/06_mental_health/mental_help_vs_high_stress_by_degree.csv"],
+         outputs=[VIZ + "viz_mental_help_by_degree_high_stress.csv"]),
+    Step("45_support_quadrant_prep",
+         inputs=[TYPED, WORKLIFE],
+         outputs=["output/07_support/support_quadrant_high_stress.csv",
+                  VIZ + "viz_support_quadrant_high_stress.csv"]),
+    Step("46_support_quadrant_by_deg_region",
+         inputs=[TYPED, WORKLIFE, REGION],
+         outputs=["output/07_support/support_quadrant_by_deg_region_high_stress.csv",
+                  VIZ + "viz_support_quadrant_by_deg_region_high_stress.csv"]),
+    Step("47_hours_vs_high_stress",
+         inputs=[WORKLIFE],
+         outputs=["output/10_hours/hours_vs_high_stress.csv",
+                  "output/10_hours/hours_distribution_by_stress.csv",
+                  VIZ + "viz_hours_high_stress_by_hours_level.csv",
+                  VIZ + "viz_hours_distribution_by_stress.csv"]),
+    Step("48_hours_person_level_for_viz",
+         inputs=[WORKLIFE, REGION],
+         outputs=[VIZ + "viz_hours_person_level.csv"]),
+    Step("90_build_master_person",
+         inputs=[TYPED, WORKLIFE, REGION],
+         outputs=[MASTER_CORE, MASTER_WORKLIFE, MASTER_SUPPORT, MASTER_GEO, SUPPORT_SCALING]),
+    Step("91_build_likert_long",
+         inputs=[TYPED, META2, MASTER_CORE],
+         outputs=[LIKERT_LONG, LIKERT_ITEMS]),
+    Step("92_add_demographics_to_master",
+         inputs=[TYPED, META2, MASTER_CORE],
+         outputs=[MASTER_DEMO]),
+    Step("93_build_high_stress_cube",
+         inputs=MASTER + [LIKERT_LONG],
+         outputs=[CUBE, ITEM_CUBE, CUBE_MEMBERS]),
+    Step("94_export_viz_satisfaction_from_master",
+         inputs=MASTER + [LIKERT_LONG, LIKERT_ITEMS],
+         outputs=[VIZ + "viz_satisfaction_by_stress.csv",
+                  "output/11_satisfaction_master/satisfaction_by_stress.csv"]),
+    Step("95_export_viz_satisfaction_by_deg_region",
+         inputs=MASTER + [LIKERT_LONG, LIKERT_ITEMS],
+         outputs=[VIZ + "viz_satisfaction_by_stress_deg_region.csv",
+                  "output/11_satisfaction_master/satisfaction_by_stress_deg_region.csv"]),
+    Step("96_export_viz_support_from_master",
+         inputs=MASTER + [LIKERT_LONG, LIKERT_ITEMS],
+         outputs=[VIZ + "viz_support_by_stress.csv",
+                  "output/12_support_master/support_by_stress.csv"]),
+    Step("97_add_country_gender_labels_to_master",
+         inputs=[REGION, MASTER_GEO],
+         outputs=[MASTER_GEO]),
+    Step("98_export_viz_support_by_deg_region",
+         inputs=MASTER + [LIKERT_LONG, LIKERT_ITEMS],
+         outputs=[VIZ + "viz_support_by_stress_deg_region.csv",
+                  "output/12_support_master/support_by_stress_deg_region.csv"]),
+    Step("99_build_sql_store",
+         inputs=MASTER + [LIKERT_LONG, LIKERT_ITEMS],
+         outputs=[SQL_DB]),
+    Step("99_build_bitmap_index",
+         inputs=MASTER,
+         outputs=[BITMAP_INDEX]),
+]
+
+COLUMN_HASHERS = {
+    TYPED: parquet_column_hashes,
+    **{rel: parquet_column_hashes for rel in MASTER},
+    META2: metadata_column_hashes,
+    CODEBOOK: codebook_column_hashes,
+}
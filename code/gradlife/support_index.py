@@ -0,0 +1,95 @@
+"""
+support_index.py
+
+导师 / 学校支持指数和支持象限（90 建主表时用，93_append_wave_to_cubes.py 给新一批受访者分象限时也用）：
+
+    supervisor_support_raw  = mean(v079_num, v091_num)
+    institution_support_raw = mean(v097_num, v100_num, v101_num)
+    *_z   = (raw - 全体均值) / 全体标准差
+    *_cat = Low (z <= -0.5) / Medium / High (z >= 0.5)
+    support_quadrant_label = "{导师档} supervisor / {学校档} institution"
+
+z 分数用的均值和标准差来自 90 建主表时的全体受访者，90 把它们写进 SCALING_PATH；
+新一批受访者到来时用这份参数打分，不在这一批内部重新标准化（一小批人自己的均值 / 标准差
+和全体不同，同一个原始分会被分到不同的档）。
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SCALING_PATH = Path("/workspace/output/99_master/support_scaling.json")
+
+SUP_VARS = ["v079_num", "v091_num"]
+INST_VARS = ["v097_num", "v100_num", "v101_num"]
+INDICES = {"supervisor": SUP_VARS, "institution": INST_VARS}
+
+Z_CUT = 0.5
+
+
+def raw_scores(df: pd.DataFrame) -> dict:
+    """{"supervisor": 原始指数, "institution": 原始指数}（各题数值的均值，忽略缺失）。"""
+    missing = [c for cols in INDICES.values() for c in cols if c not in df.columns]
+    if missing:
+        raise KeyError(f"构造支持指数需要这些列，但数据中没有：{missing}")
+    return {name: df[cols].apply(pd.to_numeric, errors="coerce").mean(axis=1, skipna=True)
+            for name, cols in INDICES.items()}
+
+
+def fit_scaling(raw: dict) -> dict:
+    """全体受访者原始指数的 {指数: {"mean": 均值, "std": 样本标准差}}。"""
+    return {name: {"mean": float(s.mean(skipna=True)), "std": float(s.std(skipna=True))}
+            for name, s in raw.items()}
+
+
+def standardize(s: pd.Series, mean: float, std: float) -> pd.Series:
+    """(x - mean) / std；std 为 0 或缺失时全为 NaN。"""
+    if std == 0 or np.isnan(std):
+        return pd.Series(np.nan, index=s.index)
+    return (s - mean) / std
+
+
+def categorize_z(z: pd.Series) -> pd.Series:
+    """z <= -0.5 → Low，z >= 0.5 → High，其余 → Medium，缺失保持缺失。"""
+    v = z.to_numpy(dtype="float64", na_value=np.nan)
+    out = np.select([v <= -Z_CUT, v >= Z_CUT], ["Low", "High"], "Medium").astype(object)
+    out[np.isnan(v)] = pd.NA
+    return pd.Series(out, index=z.index, dtype=object)
+
+
+def support_columns(df: pd.DataFrame, scaling: dict) -> pd.DataFrame:
+    """
+    支持指数的全部列：supervisor_support_raw / institution_support_raw、*_z、*_cat
+    和 support_quadrant_label（index 与 df 相同）。
+    """
+    raw = raw_scores(df)
+    out = {}
+    for name, s in raw.items():
+        out[f"{name}_support_raw"] = s
+    for name, s in raw.items():
+        out[f"{name}_z"] = standardize(s, scaling[name]["mean"], scaling[name]["std"])
+    for name in raw:
+        out[f"{name}_cat"] = categorize_z(out[f"{name}_z"])
+    out["support_quadrant_label"] = (
+        out["supervisor_cat"].astype("string")
+        + " supervisor / "
+        + out["institution_cat"].astype("string")
+        + " institution"
+    )
+    return pd.DataFrame(out, index=df.index)
+
+
+def write_scaling(scaling: dict, path: Path = SCALING_PATH) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(scaling, indent=2, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def read_scaling(path: Path = SCALING_PATH) -> dict:
+    if not path.exists():
+        raise FileNotFoundError(f"没有找到 {path}，请先运行 90_build_master_person.py。")
+    return json.loads(path.read_text(encoding="utf-8"))
@@ -0,0 +1,180 @@
+"""
+textio.py
+
+metadata 表（CSV / Excel）的读取：一次判断编码 + 一次修复乱码 + 结果缓存。
+
+原来的做法：
+- 02_clean_by_qtype.read_csv_safely 依次用 utf-8 / utf-8-sig / latin1 把整个文件各解析一遍，
+  直到某个编码不报错；
+- 00_meta_csv_to_xlsx 写死 latin1。
+UTF-8 文件被当成 latin1 读，就会出现 "Masterâ\\x80\\x99s"、"â€”"、"LÃ­ngua" 这类乱码，
+后面的脚本（比如 96 / 98 的 make_item_short）只能逐个特判。
+
+这里：
+- sniff_encoding()：只读文件开头一段字节（SNIFF_BYTES），先看 BOM，再试 utf-8，
+  都不行就用 cp1252 / latin1；整个文件只解析一次。样本之后才出现的非 UTF-8 字节
+  会让解析报 UnicodeDecodeError，这时对整个文件重新判断一次编码再解析。
+- repair_mojibake()：把“UTF-8 字节被当成 cp1252 / latin1 解码”产生的字符序列还原，
+  每个不同的字符串只处理一次。
+- read_table_clean()：读 CSV / Excel → 修复所有文本列 → 在原文件旁边缓存一个 pickle
+  （.<文件名>.clean.pkl）。文件大小和修改时间不变时，下次直接读缓存。
+
+    from gradlife.textio import read_table_clean
+    meta = read_table_clean(Path(".../metadata_step1_basic.xlsx"))
+"""
+
+from __future__ import annotations
+
+import codecs
+import re
+from pathlib import Path
+
+import pandas as pd
+
+SNIFF_BYTES = 64 * 1024    # 判断编码最多读文件开头 64 KB
+CACHE_VERSION = 1          # 修复规则有变化时 +1，让旧缓存失效
+
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+# cp1252 在 0x80–0x9F 放的字符（UTF-8 多字节序列的后续字节被 cp1252 解码后会变成它们）
+_CP1252_EXTRA = "".join(
+    bytes([b]).decode("cp1252", errors="ignore") for b in range(0x80, 0xA0)
+)
+# 乱码序列：一个 UTF-8 起始字节（Â–ô）+ 1–3 个后续字节（0x80–0xBF）
+# 后续字节可能被解码成 latin1 的控制字符 / 符号，也可能是 cp1252 的特殊字符
+_CONT = "\u0080-¿" + re.escape(_CP1252_EXTRA)
+MOJIBAKE_RE = re.compile(f"[Â-ô][{_CONT}]{{1,3}}")
+
+
+def sniff_encoding(path: Path, sample_bytes: int | None = SNIFF_BYTES) -> str:
+    """只看文件开头 sample_bytes 个字节判断编码；sample_bytes=None 时看整个文件。"""
+    with open(path, "rb") as f:
+        sample = f.read() if sample_bytes is None else f.read(sample_bytes)
+
+    for bom, enc in BOMS:
+        if sample.startswith(bom):
+            return enc
+
+    # 增量解码器：样本末尾被截断的半个字符不算错误（读到文件末尾时除外）
+    final = sample_bytes is None or len(sample) < sample_bytes
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=final)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    try:
+        sample.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin1"   # 任何字节都能解码
+
+
+def _fix_sequence(match: re.Match) -> str:
+    """把一段乱码字符还原成原来的字节，再按 UTF-8 解码；失败就原样返回。"""
+    seq = match.group(0)
+    raw = bytearray()
+    for ch in seq:
+        try:
+            raw += ch.encode("cp1252")
+        except UnicodeEncodeError:
+            raw += ch.encode("latin1")
+    try:
+        return raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return seq
+
+
+def repair_mojibake(text):
+    """修复单个字符串里的乱码；非字符串原样返回。"""
+    if not isinstance(text, str):
+        return text
+    return MOJIBAKE_RE.sub(_fix_sequence, text)
+
+
+def repair_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    修复所有文本列。每列先取不重复的值，只对含乱码特征的值调用 repair_mojibake，
+    再整列 map 回去。
+    """
+    df = df.copy()
+    for col in df.columns:
+        s = df[col]
+        if not (pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s)):
+            continue
+        uniques = pd.Series(s.dropna().unique())
+        uniques = uniques[uniques.map(lambda v: isinstance(v, str))]
+        dirty = uniques[uniques.str.contains(MOJIBAKE_RE, regex=True)]
+        if dirty.empty:
+            continue
+        fixes = {v: repair_mojibake(v) for v in dirty}
+        df[col] = s.map(lambda v: fixes.get(v, v) if isinstance(v, str) else v)
+    return df
+
+
+def _cache_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.clean.pkl")
+
+
+def _signature(path: Path, read_kwargs: dict) -> dict:
+    st = path.stat()
+    return {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "kwargs": repr(sorted(read_kwargs.items())),
+        "version": CACHE_VERSION,
+    }
+
+
+def read_table_clean(path: Path, use_cache: bool = True, **read_kwargs) -> pd.DataFrame:
+    """
+    读取 metadata 一类的小表（.csv / .xlsx / .xls），返回修复过乱码的 DataFrame。
+
+    - CSV：先 sniff_encoding，再只解析一次；开头的样本判断错了（后面出现 UnicodeDecodeError）
+      时按整个文件重新判断编码，再解析一次；
+    - Excel：编码由文件格式决定，只做乱码修复；
+    - 结果缓存在同目录的 .<文件名>.clean.pkl，原文件没变就直接读缓存。
+    read_kwargs 原样传给 pd.read_csv / pd.read_excel。
+    """
+    path = Path(path)
+    cache = _cache_path(path)
+    sig = _signature(path, read_kwargs)
+
+    if use_cache and cache.exists():
+        try:
+            cached = pd.read_pickle(cache)
+            if cached.get("sig") == sig:
+                return cached["frame"].copy()
+        except Exception as e:
+            print(f"⚠️ 读取缓存 {cache} 失败，将重新读取：{e}")
+
+    if path.suffix.lower() in (".xlsx", ".xls"):
+        df = pd.read_excel(path, **read_kwargs)
+        encoding = None
+    else:
+        encoding = read_kwargs.pop("encoding", None)
+        if encoding is not None:
+            df = pd.read_csv(path, encoding=encoding, **read_kwargs)
+        else:
+            encoding = sniff_encoding(path)
+            try:
+                df = pd.read_csv(path, encoding=encoding, **read_kwargs)
+            except UnicodeDecodeError as e:
+                sniffed, encoding = encoding, sniff_encoding(path, sample_bytes=None)
+                print(f"⚠️ {path.name} 开头 {SNIFF_BYTES // 1024} KB 判断为 {sniffed}，"
+                      f"但后面的内容解码失败（{e.reason}），按整个文件改用 {encoding} 重新读取。")
+                df = pd.read_csv(path, encoding=encoding, **read_kwargs)
+
+    df = repair_frame(df)
+
+    if use_cache:
+        try:
+            pd.to_pickle({"sig": sig, "encoding": encoding, "frame": df}, cache)
+        except OSError as e:
+            print(f"⚠️ 无法写入缓存 {cache}：{e}")
+
+    return df
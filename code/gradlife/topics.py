@@ -0,0 +1,124 @@
+"""
+topics.py
+
+“某道编码题 × 高压组”的话题配置（债务、心理健康求助、霸凌、骚扰 / 歧视 ……）。
+
+原来的 14、18、20、39、43 各自读 worklife 派生变量、按 resp_id 并入编码列、用 codebook 贴标签，
+再 groupby + transform("sum") 算百分比。现在每个话题只是 TOPICS 里的一行：
+
+    "debt": CodedTopic("v039_code", "debt_label", "05_debt/debt_vs_high_stress.csv", "债务预期"),
+
+    from gradlife.topics import topic_frame, write_topic_table
+    write_topic_table("debt")                           # 标签 × 高压组 → CSV
+    df = topic_frame(["mental_help"], degree=True)      # 带学位标签的明细，交给 gradlife.crosstab
+
+新增话题：在 TOPICS 里加一行即可。steps.py 按 TOPICS 为每个话题生成一个步骤，
+都运行 14_coded_topic_vs_worklife.py <话题名>；只有交叉表要额外处理的话题
+（如 39 给骚扰表加题目文本）才写专门的编号脚本，并在 CodedTopic 里用 script 注明。
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+from gradlife import session
+from gradlife.bootstrap import shared
+from gradlife.codebook import load_codebook
+from gradlife.crosstab import STRESS_COL, crosstab
+from gradlife.keys import ID_COL, attach
+from gradlife.typed_store import read_typed
+
+OUTPUT_DIR = Path("/workspace/output")
+WORKLIFE_PATH = OUTPUT_DIR / "04_worklife" / "worklife_derived_vars.csv"
+
+DEGREE_COL = "v004_code"
+DEGREE = ["degree_code_int", "degree_label"]
+
+
+class CodedTopic:
+    """
+    一道编码题：col 是 coded 列，label 是贴好标签后的列名，out 是交叉表的输出路径（相对 output/）。
+    unlabeled="code" 时 codebook 里没有标签的编码记为 "Code k"，默认记为缺失（不参与统计）。
+    script 是自己写交叉表的编号脚本（不含 .py）；为 None 时由 14_coded_topic_vs_worklife.py 生成。
+    """
+
+    def __init__(self, col: str, label: str, out: str, desc: str, unlabeled: str = "drop",
+                 script: str | None = None):
+        self.col = col
+        self.label = label
+        self.rel = f"output/{out}"          # 相对 /workspace，供 steps.py 登记输出
+        self.out = OUTPUT_DIR / out
+        self.desc = desc
+        self.unlabeled = unlabeled
+        self.script = script
+
+
+TOPICS = {
+    "debt": CodedTopic("v039_code", "debt_label", "05_debt/debt_vs_high_stress.csv", "债务预期"),
+    "mental_help": CodedTopic("v095_code", "help_label", "06_mental_health/mental_help_vs_high_stress.csv", "心理健康求助"),
+    "bullying": CodedTopic("v103_code", "bully_label", "07_bullying/bullying_vs_high_stress.csv", "霸凌经历"),
+    "harassment": CodedTopic("v112_code", "harassment_label", "07_harassment/harassment_vs_high_stress.csv",
+                             "骚扰/歧视经历", unlabeled="code", script="39_harassment_vs_worklife"),
+}
+
+
+def generic_topics() -> list[str]:
+    """没有专门脚本、由 14_coded_topic_vs_worklife.py 生成交叉表的话题。"""
+    return [name for name, t in TOPICS.items() if t.script is None]
+
+
+def _label(cb, col: str, values: pd.Series, unlabeled: str) -> pd.Series:
+    codes = pd.to_numeric(values, errors="coerce").round().astype("Int64")
+    labels = cb.label(col, codes)
+    if unlabeled == "code":
+        missing = labels.isna() & codes.notna()
+        labels[missing] = "Code " + codes[missing].astype(str)
+    return labels
+
+
+def topic_frame(names, degree: bool = False) -> pd.DataFrame:
+    """
+    worklife 派生变量（含 high_stress_group）按 resp_id 并上各话题的编码列，贴好标签；
+    degree=True 时再加 degree_code_int / degree_label。所有话题的编码列一次读入。
+    数据中没有某个话题的编码列时提示并跳过该话题（不生成它的标签列）。
+    """
+    topics = [TOPICS[n] for n in names]
+    cols = [t.col for t in topics] + ([DEGREE_COL] if degree else [])
+    df = session.read_csv(WORKLIFE_PATH)
+    if STRESS_COL not in df.columns:
+        raise ValueError(f"worklife_derived_vars.csv 中没有 {STRESS_COL} 列，请确认 05_worklife_analysis.py 是否正确运行。")
+
+    data = read_typed([ID_COL] + cols)
+    present = [c for c in cols if c in data.columns]
+    df = attach(df.drop(columns=[c for c in present if c in df.columns]), data, present)
+
+    cb = load_codebook()
+    for t in topics:
+        if t.col not in df.columns:
+            print(f"⚠️ 没有找到 {t.col} 列，请确认列名是否正确。")
+            continue
+        df[t.label] = _label(cb, t.col, df[t.col], t.unlabeled)
+    if degree and DEGREE_COL in df.columns:
+        df["degree_code_int"] = pd.to_numeric(df[DEGREE_COL], errors="coerce").round().astype("Int64")
+        df["degree_label"] = cb.label(DEGREE_COL, df["degree_code_int"])
+    return df
+
+
+def write_topic_table(name: str, df: pd.DataFrame | None = None) -> pd.DataFrame | None:
+    """
+    话题标签 × 高压组的交叉表（每个标签内部的百分比及其 bootstrap 区间 percent_ci_low / percent_ci_high），
+    写到 TOPICS 里配置的路径。
+    """
+    topic = TOPICS[name]
+    if df is None:
+        df = topic_frame([name])
+    if topic.label not in df.columns:
+        return None
+
+    ct = crosstab(df, topic.label, boot=shared())
+    topic.out.parent.mkdir(parents=True, exist_ok=True)
+    ct.to_csv(topic.out, index=False)
+    print(f"已保存{topic.desc} × 高压组结果到：", topic.out)
+    return ct
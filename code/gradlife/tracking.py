@@ -0,0 +1,114 @@
+"""
+tracking.py
+
+列级依赖：记录每个脚本实际读了共享表的哪些列，并给这些表算逐列的内容哈希。
+
+typed_clean 有上千列，metadata / codebook 每列一行，但大多数脚本只用其中几列。
+改了 metadata 里某一列的 q_type 之后，02 会重写整个 typed_clean，如果按整个文件判断，
+所有下游都要重跑。现在：
+
+- run_pipeline.py 运行每个步骤时设置环境变量 GRADLIFE_ACCESS_LOG；
+  read_typed(columns)、codebook 的查询方法、session.read_csv 会把读到的（文件, 列）追加进去；
+  读整张表（read_typed() 不给列、read_csv）记为“全部列”，typed_columns() 记为伪列 SCHEMA；
+- 步骤结束后 Pipeline 记下它读了哪些列，下次判断是否重跑时，
+  这些文件只比较它读过的那几列的哈希（见 dag.Pipeline.input_hashes）。
+
+没有设置 GRADLIFE_ACCESS_LOG（单独运行脚本）时 record() 什么都不做。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from gradlife.hashing import combine_hashes, json_sha256
+
+ENV_VAR = "GRADLIFE_ACCESS_LOG"
+SCHEMA = "__columns__"     # 伪列：只依赖“有哪些列”（typed_columns），不依赖具体的值
+
+_SEEN: set = set()        # 本进程已经写过的 (日志, 文件, 列)，避免重复写
+
+
+def norm_path(path) -> str:
+    """规范成绝对路径，但不解析符号链接（访问日志按声明的路径记录）。"""
+    return os.path.normpath(os.path.abspath(path))
+
+
+def record(path, columns=None):
+    """记录读取了 path 的 columns 列；columns=None 表示读了整个文件。"""
+    log = os.environ.get(ENV_VAR)
+    if not log:
+        return
+    path = norm_path(path)
+    cols = [None] if columns is None else [str(c) for c in columns]
+    new = [c for c in cols if (log, path, c) not in _SEEN]
+    if not new:
+        return
+    _SEEN.update((log, path, c) for c in new)
+    Path(log).parent.mkdir(parents=True, exist_ok=True)
+    with open(log, "a", encoding="utf-8") as f:
+        for c in new:
+            f.write(json.dumps({"path": path, "column": c}, ensure_ascii=False) + "\n")
+
+
+def reset():
+    """同一进程里连续运行多个步骤（session 模式）时，每个步骤开始前调用。"""
+    _SEEN.clear()
+
+
+def read_log(log_path: Path) -> dict:
+    """{规范化路径: 读过的列 set；读过整个文件则为 None}。"""
+    reads = {}
+    log_path = Path(log_path)
+    if not log_path.exists():
+        return reads
+    for line in log_path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        rec = json.loads(line)
+        path, col = rec["path"], rec["column"]
+        if col is None:
+            reads[path] = None
+        elif reads.get(path, set()) is not None:
+            reads.setdefault(path, set()).add(col)
+    return reads
+
+
+def columns_digest(column_hashes: dict, columns) -> str:
+    """只由 columns 这几列的哈希合成的指纹；不存在的列也参与（之后新增该列会改变指纹）。"""
+    return combine_hashes("columns", *(f"{c}={column_hashes.get(c, '-')}" for c in sorted(columns)))
+
+
+# ---------- 逐列哈希 ----------
+
+def parquet_column_hashes(path: Path) -> dict:
+    """Parquet：每列 = dtype + 逐行值的哈希。"""
+    df = pd.read_parquet(path)
+    hashes = {SCHEMA: json_sha256([str(c) for c in df.columns])}
+    for col in df.columns:
+        values = pd.util.hash_pandas_object(df[col], index=False).to_numpy()
+        hashes[str(col)] = combine_hashes(str(df[col].dtype), hashlib.sha256(values.tobytes()).hexdigest())
+    return hashes
+
+
+def metadata_column_hashes(path: Path) -> dict:
+    """metadata CSV：每个 col_name 对应那一行（所有字段）的哈希。"""
+    meta = pd.read_csv(path, dtype=str, keep_default_na=False)
+    hashes = {}
+    for row in meta.to_dict("records"):
+        col = row.get("col_name", "")
+        hashes[col] = combine_hashes(hashes.get(col, ""), json_sha256(row))
+    return hashes
+
+
+def codebook_column_hashes(path: Path) -> dict:
+    """编译好的 codebook：每列 = 描述信息 + 标签字典的哈希。"""
+    cb = pd.read_pickle(path)["codebook"]
+    return {
+        str(col): json_sha256([cb.info.get(col), cb.dicts.get(col)])
+        for col in set(cb.info) | set(cb.dicts)
+    }
@@ -0,0 +1,116 @@
+"""
+typed_store.py
+
+typed-clean 数据（02_clean_by_qtype.py 的输出）的列式存储。
+
+原来下游脚本几乎都 pd.read_csv 整个 data_step2_typed_clean.csv（几百列），
+只为了用其中几列。现在 02 写出一个 Parquet 文件：
+- *_code / *_num / *_answered：可空小整数（Int8 / Int16）
+- *_mask：多选题位掩码（uint8 ~ uint64）
+- 文本列：category（Parquet 中为字典编码）
+- 开放题原文：string（几乎每行都不同，字典编码没有意义）
+
+下游用 read_typed(columns=[...]) 读取，只解码需要的那几列（列投影）：
+
+    from gradlife.typed_store import read_typed
+    df = read_typed(["v004_code", "v095_code"])
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+from gradlife import session, tracking
+
+TYPED_DIR = Path("/workspace/output/02_typed_clean")
+TYPED_PARQUET = TYPED_DIR / "data_step2_typed_clean.parquet"
+TYPED_CSV = TYPED_DIR / "data_step2_typed_clean.csv"   # 旧格式，只在没有 Parquet 时兜底
+
+
+def to_store_dtypes(df: pd.DataFrame, keep_string_cols=()) -> pd.DataFrame:
+    """
+    整理成适合列式存储的类型：
+    - 数值列保持不变（编码列本来就是 Int8 / Int16，掩码是 uint）
+    - *_answered（开放题是否作答，02 里算出来是 int64 的 0 / 1）转成 Int8
+    - 其余文本列转成 category；keep_string_cols 中的列保持 string
+    """
+    keep_string_cols = set(keep_string_cols)
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if col in keep_string_cols:
+            out[col] = s.astype("string")
+        elif col.endswith("_answered") and pd.api.types.is_integer_dtype(s):
+            out[col] = s.astype("Int8")
+        elif pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+            out[col] = s
+        else:
+            out[col] = s.astype("string").astype("category")
+    return pd.DataFrame(out, index=df.index)
+
+
+def write_typed(df: pd.DataFrame, path: Path = TYPED_PARQUET, keep_string_cols=()) -> Path:
+    """
+    把 typed-clean 数据写成 Parquet（文本列字典编码），返回实际写出的路径。
+    没装 pyarrow 时退回写 CSV（TYPED_CSV），read_typed 会自动读它。
+    """
+    store = to_store_dtypes(df, keep_string_cols=keep_string_cols)
+    try:
+        store.to_parquet(path, index=False)
+    except ImportError:
+        print(f"⚠️ 未安装 pyarrow，改为写出 CSV：{TYPED_CSV}")
+        store.to_csv(TYPED_CSV, index=False)
+        if path.exists():
+            path.unlink()  # 旧的 Parquet 会优先被读到，必须删掉
+        return TYPED_CSV
+
+    # 旧格式 CSV 若还在，会和新数据不一致，删掉避免误读
+    if TYPED_CSV.exists():
+        TYPED_CSV.unlink()
+    return path
+
+
+def _schema_names(path: Path) -> list[str]:
+    if path.exists():
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(path).names)
+    return list(pd.read_csv(TYPED_CSV, nrows=0).columns)
+
+
+def typed_columns(path: Path = TYPED_PARQUET) -> list[str]:
+    """只读 schema，返回所有列名（不读数据）。"""
+    tracking.record(path, [tracking.SCHEMA])
+    return _schema_names(path)
+
+
+def read_typed(columns=None, path: Path = TYPED_PARQUET) -> pd.DataFrame:
+    """
+    读取 typed-clean 数据。
+
+    columns=None 读全部列；传入列名列表时只读这些列（不存在的列会被忽略并提示）。
+    没有 Parquet 文件时退回到旧的 CSV（同样只解析需要的列）。
+    session 模式下整张表只读一次，列投影在内存里做。
+    """
+    tracking.record(path, columns)
+    if columns is not None:
+        columns = list(dict.fromkeys(columns))  # 去重且保持顺序
+        available = set(_schema_names(path))
+        missing = [c for c in columns if c not in available]
+        if missing:
+            print(f"⚠️ typed_clean 中没有这些列，将忽略：{missing}")
+        columns = [c for c in columns if c in available]
+
+    if session.is_active():
+        if path.exists():
+            full = session.cached_frame(path, pd.read_parquet)
+        else:
+            full = session.cached_frame(TYPED_CSV, lambda p: pd.read_csv(p, low_memory=False))
+        return (full if columns is None else full[columns]).copy()
+
+    if path.exists():
+        return pd.read_parquet(path, columns=columns)
+
+    print(f"⚠️ 未找到 {path}，改为读取 CSV：{TYPED_CSV}")
+    return pd.read_csv(TYPED_CSV, usecols=columns, low_memory=False)
@@ -0,0 +1,135 @@
+"""
+watch.py
+
+监视模式（run_pipeline.py --watch）：盯着流水线的源文件
+（output/01_cleaning/metadata_step1_basic.xlsx 和 data/data.xlsx），
+保存后自动增量重建。
+
+手工改 metadata 的 q_type / multi_group 之后：
+- 先打印哪些列的分类（q_type、multi_group、value_labels ……）变了；
+- 再跑一次增量构建：02 重写 typed_clean，但下游只比较自己读过的那几列（gradlife.tracking），
+  没用到这些列的导出直接跳过；
+- 最后打印 typed_clean / metadata 中内容真的变了的列。
+
+配合 --session 使用时脚本在同一个进程里运行，pandas 等只导入一次，改一列到图表更新通常只要几秒。
+"""
+
+from __future__ import annotations
+
+import time
+
+import pandas as pd
+
+from gradlife.dag import stat_signature
+from gradlife.textio import read_table_clean
+
+META_XLSX = "output/01_cleaning/metadata_step1_basic.xlsx"
+CLASSIFICATION_COLS = ["q_type", "multi_group", "value_type", "value_labels", "q_no", "question_text"]
+
+
+def source_files(pipe) -> list[str]:
+    """没有步骤写、只被读取的文件（按第一次出现的顺序）。"""
+    return list(dict.fromkeys(rel for (_, rel), prod in pipe.producer.items() if prod is None))
+
+
+def metadata_snapshot(path) -> pd.DataFrame:
+    """metadata 的分类字段（全部转成字符串，便于比较），以 col_name 为索引。"""
+    try:
+        meta = read_table_clean(path)
+    except Exception as e:
+        print(f"⚠️ 读取 {path} 失败：{e}")
+        return None
+    for col in CLASSIFICATION_COLS:
+        if col not in meta.columns:
+            meta[col] = None
+    meta = meta.drop_duplicates("col_name", keep="last").set_index("col_name")
+    return meta[CLASSIFICATION_COLS].astype("string").fillna("")
+
+
+def classification_changes(old: pd.DataFrame, new: pd.DataFrame) -> list[str]:
+    """逐列比较两份 metadata，返回可读的变化说明。"""
+    if old is None or new is None:
+        return []
+    lines = []
+    for col in new.index.difference(old.index):
+        lines.append(f"新增列 {col}（q_type={new.at[col, 'q_type'] or '空'}）")
+    for col in old.index.difference(new.index):
+        lines.append(f"删除列 {col}")
+    common = old.index.intersection(new.index)
+    a, b = old.loc[common], new.loc[common]
+    diff = a.ne(b)
+    for col in common[diff.any(axis=1)]:
+        fields = [f"{f}: {a.at[col, f] or '空'} → {b.at[col, f] or '空'}" for f in CLASSIFICATION_COLS if diff.at[col, f]]
+        lines.append(f"{col}  " + "；".join(fields))
+    return lines
+
+
+def _column_hashes(pipe) -> dict:
+    """{文件: 逐列哈希}，取自流水线状态里最后一个写它的步骤的记录。"""
+    out = {}
+    for rel in pipe.column_hashers:
+        writers = pipe.writers.get(rel, [])
+        rec = pipe._recorded_output(writers[-1], rel) if writers else None
+        out[rel] = (rec or {}).get("columns") or {}
+    return out
+
+
+def _report_column_changes(before: dict, after: dict):
+    for rel, new in after.items():
+        old = before.get(rel, {})
+        changed = sorted(c for c in set(old) | set(new) if old.get(c) != new.get(c))
+        if changed:
+            shown = ", ".join(changed[:20]) + (f" ……共 {len(changed)} 列" if len(changed) > 20 else "")
+            print(f"   {rel.rsplit('/', 1)[-1]} 中内容有变化的列：{shown}")
+
+
+def watch(pipe, interval: float = 1.0, settle: float = 1.0, **run_kwargs) -> bool:
+    """
+    轮询源文件的大小 / 修改时间，有变化且 settle 秒内不再变化（Excel 保存完）后重建一次。
+    Ctrl+C 退出；返回最后一次构建是否成功。
+    """
+    sources = source_files(pipe)
+    meta_path = pipe.workspace / META_XLSX
+    sigs = {rel: stat_signature(pipe.workspace / rel) for rel in sources}
+    meta = metadata_snapshot(meta_path) if META_XLSX in sources else None
+
+    print("先做一次增量构建 ...")
+    ok = pipe.run(**run_kwargs)
+    print(f"\n👀 正在监视：{', '.join(sources)}（Ctrl+C 退出）")
+
+    try:
+        while True:
+            time.sleep(interval)
+            now = {rel: stat_signature(pipe.workspace / rel) for rel in sources}
+            if now == sigs:
+                continue
+            # 等文件写完：settle 秒内签名不再变化
+            while True:
+                time.sleep(settle)
+                later = {rel: stat_signature(pipe.workspace / rel) for rel in sources}
+                if later == now:
+                    break
+                now = later
+
+            changed = [rel for rel in sources if now[rel] != sigs[rel]]
+            sigs = now
+            print(f"\n[{time.strftime('%H:%M:%S')}] 检测到改动：{', '.join(changed)}")
+            if META_XLSX in changed:
+                new_meta = metadata_snapshot(meta_path)
+                lines = classification_changes(meta, new_meta)
+                if lines:
+                    print("   分类有变化的列：")
+                    for line in lines:
+                        print(f"     - {line}")
+                else:
+                    print("   没有列的分类发生变化。")
+                if new_meta is not None:
+                    meta = new_meta
+
+            before = _column_hashes(pipe)
+            ok = pipe.run(**run_kwargs)
+            _report_column_changes(before, _column_hashes(pipe))
+            print(f"\n👀 继续监视（Ctrl+C 退出）")
+    except KeyboardInterrupt:
+        print("\n已退出监视模式。")
+    return ok
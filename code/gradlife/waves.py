@@ -0,0 +1,125 @@
+"""
+waves.py
+
+新一批（一“波”）受访者追加进立方体之前的准备，以及已追加批次的登记（93_append_wave_to_cubes.py 用）。
+
+prepare_wave(batch) 从原始回答补出立方体需要的人级维度（批次里已经有的列原样保留）：
+- degree_label         ← v004_code（derived_vars 的 CodeMap，与 90 相同）
+- hours_level          ← v089 原始工时文本
+- high_stress_group    ← v089 + v084（高工时 且 工作生活平衡 1–3，规格见 derived_vars.SPECS，与 05 相同）
+- region_continent / country_name ← v031–v036（与 34、97 相同）
+- support_quadrant_label ← v079/v091/v097/v100/v101 的 *_num，
+  按 90 存下的全体均值 / 标准差（support_index.SCALING_PATH）分档，不在这一批内部重新标准化
+
+已追加的批次记在 WAVES_PATH（来源文件、时间、resp_id）。这些人不在 data.xlsx 里，
+下一次 run_pipeline.py 全量重建（或从缓存恢复）93 和各导出表时会被丢掉；
+run_pipeline.py 每次运行前、93 全量重建时都用 warn_dropped_waves 提示，直到这一批并进 data.xlsx。
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from gradlife.derive import derive
+from gradlife.derived_vars import COUNTRY_COLS, COUNTRY_REGIONS, SPECS
+from gradlife.keys import ID_COL
+from gradlife.master_store import read_master
+from gradlife.support_index import INST_VARS, SUP_VARS, read_scaling, support_columns
+
+WAVES_PATH = Path("/workspace/output/99_master/cube_waves.json")
+
+# 由 derive 从原始列算出的维度
+DERIVED_DIMS = ["degree_label", "hours_level", "high_stress_group"]
+
+
+def _regions(batch: pd.DataFrame) -> pd.DataFrame:
+    cols = [c for c in COUNTRY_COLS if c in batch.columns]
+    region = pd.Series(pd.NA, index=batch.index, dtype="object")
+    for col in cols:
+        region = region.mask(batch[col].notna(), COUNTRY_REGIONS[col])
+    country = batch[cols].bfill(axis=1).iloc[:, 0] if cols else pd.Series(pd.NA, index=batch.index)
+    return pd.DataFrame({"region_continent": region, "country_name": country})
+
+
+def prepare_wave(batch: pd.DataFrame) -> pd.DataFrame:
+    """补出立方体维度后的批次（副本）；既没有维度列、也没有对应原始列时报错。"""
+    batch = batch.copy()
+    derived = []
+
+    todo = [c for c in DERIVED_DIMS if c not in batch.columns]
+    if todo:
+        batch[todo] = derive(batch, SPECS, targets=todo)[todo]
+        derived += todo
+
+    geo = [c for c in ("region_continent", "country_name") if c not in batch.columns]
+    if geo:
+        if not any(c in batch.columns for c in COUNTRY_COLS):
+            raise KeyError(f"这一批数据既没有 {geo}，也没有各大洲的国家题 {COUNTRY_COLS}。")
+        batch[geo] = _regions(batch)[geo]
+        derived += geo
+
+    if "support_quadrant_label" not in batch.columns:
+        missing = [c for c in SUP_VARS + INST_VARS if c not in batch.columns]
+        if missing:
+            raise KeyError(f"这一批数据既没有 support_quadrant_label，也没有支持题 {missing}。")
+        support = support_columns(batch, read_scaling())
+        batch["support_quadrant_label"] = support["support_quadrant_label"]
+        derived.append("support_quadrant_label")
+
+    if derived:
+        print(f"从原始回答补出的维度：{derived}")
+    return batch
+
+
+def read_waves(path: Path = WAVES_PATH) -> list:
+    if not path.exists():
+        return []
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def record_wave(source, ids, path: Path = WAVES_PATH) -> Path:
+    """登记一批已追加进立方体的受访者。"""
+    waves = read_waves(path)
+    waves.append({
+        "source": str(source),
+        "appended_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "n": int(len(ids)),
+        ID_COL: [int(i) for i in ids],
+    })
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(waves, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+    return path
+
+
+def warn_dropped_waves(master_ids=None) -> int:
+    """提示 resp_id 不在主表里的已追加批次，返回这样的批次数；没有登记过批次时不读主表。"""
+    if not WAVES_PATH.exists():
+        return 0
+    if master_ids is None:
+        try:
+            master_ids = read_master([ID_COL], groups=["core"])[ID_COL]
+        except FileNotFoundError:
+            return 0
+    dropped = dropped_waves(master_ids)
+    for source, n in dropped:
+        print(f"⚠️ 用 93_append_wave_to_cubes.py 追加的 {source} 中有 {n} 人不在 data.xlsx 里：全量重建"
+              "（或从缓存恢复）立方体和 35 / 37 / 94–98 的导出表后，这一批不再计入；请把这一批并进 data.xlsx。")
+    return len(dropped)
+
+
+def dropped_waves(master_ids) -> list:
+    """已登记、但 resp_id 不在主表里的批次：[(来源, 不在主表里的人数), ...]。"""
+    master_ids = np.asarray(master_ids, dtype=np.int64)
+    out = []
+    for wave in read_waves():
+        ids = np.asarray(wave[ID_COL], dtype=np.int64)
+        n = int((~np.isin(ids, master_ids)).sum())
+        if n:
+            out.append((wave["source"], n))
+    return out
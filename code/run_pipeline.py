@@ -0,0 +1,97 @@
+"""
+run_pipeline.py
+
+按依赖图运行编号脚本，只重跑输入真的变了的步骤。
+
+用法（在 code/ 目录下）：
+    python run_pipeline.py                 # 增量构建全部步骤
+    python run_pipeline.py 44 98           # 只构建 44、98 以及它们的上游
+    python run_pipeline.py --dry-run       # 只看哪些步骤会重跑
+    python run_pipeline.py --force 02      # 强制重跑 02（下游按内容哈希决定是否重跑）
+    python run_pipeline.py -j 0            # 并行运行，进程数 = 可用 CPU 核数
+    python run_pipeline.py --session       # 单进程运行，共享数据表只从磁盘解析一次
+    python run_pipeline.py --list          # 打印步骤顺序和依赖
+    python run_pipeline.py --watch --session   # 监视 metadata / data.xlsx，保存后自动增量重建
+    python run_pipeline.py --no-cache      # 不用输出缓存：要重跑的步骤都真的运行，输出写成普通文件
+    python run_pipeline.py --diff          # 比较最近两次运行的清单，看哪个步骤变慢 / 变大
+    python run_pipeline.py --diff A.json B.json
+
+每个步骤的输出写到 /workspace/output/.pipeline_logs/<步骤名>.log；
+每次运行的清单（用时、CPU、峰值内存、行列数、字节数）写到 /workspace/output/run_manifests/。
+步骤的输入 / 输出声明见 gradlife/steps.py。
+"""
+
+import argparse
+import os
+import sys
+
+from gradlife.dag import Pipeline
+from gradlife.manifest import list_manifests, print_diff
+from gradlife.steps import COLUMN_HASHERS, STEPS
+from gradlife.watch import watch
+from gradlife.waves import warn_dropped_waves
+
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:       # Windows / macOS 没有 sched_getaffinity
+        return os.cpu_count() or 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按依赖图增量运行编号脚本。")
+    parser.add_argument("targets", nargs="*",
+                        help="只构建这些步骤（按名称前缀匹配，如 05、44）及其上游")
+    parser.add_argument("--force", nargs="+", default=[], metavar="STEP",
+                        help="无论指纹如何都重跑这些步骤")
+    parser.add_argument("--dry-run", action="store_true", help="只打印会运行哪些步骤")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="同时运行的脚本数，0 表示使用全部可用核（默认 1，顺序运行）")
+    parser.add_argument("--session", action="store_true",
+                        help="在当前进程里顺序运行所有脚本，共享内存中的数据表（忽略 -j）")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="不从输出缓存恢复，也不把输出存进缓存（output/.artifacts/）")
+    parser.add_argument("--watch", action="store_true",
+                        help="构建后继续监视源文件（metadata_step1_basic.xlsx、data.xlsx），有改动就增量重建")
+    parser.add_argument("--interval", type=float, default=1.0, help="监视模式的轮询间隔（秒，默认 1）")
+    parser.add_argument("--list", action="store_true", help="打印步骤顺序和依赖后退出")
+    parser.add_argument("--diff", nargs="*", metavar="MANIFEST",
+                        help="比较两份运行清单（不给路径则比较最近两次运行）后退出")
+    args = parser.parse_args()
+
+    if args.diff is not None:
+        paths = args.diff or list_manifests()[-2:]
+        if len(paths) != 2:
+            print("❌ 需要两份运行清单：给出两个路径，或者先至少运行两次流水线。")
+            return 2
+        print_diff(*paths)
+        return 0
+
+    pipe = Pipeline(STEPS, cache=not args.no_cache, column_hashers=COLUMN_HASHERS)
+
+    if args.list:
+        for name in pipe.order:
+            deps = sorted(pipe.deps[name], key=pipe.order.index)
+            print(f"{name}  ← {', '.join(deps) if deps else '（源文件）'}")
+        return 0
+
+    try:
+        targets = pipe.match(args.targets) if args.targets else None
+        force = pipe.match(args.force)
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        return 2
+
+    jobs = args.jobs if args.jobs > 0 else available_cores()
+    warn_dropped_waves()
+    if args.watch:
+        ok = watch(pipe, interval=args.interval, targets=targets, jobs=jobs, in_process=args.session)
+        return 0 if ok else 1
+    ok = pipe.run(targets=targets, force=force, dry_run=args.dry_run, jobs=jobs,
+                  in_process=args.session)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
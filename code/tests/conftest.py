@@ -0,0 +1,6 @@
+"""测试在 code/ 目录下运行（python -m pytest tests）；这里把 code/ 加进 sys.path，以便 import gradlife。"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,69 @@
+"""gradlife.bitmap：位图查询的计数和直接在 DataFrame 上筛选的结果一致，存盘后能原样读回。"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gradlife.bitmap import BitmapIndex, Bits, load_index
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(5)
+    n = 203                                   # 不是 64 的倍数，最后一个字有填充位
+    return pd.DataFrame({
+        "resp_id": np.arange(1, n + 1),
+        "degree_label": rng.choice(np.array(["Doctorate", "Master's", None], dtype=object), n),
+        "hours_level": rng.choice(np.array(["low", "high", "very_high", None], dtype=object), n),
+        "high_stress_group": rng.choice([0.0, 1.0, np.nan], n),
+        "high_hours_flag": rng.integers(0, 2, n),
+    })
+
+
+@pytest.fixture
+def idx(df):
+    return BitmapIndex.build(df, columns=["degree_label", "hours_level", "high_stress_group", "high_hours_flag"])
+
+
+def test_bits_roundtrip_and_not():
+    mask = np.random.default_rng(0).random(130) < 0.3
+    bits = Bits.from_mask(mask)
+    assert np.array_equal(bits.to_mask(), mask)
+    assert (~bits).count() == int((~mask).sum())          # 填充位不算进 ~ 的结果
+
+
+def test_queries_match_pandas(df, idx):
+    sel = (idx["degree_label"] == "Doctorate") & idx["hours_level"].isin(["high", "very_high"])
+    mask = (df["degree_label"] == "Doctorate") & df["hours_level"].isin(["high", "very_high"])
+    assert idx.count(sel) == int(mask.sum())
+    assert np.array_equal(idx.resp_ids(sel), df.loc[mask, "resp_id"].to_numpy())
+    assert idx.count({"degree_label": "Doctorate", "hours_level": ["high", "very_high"]}) == int(mask.sum())
+
+    # ~(列 == 值) 包含该列缺失的人，& notna 之后才等于 !=
+    assert idx.count(~(idx["degree_label"] == "Doctorate")) == int((df["degree_label"] != "Doctorate").sum())
+    not_doc = (idx["degree_label"] != "Doctorate")
+    assert idx.count(not_doc) == int((df["degree_label"].notna() & (df["degree_label"] != "Doctorate")).sum())
+    assert idx.count({"degree_label": "PhD"}) == 0
+
+
+def test_high_stress_rate(df, idx):
+    sel = {"high_hours_flag": 1}
+    sub = df[df["high_hours_flag"] == 1]
+    high, total, pct = idx.high_stress_rate(sel)
+    assert high == int((sub["high_stress_group"] == 1).sum())
+    assert total == int(sub["high_stress_group"].notna().sum())
+    assert pct == pytest.approx(high / total * 100)
+
+
+def test_unknown_column(idx):
+    with pytest.raises(KeyError):
+        idx["country_name"]
+
+
+def test_save_load_keeps_value_types(tmp_path, idx):
+    loaded = load_index(idx.save(tmp_path / "bitmap_index.npz"))
+    assert loaded.keys == idx.keys
+    assert all(type(a[1]) is type(b[1]) for a, b in zip(loaded.keys, idx.keys))
+    assert np.array_equal(loaded.words, idx.words)
+    assert loaded.count({"high_hours_flag": 1, "high_stress_group": 1.0}) == \
+        idx.count({"high_hours_flag": 1, "high_stress_group": 1.0})
@@ -0,0 +1,77 @@
+"""gradlife.bootstrap：向量化的重抽样求和、分位数与逐次循环的写法一致。"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gradlife import bootstrap
+from gradlife.bootstrap import Bootstrap, cell_sums, quantiles
+
+
+@pytest.fixture
+def obs():
+    rng = np.random.default_rng(1)
+    n_units, n_obs, n_cells = 40, 300, 7
+    units = rng.integers(0, n_units, n_obs)
+    cells = rng.integers(0, n_cells, n_obs)
+    values = rng.normal(size=n_obs)
+    weights = rng.poisson(1.0, size=(25, n_units)).astype(np.float64)
+    return weights, units, cells, n_cells, values
+
+
+def loop_sums(weights, units, cells, n_cells, v):
+    out = np.zeros((weights.shape[0], n_cells))
+    for b in range(weights.shape[0]):
+        for u, c, x in zip(units, cells, v):
+            out[b, c] += weights[b, u] * x
+    return out
+
+
+def test_cell_sums_matches_loop(obs):
+    weights, units, cells, n_cells, values = obs
+    counts, sums = cell_sums(weights, units, cells, n_cells, [None, values])
+    assert np.allclose(counts, loop_sums(weights, units, cells, n_cells, np.ones(len(units))))
+    assert np.allclose(sums, loop_sums(weights, units, cells, n_cells, values))
+
+
+def test_cell_sums_reduceat_path(obs, monkeypatch):
+    weights, units, cells, n_cells, values = obs
+    expect = cell_sums(weights, units, cells, n_cells, [None, values])
+    monkeypatch.setattr(bootstrap, "_CHUNK", 64)          # 强制走分块 reduceat
+    got = cell_sums(weights, units, cells, n_cells, [None, values])
+    for e, g in zip(expect, got):
+        assert np.allclose(e, g)
+
+
+def test_quantiles_match_numpy():
+    rng = np.random.default_rng(2)
+    stats = rng.normal(size=(101, 6))
+    stats[rng.random(stats.shape) < 0.2] = np.nan
+    stats[:, 5] = np.nan                                   # 全为缺失的格子
+    for q in (0.025, 0.5, 0.975):
+        with np.errstate(all="ignore"), pytest.warns(RuntimeWarning):
+            expect = np.nanquantile(stats, q, axis=0)
+        assert np.allclose(quantiles(stats, q), expect, equal_nan=True)
+
+
+def test_weights_fixed_seed_and_multinomial():
+    assert np.array_equal(Bootstrap(reps=50).weights(30), Bootstrap(reps=50).weights(30))
+    w = Bootstrap(reps=50, method="multinomial").weights(30)
+    assert w.shape == (50, 30) and (w.sum(axis=1) == 30).all()
+    with pytest.raises(ValueError):
+        Bootstrap(method="jackknife")
+
+
+def test_group_mean_ci_order_and_brackets():
+    rng = np.random.default_rng(3)
+    n_units = 200
+    df = pd.DataFrame({
+        "unit": np.repeat(np.arange(n_units), 3),
+        "group": rng.choice(["b", "a", "c"], n_units * 3),
+        "score": rng.integers(1, 8, n_units * 3).astype(float),
+    })
+    grp = df.groupby("group")
+    agg = grp["score"].mean().reset_index()
+    lo, hi = Bootstrap(reps=300).group_mean_ci(grp, df["score"], df["unit"], n_units)
+    assert (lo <= agg["score"]).all() and (agg["score"] <= hi).all()
+    assert (hi - lo > 0).all()
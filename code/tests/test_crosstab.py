@@ -0,0 +1,59 @@
+"""gradlife.crosstab：结果必须和原来各脚本的 groupby + transform("sum") 写法一致。"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gradlife.bootstrap import Bootstrap
+from gradlife.crosstab import crosstab, crosstabs
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    n = 500
+    return pd.DataFrame({
+        "debt_label": rng.choice(np.array(["No", "Yes", "Not sure", None], dtype=object), n),
+        "help_label": rng.choice(np.array(["Received", "Needed", None], dtype=object), n),
+        "degree_label": rng.choice(np.array(["Doctorate", "Master's", None], dtype=object), n),
+        "high_stress_group": rng.choice([0.0, 1.0, np.nan], n, p=[0.5, 0.4, 0.1]),
+    })
+
+
+def groupby_reference(df, keys, within):
+    ct = df.dropna(subset=keys).groupby(keys).size().reset_index(name="count")
+    ct["percent"] = ct["count"] / ct.groupby(within)["count"].transform("sum") * 100
+    return ct
+
+
+def test_matches_groupby(df):
+    got = crosstab(df, "debt_label")
+    ref = groupby_reference(df, ["debt_label", "high_stress_group"], ["debt_label"])
+    pd.testing.assert_frame_equal(got, ref, check_dtype=False)
+
+
+def test_by_and_within(df):
+    got = crosstab(df, "help_label", by=["degree_label"], within=["degree_label", "high_stress_group"])
+    keys = ["help_label", "degree_label", "high_stress_group"]
+    ref = groupby_reference(df, keys, ["degree_label", "high_stress_group"])
+    pd.testing.assert_frame_equal(got, ref, check_dtype=False)
+
+
+def test_crosstabs_share_strata(df):
+    tables = crosstabs(df, ["debt_label", "help_label"], by="degree_label")
+    for target, table in tables.items():
+        pd.testing.assert_frame_equal(table, crosstab(df, target, by=["degree_label"]))
+
+
+def test_missing_column():
+    with pytest.raises(KeyError):
+        crosstab(pd.DataFrame({"a": [1]}), "a", by=["b"])
+
+
+def test_bootstrap_interval_brackets_percent(df):
+    ct = crosstab(df, "debt_label", boot=Bootstrap(reps=200))
+    assert (ct["percent_ci_low"] <= ct["percent"] + 1e-9).all()
+    assert (ct["percent"] <= ct["percent_ci_high"] + 1e-9).all()
+    # 同样的种子，区间完全一样
+    again = crosstab(df, "debt_label", boot=Bootstrap(reps=200))
+    pd.testing.assert_frame_equal(ct, again)
@@ -0,0 +1,116 @@
+"""gradlife.cube：立方体只存可加的量，分批建再合并必须和一次建全量完全一致。"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gradlife import cube
+from gradlife.cube import DIMS, ID_COL, STRESS_COL, build_cube, build_item_cube, merge_cubes
+
+LEVELS = {
+    "degree_label": ["Doctorate", "Master's", None],
+    "region_continent": ["Asia", "Europe", "North America", None],
+    "country_name": ["China", "Germany", "United States", None],
+    "hours_level": ["<40", "40-60", ">60", None],
+    "support_quadrant_label": ["High-High", "Low-Low", None],
+}
+
+
+def make_persons(ids, seed):
+    rng = np.random.default_rng(seed)
+    n = len(ids)
+    df = pd.DataFrame({ID_COL: np.asarray(ids, dtype=np.int64)})
+    for d in DIMS:
+        df[d] = pd.Series(rng.choice(np.array(LEVELS[d], dtype=object), size=n), dtype=object)
+    stress = rng.choice([0.0, 1.0, np.nan], size=n, p=[0.5, 0.4, 0.1])
+    df[STRESS_COL] = stress
+    return df
+
+
+def make_fact(persons, seed, n_items=4):
+    rng = np.random.default_rng(seed)
+    fact = pd.DataFrame({
+        ID_COL: np.repeat(persons[ID_COL].to_numpy(), n_items),
+        "item_id": np.tile(np.arange(1, n_items + 1), len(persons)),
+        "score": rng.integers(1, 8, size=len(persons) * n_items).astype("float64"),
+    })
+    return fact.sample(frac=0.8, random_state=seed).reset_index(drop=True)   # 有的人没答某些条目
+
+
+def as_plain(df):
+    """比较时把 category 列换回 object（两边的类别集合可能顺序一样但来源不同）。"""
+    out = df.copy()
+    for c in out.columns:
+        if isinstance(out[c].dtype, pd.CategoricalDtype):
+            out[c] = out[c].astype(object)
+    return out
+
+
+@pytest.fixture
+def waves():
+    a = make_persons(range(1, 301), seed=1)
+    b = make_persons(range(301, 451), seed=2)
+    return a, b, make_fact(a, seed=3), make_fact(b, seed=4)
+
+
+def test_merge_equals_full_build(waves):
+    a, b, _, _ = waves
+    merged = merge_cubes(build_cube(a), build_cube(b))
+    full = build_cube(pd.concat([a, b], ignore_index=True))
+    pd.testing.assert_frame_equal(as_plain(merged), as_plain(full))
+
+
+def test_item_cube_merge_equals_full_build(waves):
+    a, b, fa, fb = waves
+    merged = merge_cubes(build_item_cube(fa, a), build_item_cube(fb, b), item=True)
+    full = build_item_cube(pd.concat([fa, fb], ignore_index=True), pd.concat([a, b], ignore_index=True))
+    pd.testing.assert_frame_equal(as_plain(merged), as_plain(full))
+
+
+def test_item_cube_totals(waves):
+    a, _, fa, _ = waves
+    ic = build_item_cube(fa, a)
+    top = ic[ic["grouping_id"] == 0]
+    valid = fa.merge(a[[ID_COL, STRESS_COL]], on=ID_COL).dropna(subset=[STRESS_COL])
+    expect = valid.groupby(["item_id", STRESS_COL])["score"].agg(["size", "sum"]).reset_index()
+    got = top[["item_id", STRESS_COL, "n", "score_sum"]].astype("float64").reset_index(drop=True)
+    assert np.array_equal(got[["item_id", STRESS_COL]].to_numpy(), expect[["item_id", STRESS_COL]].to_numpy())
+    assert np.array_equal(got["n"].to_numpy(), expect["size"].to_numpy())
+    assert np.allclose(got["score_sum"].to_numpy(), expect["sum"].to_numpy())
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, waves):
+    """把立方体的读写路径换到临时目录，先写入第一批。"""
+    monkeypatch.setattr(cube, "CUBE_DIR", tmp_path)
+    for name in ["CUBE_PARQUET", "CUBE_CSV", "ITEM_CUBE_PARQUET", "ITEM_CUBE_CSV", "MEMBERS_PARQUET", "MEMBERS_CSV"]:
+        monkeypatch.setattr(cube, name, tmp_path / getattr(cube, name).name)
+    a, _, fa, _ = waves
+    cube.write_cube(build_cube(a))
+    cube.write_item_cube(build_item_cube(fa, a))
+    cube.write_members(a[ID_COL])
+    return waves
+
+
+def test_append_wave_matches_full_build(store):
+    a, b, fa, fb = store
+    got, got_items = cube.append_wave(b, fb)
+    full = build_cube(pd.concat([a, b], ignore_index=True))
+    pd.testing.assert_frame_equal(as_plain(got), as_plain(full))
+    pd.testing.assert_frame_equal(as_plain(cube.read_cube()), as_plain(full))
+    assert len(got_items) == len(cube.read_item_cube())
+    assert np.array_equal(cube.read_members(), np.arange(1, 451))
+
+
+def test_append_wave_rejects_duplicate_ids_in_batch(store):
+    _, b, _, fb = store
+    dup = pd.concat([b, b.iloc[:1]], ignore_index=True)
+    with pytest.raises(ValueError, match="重复"):
+        cube.append_wave(dup, fb)
+
+
+def test_append_wave_rejects_ids_already_in_cube(store):
+    a, _, fa, _ = store
+    with pytest.raises(ValueError, match="已经计入"):
+        cube.append_wave(a.iloc[:5], fa)
+    assert np.array_equal(cube.read_members(), np.arange(1, 301))   # 拒绝时不改写已有的立方体
@@ -0,0 +1,43 @@
+"""gradlife.keys：按 resp_id 对齐 / 连接。"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gradlife.keys import align, attach
+
+
+def test_align_positions_and_missing():
+    pos = align([3, 1, 7, 2], [1, 2, 3, 4])
+    assert pos.tolist() == [2, 0, -1, 1]
+
+
+def test_align_same_order():
+    keys = np.arange(1, 6)
+    assert align(keys, keys).tolist() == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.parametrize("left, right", [
+    ([1, 2, 3], [1, 2, 2, 3]),
+    ([1, 2, 2, 3], [1, 2, 2, 3]),       # 两边完全相同也不能跳过重复检查
+    ([5], [5, 5]),
+])
+def test_align_rejects_duplicate_keys(left, right):
+    with pytest.raises(ValueError, match="重复"):
+        align(left, right)
+
+
+def test_attach_left_join_keeps_left_order():
+    left = pd.DataFrame({"resp_id": [3, 1, 9], "x": [30, 10, 90]}, index=[10, 11, 12])
+    right = pd.DataFrame({"resp_id": [1, 2, 3], "y": ["a", "b", "c"]})
+    out = attach(left, right, ["y"])
+    assert out.index.tolist() == [10, 11, 12]
+    assert out["y"].tolist()[:2] == ["c", "a"]
+    assert pd.isna(out["y"].iloc[2])
+
+
+def test_attach_rejects_duplicate_right_keys():
+    left = pd.DataFrame({"resp_id": [1, 2]})
+    right = pd.DataFrame({"resp_id": [1, 1, 2], "y": [1, 2, 3]})
+    with pytest.raises(ValueError, match="重复"):
+        attach(left, right, ["y"])